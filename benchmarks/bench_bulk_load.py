@@ -0,0 +1,61 @@
+"""
+Compare rows/sec of the COPY bulk loader against pandas to_sql.
+
+Run from the repository root against the database configured in .env:
+    python -m benchmarks.bench_bulk_load --scale 50
+"""
+import argparse
+import time
+import pandas as pd
+
+from src import ingestion
+
+
+def build_frame(table_name, scale):
+    """
+    Preprocess a source CSV and repeat it to simulate several seasons of data.
+    Args:
+        table_name (str): Key into ingestion.DATA_FILES.
+        scale (int): Number of times to repeat the file.
+    Returns:
+        pd.DataFrame: Preprocessed DataFrame with scale times the rows.
+    """
+    df = ingestion.preprocess_data(
+        ingestion.DATA_FILES[table_name],
+        ingestion.RENAME_MAPPINGS[table_name],
+        ingestion.FORMAT_CURRENCY_COLUMNS.get(table_name),
+        format_percent_columns=ingestion.FORMAT_PERCENT_COLUMNS.get(table_name),
+    )
+    return pd.concat([df] * scale, ignore_index=True)
+
+
+def time_load(df, table_name, method, repeat):
+    """
+    Time load_data_to_postgres for one method and return the best rows/sec.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        ingestion.load_data_to_postgres(df, table_name, method=method)
+        best = min(best, time.perf_counter() - start)
+    return len(df) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=20, help="Times to repeat each source file.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per method; the best is reported.")
+    parser.add_argument("--tables", nargs="+", default=["xg", "xgoals_games"], choices=list(ingestion.DATA_FILES))
+    args = parser.parse_args()
+
+    ingestion.setup_tables()
+    print(f"{'table':<15}{'rows':>10}{'to_sql rows/s':>16}{'copy rows/s':>16}{'speedup':>10}")
+    for table_name in args.tables:
+        df = build_frame(table_name, args.scale)
+        to_sql_rate = time_load(df, table_name, "to_sql", args.repeat)
+        copy_rate = time_load(df, table_name, "copy", args.repeat)
+        print(f"{table_name:<15}{len(df):>10}{to_sql_rate:>16,.0f}{copy_rate:>16,.0f}{copy_rate / to_sql_rate:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Measure the latency of the analysis queries' hot predicates with and without the
+composite indexes in db.TABLE_INDEXES.
+
+The player and game source files are repeated --seasons times, each copy shifted to an
+earlier season (and its games to an earlier year), loaded into the database configured in
+.env (or DB_BACKEND) and merged. Every query is then timed with the indexes dropped and
+again with them created. Run from the repository root:
+    DB_BACKEND=sqlite python -m benchmarks.bench_indexes --seasons 30
+"""
+import argparse
+import time
+import pandas as pd
+from sqlalchemy import text
+
+from src import db, ingestion, transform
+
+# Queries on the indexed predicates, with parameters picked from the loaded data
+QUERIES = {
+    "team season": (
+        "SELECT * FROM player_performance_metrics WHERE team = :team AND season = :season",
+        "(team, season)",
+    ),
+    "player seasons": (
+        """
+        SELECT xg.season, xg.xg, goals_added.goals_added, xp.passes
+        FROM xg
+        JOIN goals_added ON goals_added.player = xg.player AND goals_added.team = xg.team AND goals_added.season = xg.season
+        JOIN xp ON xp.player = xg.player AND xp.team = xg.team AND xp.season = xg.season
+        WHERE xg.player = :player AND xg.team = :team
+        """,
+        "(player, team, season)",
+    ),
+    "head to head": (
+        "SELECT * FROM xgoals_games WHERE date BETWEEN :start AND :end AND home_team = :team AND away_team = :opponent",
+        "(date, home_team, away_team)",
+    ),
+}
+
+
+def build_frame(table_name, seasons):
+    """
+    Preprocess a source file and repeat it once per season, moving each copy back a year.
+    Returns:
+        pd.DataFrame: Preprocessed DataFrame with seasons times the rows.
+    """
+    df = ingestion.preprocess_data(
+        ingestion.DATA_FILES[table_name],
+        ingestion.RENAME_MAPPINGS[table_name],
+        ingestion.FORMAT_CURRENCY_COLUMNS.get(table_name),
+        format_percent_columns=ingestion.FORMAT_PERCENT_COLUMNS.get(table_name),
+    )
+    copies = []
+    for offset in range(seasons):
+        if "season" in df.columns:
+            copies.append(df.assign(season=df["season"] - offset))
+        else:
+            dates = pd.to_datetime(df["date"]) - pd.DateOffset(years=offset)
+            copies.append(df.assign(date=dates.dt.strftime("%Y-%m-%d")))
+    return pd.concat(copies, ignore_index=True)
+
+
+def time_query(query, params, repeat):
+    """
+    Time a query, reading every row.
+    Returns:
+        tuple: Best milliseconds and the number of rows returned.
+    """
+    best = float("inf")
+    with db.get_engine().connect() as conn:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            rows = conn.execute(text(query), params).fetchall()
+            best = min(best, time.perf_counter() - start)
+    return best * 1000, len(rows)
+
+
+def set_indexes(enabled):
+    with db.get_engine().begin() as conn:
+        for table_name in db.TABLE_INDEXES:
+            if enabled:
+                db.create_indexes(conn, table_name)
+            else:
+                db.drop_indexes(conn, table_name)
+        if conn.dialect.name != "duckdb":
+            # Refresh the planner statistics for the new set of indexes
+            conn.execute(text("ANALYZE"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seasons", type=int, default=20, help="Seasons of data to load.")
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per query; the best is reported.")
+    args = parser.parse_args()
+
+    ingestion.setup_tables()
+    rows = 0
+    for table_name in transform.SOURCE_TABLES + ["xgoals_games"]:
+        df = build_frame(table_name, args.seasons)
+        ingestion.load_data_to_postgres(df, table_name)
+        rows += len(df)
+    transform.create_player_performance_metrics()
+
+    engine = db.get_engine()
+    player = pd.read_sql("SELECT player, team, season FROM goals_added ORDER BY goals_added DESC LIMIT 1", engine).iloc[0]
+    game = pd.read_sql("SELECT date, home_team, away_team FROM xgoals_games ORDER BY date DESC LIMIT 1", engine).iloc[0]
+    params = {
+        "team season": {"team": player["team"], "season": str(player["season"])},
+        "player seasons": {"player": player["player"], "team": player["team"]},
+        "head to head": {
+            # The latest season's meetings of the two teams
+            "start": f"{str(game['date'])[:4]}-01-01",
+            "end": str(game["date"])[:10],
+            "team": game["home_team"],
+            "opponent": game["away_team"],
+        },
+    }
+
+    results = {}
+    for enabled in [False, True]:
+        set_indexes(enabled)
+        for name, (query, _) in QUERIES.items():
+            results[name, enabled] = time_query(query, params[name], args.repeat)
+
+    print(f"{rows} source rows over {args.seasons} seasons on {engine.dialect.name}")
+    print(f"{'query':<16}{'index':<32}{'rows':>6}{'no index ms':>14}{'indexed ms':>12}{'speedup':>9}")
+    for name, (_, index) in QUERIES.items():
+        (plain_ms, matched), (indexed_ms, _) = results[name, False], results[name, True]
+        print(f"{name:<16}{index:<32}{matched:>6}{plain_ms:>14.3f}{indexed_ms:>12.3f}{plain_ms / indexed_ms:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
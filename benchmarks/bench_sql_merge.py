@@ -0,0 +1,73 @@
+"""
+Compare building player_performance_metrics with the pandas merge against the SQL
+CREATE TABLE AS merge.
+
+The player source files are repeated --scale times with a per-copy suffix on the player
+names, loaded into the database configured in .env (or DB_BACKEND), and merged both
+ways. Run from the repository root:
+    python -m benchmarks.bench_sql_merge --scale 50
+"""
+import argparse
+import time
+import pandas as pd
+
+from src import db, ingestion, transform
+
+
+def build_frame(table_name, scale):
+    """
+    Preprocess a player source file and repeat it scale times. Each copy renames its
+    players the same way in every table, so the copies still merge with each other.
+    Returns:
+        pd.DataFrame: Preprocessed DataFrame with scale times the rows.
+    """
+    df = ingestion.preprocess_data(
+        ingestion.DATA_FILES[table_name],
+        ingestion.RENAME_MAPPINGS[table_name],
+        ingestion.FORMAT_CURRENCY_COLUMNS.get(table_name),
+        format_percent_columns=ingestion.FORMAT_PERCENT_COLUMNS.get(table_name),
+    )
+    copies = [df.assign(player=df["player"] + f" {i}") if i else df for i in range(scale)]
+    return pd.concat(copies, ignore_index=True)
+
+
+def time_merge(method, repeat):
+    """
+    Time create_player_performance_metrics for one method.
+    Returns:
+        tuple: Best seconds and the query count of the last run.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        db.reset_stats()
+        start = time.perf_counter()
+        transform.create_player_performance_metrics(method)
+        best = min(best, time.perf_counter() - start)
+    return best, db.get_stats()["queries"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=20, help="Times to repeat each player file.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per method; the best is reported.")
+    args = parser.parse_args()
+
+    ingestion.setup_tables()
+    rows = 0
+    for table_name in transform.SOURCE_TABLES:
+        df = build_frame(table_name, args.scale)
+        ingestion.load_data_to_postgres(df, table_name)
+        rows += len(df)
+
+    results = {method: time_merge(method, args.repeat) for method in ["pandas", "sql"]}
+    merged = pd.read_sql("SELECT COUNT(*) AS n FROM player_performance_metrics", db.get_engine())["n"].iloc[0]
+
+    print(f"{rows} source rows merged into {merged} rows on {db.get_engine().dialect.name}")
+    print(f"{'method':<10}{'seconds':>10}{'queries':>10}")
+    for method, (seconds, queries) in results.items():
+        print(f"{method:<10}{seconds:>10.3f}{queries:>10}")
+    print(f"speedup: {results['pandas'][0] / results['sql'][0]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
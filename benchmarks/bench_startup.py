@@ -0,0 +1,61 @@
+"""
+Startup time of the command line entry points, and the heavy libraries each one imports.
+
+Every command is run --repeat times in a fresh interpreter with -X importtime, and the
+best wall time is reported with the heavy libraries found in the import log. The ingest
+commands load one table into the database configured in .env (or DB_BACKEND). Run from
+the repository root:
+    DB_BACKEND=sqlite python -m benchmarks.bench_startup --repeat 5
+"""
+import argparse
+import subprocess
+import sys
+import time
+
+HEAVY_MODULES = ["pandas", "sqlalchemy", "matplotlib", "seaborn", "pyarrow"]
+
+COMMANDS = {
+    "cli --help": ["src/cli.py", "--help"],
+    "cli run --help": ["src/cli.py", "run", "--help"],
+    "cli ingest salaries": ["src/cli.py", "ingest", "salaries", "--force"],
+    "cli ingest xg": ["src/cli.py", "ingest", "xg", "--force"],
+    "automate_pipeline --help": ["src/automate_pipeline.py", "--help"],
+}
+
+
+def time_command(args, repeat):
+    """
+    Run a command repeat times.
+    Returns:
+        tuple: Best seconds, and the heavy modules it imported.
+    """
+    best = float("inf")
+    imported = set()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, "-X", "importtime", *args], capture_output=True, text=True)
+        best = min(best, time.perf_counter() - start)
+        if result.returncode != 0:
+            raise RuntimeError(f"{' '.join(args)} failed:\n{result.stdout}{result.stderr[-2000:]}")
+        # Lines look like "import time:   self |  cumulative | module"
+        modules = {line.rsplit("|", 1)[-1].strip() for line in result.stderr.splitlines() if line.startswith("import time:")}
+        imported = {name for name in HEAVY_MODULES if name in modules}
+    return best, imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per command; the best is reported.")
+    args = parser.parse_args()
+
+    # Python itself, the floor for every command
+    floor, _ = time_command(["-c", "pass"], args.repeat)
+    print(f"{'command':<28}{'ms':>8}  heavy imports")
+    print(f"{'python -c pass':<28}{floor * 1000:>8.0f}")
+    for name, command in COMMANDS.items():
+        seconds, imported = time_command(command, args.repeat)
+        print(f"{name:<28}{seconds * 1000:>8.0f}  {', '.join(name for name in HEAVY_MODULES if name in imported) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Memory and time report for inferred versus schema-typed CSV parsing, per source file.
+
+Each source file is repeated --scale times into a temporary CSV, then parsed with
+inferred dtypes and with the dtypes derived by ingestion.read_dtypes, and the parsed
+frame is cast to its table schema as it is before every load. Does not need a database. Run from the repository root:
+    python -m benchmarks.bench_typed_parsing --scale 100
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+import pandas as pd
+
+from src import bulk_load, ingestion
+
+
+def write_scaled_csv(file_path, scale, folder):
+    """
+    Write a copy of a CSV with its data rows repeated scale times. The first mapped text
+    column gets a per-copy suffix so the copies survive drop_duplicates.
+    Returns:
+        str: Path to the scaled CSV.
+    """
+    raw = pd.read_csv(file_path, dtype=str)
+    key = next(col for col in ["Player", "Team", "Date"] if col in raw.columns)
+    copies = [raw.assign(**{key: raw[key] + f" {i}"}) if i else raw for i in range(scale)]
+    scaled_path = os.path.join(folder, os.path.basename(file_path))
+    pd.concat(copies).to_csv(scaled_path, index=False)
+    return scaled_path
+
+
+def parse(table_name, file_path, dtypes):
+    return ingestion.preprocess_data(
+        file_path,
+        ingestion.RENAME_MAPPINGS[table_name],
+        ingestion.FORMAT_CURRENCY_COLUMNS.get(table_name),
+        format_percent_columns=ingestion.FORMAT_PERCENT_COLUMNS.get(table_name),
+        dtypes=dtypes,
+    )
+
+
+def measure(table_name, file_path, dtypes, repeat=3):
+    """
+    Parse one file and return (best parse seconds, best schema cast seconds, tracemalloc
+    peak bytes, result bytes). Timing runs without tracemalloc, which would otherwise
+    slow the parse down.
+    """
+    column_types = bulk_load.parse_schema_columns(ingestion.TABLE_SCHEMAS[table_name])
+    elapsed = coerce_elapsed = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        df = parse(table_name, file_path, dtypes)
+        elapsed = min(elapsed, time.perf_counter() - start)
+        start = time.perf_counter()
+        bulk_load.coerce_to_schema(df, column_types)
+        coerce_elapsed = min(coerce_elapsed, time.perf_counter() - start)
+
+    tracemalloc.start()
+    df = parse(table_name, file_path, dtypes)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, coerce_elapsed, peak, df.memory_usage(deep=True).sum()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=50, help="Times to repeat each source file.")
+    args = parser.parse_args()
+
+    mb = 1024 * 1024
+    print(f"{'table':<14}{'mode':<10}{'seconds':>10}{'cast s':>10}{'peak MB':>10}{'frame MB':>10}")
+    with tempfile.TemporaryDirectory() as folder:
+        for table_name, file_path in ingestion.DATA_FILES.items():
+            scaled_path = write_scaled_csv(file_path, args.scale, folder)
+            for mode, dtypes in [("inferred", None), ("typed", ingestion.read_dtypes(table_name))]:
+                elapsed, coerce_elapsed, peak, size = measure(table_name, scaled_path, dtypes)
+                print(
+                    f"{table_name:<14}{mode:<10}{elapsed:>10.3f}{coerce_elapsed:>10.3f}"
+                    f"{peak / mb:>10.1f}{size / mb:>10.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+"""
+Benchmark suite for ingestion, transform, standings and rendering on synthetic data,
+with stored baselines to catch regressions.
+
+Source files are generated with benchmarks.synthetic at the chosen scale and loaded into
+a throwaway embedded database (SQLite by default). Each case prepares its input, then its
+timed call is run --rounds times; the median is compared with the baseline stored for the
+backend and scale in benchmarks/baselines, and a case more than --threshold slower fails
+the run. Run from the repository root:
+    python -m benchmarks.suite --scale 10x
+    python -m benchmarks.suite --scale 10x --save     # store the results as the baseline
+    python -m benchmarks.suite --scale 100x --backend duckdb -k transform
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import pandas as pd
+
+from benchmarks import synthetic
+from src import analysis_context, data_analysis, db, ingestion, instrument, render, seasons, standings, transform
+
+BASELINE_FOLDER = os.path.join(os.path.dirname(__file__), "baselines")
+
+# Seasons and leagues per scale; 1x is about the size of the files in data/
+SCALES = {"1x": (1, 1), "10x": (5, 2), "100x": (20, 5)}
+
+# A case whose median is this much slower than its baseline is a regression
+THRESHOLD = 0.25
+
+# Cases by name: functions taking the Workspace that prepare a case's input and return
+# (timed function, rows processed)
+CASES = {}
+
+
+def case(name):
+    def register(prepare):
+        CASES[name] = prepare
+        return prepare
+    return register
+
+
+class Workspace:
+    """
+    Synthetic source files, and the embedded database they are loaded into.
+    """
+
+    def __init__(self, folder, seasons, leagues):
+        self.folder = folder
+        self.paths = synthetic.generate(os.path.join(folder, "data"), seasons, leagues)
+        self.output_folder = os.path.join(folder, "output")
+        self.frames = {}
+
+    def preprocess(self, table_name):
+        return ingestion.preprocess_data(
+            self.paths[table_name],
+            ingestion.RENAME_MAPPINGS[table_name],
+            ingestion.FORMAT_CURRENCY_COLUMNS.get(table_name),
+            format_percent_columns=ingestion.FORMAT_PERCENT_COLUMNS.get(table_name),
+            dtypes=ingestion.read_dtypes(table_name),
+        )
+
+    def load(self):
+        """
+        Load every source file and build player_performance_metrics with its metrics, the
+        state the transform, standings and render cases start from.
+        """
+        ingestion.setup_tables()
+        for table_name in ingestion.DATA_FILES:
+            self.frames[table_name] = self.preprocess(table_name)
+            ingestion.load_data_to_postgres(self.frames[table_name], table_name)
+        transform.create_player_performance_metrics()
+        transform.add_per_90_and_efficiency_metrics()
+
+    def rows(self, *table_names):
+        return sum(len(self.frames[table_name]) for table_name in table_names)
+
+
+@case("ingestion.preprocess")
+def bench_preprocess(ws):
+    return lambda: [ws.preprocess(table_name) for table_name in ingestion.DATA_FILES], ws.rows(*ingestion.DATA_FILES)
+
+
+@case("ingestion.load")
+def bench_load(ws):
+    def run():
+        for table_name in ingestion.DATA_FILES:
+            ingestion.load_data_to_postgres(ws.frames[table_name], table_name)
+    return run, ws.rows(*ingestion.DATA_FILES)
+
+
+@case("transform.merge_pandas")
+def bench_merge_pandas(ws):
+    return lambda: transform.create_player_performance_metrics("pandas"), ws.rows(*transform.SOURCE_TABLES)
+
+
+@case("transform.merge_sql")
+def bench_merge_sql(ws):
+    return lambda: transform.create_player_performance_metrics("sql"), ws.rows(*transform.SOURCE_TABLES)
+
+
+@case("transform.per_90_metrics")
+def bench_per_90(ws):
+    metrics_df = pd.read_sql("SELECT * FROM player_performance_metrics", db.get_engine())
+
+    def run():
+        transform.calculate_efficiency_metrics(transform.calculate_per_90_stats(metrics_df))
+    return run, len(metrics_df)
+
+
+@case("standings.compute")
+def bench_standings(ws):
+    games_df = ws.frames["xgoals_games"]
+    return lambda: standings.compute_standings(games_df), len(games_df)
+
+
+@case("standings.by_date")
+def bench_standings_by_date(ws):
+    games_df = ws.frames["xgoals_games"]
+    return lambda: standings.standings_by_date(games_df), len(games_df)
+
+
+@case("standings.team_points")
+def bench_team_points(ws):
+    # A fresh context each round, so the games are read from the database every time
+    return lambda: data_analysis.calculate_team_points(context=analysis_context.AnalysisContext()), ws.rows("xgoals_games")
+
+
+@case("render.player_charts")
+def bench_player_charts(ws):
+    def run():
+        context = analysis_context.AnalysisContext()
+        # Every season, so the work grows with the scale
+        jobs = [data_analysis.four_quadrant_job(ws.output_folder, context=context, season=seasons.ALL)]
+        render.render_charts(jobs + data_analysis.top_players_jobs(ws.output_folder, context=context, season=seasons.ALL))
+    return run, ws.rows("xg")
+
+
+@case("render.points_vs_salaries")
+def bench_points_chart(ws):
+    def run():
+        context = analysis_context.AnalysisContext()
+        render.render_charts([data_analysis.points_vs_salaries_job(ws.output_folder, context=context, season=seasons.ALL)])
+    return run, ws.rows("xgoals_games")
+
+
+def time_case(run, rounds):
+    """
+    Call a case's timed function rounds times, after one warm-up call.
+    Returns:
+        list: Seconds per round.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        run()
+        times = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - start)
+    return times
+
+
+def baseline_path(backend, scale):
+    return os.path.join(BASELINE_FOLDER, f"{backend}-{scale}.json")
+
+
+def read_baseline(path):
+    try:
+        with open(path) as f:
+            return json.load(f)["cases"]
+    except FileNotFoundError:
+        return {}
+
+
+def write_baseline(path, results):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    baseline = {
+        "machine": {"python": platform.python_version(), "pandas": pd.__version__, "cpus": os.cpu_count()},
+        "cases": {name: {"median": round(result["median"], 6), "rows": result["rows"]} for name, result in results.items()},
+    }
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare(results, baseline):
+    """
+    Compare each case's median with its baseline.
+    Args:
+        results (dict): Case name to its result, with a median in seconds.
+        baseline (dict): Case name to the stored median; cases without one are not compared.
+    Returns:
+        dict: Case name to the ratio of its median to the baseline, for the compared cases.
+    """
+    return {
+        name: result["median"] / baseline[name]["median"]
+        for name, result in results.items()
+        if baseline.get(name, {}).get("median")
+    }
+
+
+def run_suite(ws, names, rounds):
+    results = {}
+    for name in names:
+        with contextlib.redirect_stdout(io.StringIO()):
+            run, rows = CASES[name](ws)
+        times = time_case(run, rounds)
+        results[name] = {
+            "rows": rows, "min": min(times), "median": statistics.median(times),
+            "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=list(SCALES), default="1x", help="Size of the synthetic data.")
+    parser.add_argument("--backend", choices=["sqlite", "duckdb"], default="sqlite", help="Embedded database.")
+    parser.add_argument("--rounds", type=int, default=5, help="Timed calls per case; the median is compared.")
+    parser.add_argument("-k", dest="select", default="", help="Only run cases whose name contains this text.")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="Slowdown that counts as a regression.")
+    parser.add_argument("--save", action="store_true", help="Store the results as the baseline.")
+    args = parser.parse_args()
+
+    names = [name for name in CASES if args.select in name]
+    seasons, leagues = SCALES[args.scale]
+    path = baseline_path(args.backend, args.scale)
+    baseline = read_baseline(path)
+
+    # Time the code itself, not the stage records, and draw the charts in-process
+    instrument.configure(enabled=False)
+    render.configure(workers=1, dpi=render.PREVIEW_DPI, use_cache=False)
+    with tempfile.TemporaryDirectory() as folder:
+        os.environ["DB_BACKEND"] = args.backend
+        os.environ["DB_PATH"] = os.path.join(folder, f"bench.{args.backend}")
+        db.dispose_engine()
+        ws = Workspace(folder, seasons, leagues)
+        with contextlib.redirect_stdout(io.StringIO()):
+            ws.load()
+        results = run_suite(ws, names, args.rounds)
+        db.dispose_engine()
+
+    ratios = compare(results, baseline)
+    print(f"{args.scale} ({seasons} seasons x {leagues} leagues) on {args.backend}, median of {args.rounds} rounds")
+    print(f"{'case':<28}{'rows':>9}{'median ms':>12}{'min ms':>10}{'rows/s':>12}{'baseline':>10}")
+    regressions = []
+    for name, result in results.items():
+        vs_baseline = f"{ratios[name]:.2f}x" if name in ratios else "-"
+        if ratios.get(name, 0) > 1 + args.threshold:
+            regressions.append(name)
+            vs_baseline += " !"
+        print(
+            f"{name:<28}{result['rows']:>9}{result['median'] * 1000:>12.1f}{result['min'] * 1000:>10.1f}"
+            f"{result['rows'] / result['median']:>12.0f}{vs_baseline:>10}"
+        )
+
+    if args.save:
+        write_baseline(path, {**{name: {"median": entry["median"], "rows": entry["rows"]} for name, entry in baseline.items()}, **results})
+        print(f"Baseline saved to {path}")
+    elif regressions:
+        print(f"Slower than the baseline by more than {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+Deterministic synthetic MLS data in the layout of the source files in data/.
+
+One league season is about the size of the shipped files: 29 teams of 28 players (812
+rows per player file) and 34 rounds of games (476 games). --seasons and --leagues
+multiply that; players keep their names from season to season, a few change team each
+year, and every league has its own team codes (the first is MLS's, so ATL exists). The
+same seed and shape always write the same bytes. Run from the repository root:
+    python -m benchmarks.synthetic --seasons 20 --leagues 5 --out /tmp/mls_100x
+"""
+import argparse
+import csv
+import os
+import numpy as np
+import pandas as pd
+
+from src import ingestion
+
+MLS_TEAMS = [
+    "ATL", "ATX", "CHI", "CIN", "CLB", "CLT", "COL", "DAL", "DCU", "HOU", "LAFC", "LAG", "MIA", "MIN", "MTL",
+    "NER", "NSH", "NYC", "NYRB", "ORL", "PHI", "POR", "RSL", "SEA", "SJ", "SKC", "STL", "TOR", "VAN",
+]
+TEAMS_PER_LEAGUE = len(MLS_TEAMS)
+PLAYERS_PER_TEAM = 28
+ROUNDS = 34
+LAST_SEASON = 2024
+
+# Share of players who move to another team of their league each season
+TRANSFER_RATE = 0.1
+# Share of player-seasons missing from the goals added file, as in the shipped data
+GOALS_ADDED_MISSING = 0.08
+
+POSITIONS = ["GK", "CB", "FB", "DM", "CM", "AM", "W", "ST"]
+POSITION_WEIGHTS = [0.08, 0.18, 0.18, 0.1, 0.1, 0.06, 0.17, 0.13]
+KICKOFF_TIMES = ["19:30 EDT", "19:00 EDT", "21:00 EDT", "18:00 EDT", "16:25 EDT"]
+
+FIRST_NAMES = [
+    "Adrian", "Alex", "Andre", "Brian", "Bruno", "Carlos", "Chris", "Daniel", "Diego", "Emil", "Felipe", "Gabriel",
+    "Hugo", "Ian", "Ivan", "Jack", "Jamal", "Jesus", "Joao", "Jonathan", "Jordan", "Jose", "Julian", "Kai",
+    "Kevin", "Liam", "Lucas", "Luis", "Marco", "Mateo", "Miguel", "Nathan", "Nico", "Omar", "Oscar", "Pablo",
+    "Pedro", "Rafael", "Ryan", "Samuel", "Sean", "Thiago", "Tomas", "Victor", "Yuri", "Zack",
+]
+SURNAME_STEMS = [
+    "Al", "Bar", "Ber", "Cal", "Cas", "Dor", "Fer", "Gal", "Gar", "Hal", "Her", "Kel", "Lan", "Mar", "Mor",
+    "Nor", "Ol", "Pal", "Ram", "Ros", "San", "Tor", "Val", "Vin", "Wal",
+]
+SURNAME_ENDINGS = [
+    "ado", "ano", "berg", "by", "den", "dez", "ez", "ford", "ini", "ley", "man", "ney", "off", "on", "ova",
+    "quist", "rez", "sen", "son", "ter", "ton", "uel", "vic", "well",
+]
+
+
+def player_names(count):
+    """
+    Distinct player names, the same for the same count. Names stay distinct after
+    players.normalize_name so every synthetic player gets their own player_id.
+    """
+    names = []
+    per_round = len(FIRST_NAMES) * len(SURNAME_STEMS) * len(SURNAME_ENDINGS)
+    for i in range(count):
+        first = FIRST_NAMES[i % len(FIRST_NAMES)]
+        rest = i // len(FIRST_NAMES)
+        surname = SURNAME_STEMS[rest % len(SURNAME_STEMS)] + SURNAME_ENDINGS[(rest // len(SURNAME_STEMS)) % len(SURNAME_ENDINGS)]
+        # Past every combination, a second surname keeps the names apart
+        extra = f" {SURNAME_STEMS[(i // per_round) % len(SURNAME_STEMS)]}ez" if i >= per_round else ""
+        names.append(f"{first} {surname}{extra}")
+    return names
+
+
+def league_teams(league):
+    if league == 0:
+        return list(MLS_TEAMS)
+    return [f"L{league}{team}" for team in MLS_TEAMS]
+
+
+def build_player_seasons(rng, seasons, leagues):
+    """
+    One row per player per season: player, team, season, position and minutes.
+    """
+    squad_size = TEAMS_PER_LEAGUE * PLAYERS_PER_TEAM
+    names = np.array(player_names(squad_size * leagues), dtype=object)
+    positions = rng.choice(POSITIONS, size=len(names), p=POSITION_WEIGHTS)
+    frames = []
+    for league in range(leagues):
+        teams = np.array(league_teams(league), dtype=object)
+        players = slice(league * squad_size, (league + 1) * squad_size)
+        team_codes = np.repeat(np.arange(TEAMS_PER_LEAGUE), PLAYERS_PER_TEAM)
+        for season in range(LAST_SEASON - seasons + 1, LAST_SEASON + 1):
+            moving = rng.random(squad_size) < TRANSFER_RATE
+            team_codes = np.where(moving, rng.integers(0, TEAMS_PER_LEAGUE, squad_size), team_codes)
+            frames.append(pd.DataFrame({
+                "player": names[players],
+                "team": teams[team_codes],
+                "season": season,
+                "position": positions[players],
+                "minutes": rng.integers(1, 3400, squad_size),
+            }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def format_currency(values):
+    return [f"${value:,.0f}" for value in values]
+
+
+def format_percent(values):
+    return [f"{value:.1f}%" for value in values]
+
+
+def xg_frame(rng, base):
+    n = len(base)
+    share = base["minutes"].to_numpy() / 3400
+    shots = rng.poisson(60 * share)
+    on_target = rng.binomial(shots, 0.35)
+    goals = rng.binomial(on_target, 0.3)
+    xg = np.round(shots * rng.uniform(0.05, 0.16, n), 2)
+    key_passes = rng.poisson(35 * share)
+    assists = rng.binomial(key_passes, 0.15)
+    xa = np.round(key_passes * rng.uniform(0.05, 0.14, n), 2)
+    return pd.DataFrame({
+        "Player": base["player"], "Team": base["team"], "Season": base["season"],
+        "Position": base["position"], "Minutes": base["minutes"],
+        "Shots": shots, "SoT": on_target, "G": goals, "xG": xg,
+        "xPlace": np.round(rng.normal(0, 1, n), 2), "G-xG": np.round(goals - xg, 2),
+        "KeyP": key_passes, "A": assists, "xA": xa, "A-xA": np.round(assists - xa, 2),
+        "G+A": goals + assists, "xG+xA": np.round(xg + xa, 2),
+        "PA": np.round(rng.uniform(0, 12, n) * share, 2), "xPA": np.round(rng.uniform(0, 12, n) * share, 2),
+    })
+
+
+def goals_added_frame(rng, base):
+    base = base[rng.random(len(base)) >= GOALS_ADDED_MISSING]
+    n = len(base)
+    share = base["minutes"].to_numpy() / 3400
+    actions = {
+        name: np.round(rng.normal(0.2, 0.8, n) * share, 2)
+        for name in ["Dribbling", "Fouling", "Interrupting", "Passing", "Receiving", "Shooting"]
+    }
+    return pd.DataFrame({
+        "Player": base["player"].to_numpy(), "Team": base["team"].to_numpy(), "Season": base["season"].to_numpy(),
+        "Position": base["position"].to_numpy(), "Minutes": base["minutes"].to_numpy(),
+        **actions,
+        "Goals Added": np.round(sum(actions.values()), 2),
+    })
+
+
+def xp_frame(rng, base):
+    n = len(base)
+    share = base["minutes"].to_numpy() / 3400
+    pass_pct = rng.uniform(55, 92, n)
+    return pd.DataFrame({
+        "Player": base["player"], "Team": base["team"], "Season": base["season"],
+        "Position": base["position"], "Minutes": base["minutes"],
+        "Passes": rng.poisson(1800 * share),
+        "Pass %": format_percent(pass_pct), "xPass %": format_percent(pass_pct - rng.normal(0, 3, n)),
+        "Score": np.round(rng.normal(0, 25, n), 2), "Per100": np.round(rng.normal(0, 4, n), 2),
+        "Distance": np.round(rng.uniform(0, 50, n), 2), "Vertical": np.round(rng.normal(10, 10, n), 2),
+        "Touch %": format_percent(rng.uniform(2, 12, n)),
+        "Games": np.maximum(1, base["minutes"].to_numpy() // 90),
+    })
+
+
+def salaries_frame(rng, leagues):
+    teams = [team for league in range(leagues) for team in league_teams(league)]
+    n = len(teams)
+    players = rng.integers(14, 45, n)
+    average = rng.uniform(3e5, 1.2e6, n)
+    return pd.DataFrame({
+        "Team": teams, "N": players,
+        "TotalGuar": format_currency(players * average), "AvgGuar": format_currency(average),
+        "MedGuar": format_currency(average * rng.uniform(0.2, 0.5, n)),
+        "StdDevGuar": format_currency(average * rng.uniform(0.8, 3.5, n)),
+    })
+
+
+def games_frame(rng, seasons, leagues):
+    frames = []
+    for league in range(leagues):
+        teams = np.array(league_teams(league), dtype=object)
+        for season in range(LAST_SEASON - seasons + 1, LAST_SEASON + 1):
+            # Each round pairs off the shuffled teams, leaving one out as the count is odd
+            order = np.argsort(rng.random((ROUNDS, TEAMS_PER_LEAGUE)), axis=1)[:, :TEAMS_PER_LEAGUE - 1]
+            home, away = order[:, 0::2].ravel(), order[:, 1::2].ravel()
+            rounds = np.repeat(np.arange(ROUNDS), len(home) // ROUNDS)
+            dates = pd.Timestamp(f"{season}-02-21") + pd.to_timedelta(rounds * 7 + rng.integers(0, 3, len(home)), "D")
+            frames.append(pd.DataFrame({
+                "date": dates, "home_team": teams[home], "away_team": teams[away],
+            }))
+    games = pd.concat(frames, ignore_index=True)
+    n = len(games)
+    home_xg, away_xg = np.round(rng.gamma(2.2, 0.7, n), 2), np.round(rng.gamma(2.0, 0.65, n), 2)
+    home_goals, away_goals = rng.poisson(home_xg), rng.poisson(away_xg)
+    home_xgp = np.round(home_xg * rng.uniform(0.9, 1.1, n), 2)
+    away_xgp = np.round(away_xg * rng.uniform(0.9, 1.1, n), 2)
+    home_xpts = np.round(3 * home_xg / (home_xg + away_xg + 1), 2)
+    return pd.DataFrame({
+        "Date": games["date"].dt.strftime("%Y-%m-%d"), "Time": rng.choice(KICKOFF_TIMES, n),
+        "Home": games["home_team"], "HG": home_goals, "HxGt": home_xg, "HxGp": home_xgp,
+        "Away": games["away_team"], "AG": away_goals, "AxGt": away_xg, "AxGp": away_xgp,
+        "GD": home_goals - away_goals, "xGDt": np.round(home_xg - away_xg, 2),
+        "xGDp": np.round(home_xgp - away_xgp, 2), "Final": home_goals - away_goals,
+        "HxPts": home_xpts, "AxPts": np.round(np.clip(2.8 - home_xpts, 0, 3), 2),
+    }).sort_values("Date", ascending=False, kind="stable")
+
+
+def write_csv(df, path, row_index=True):
+    """
+    Write a frame the way the source files are written: every field quoted and, for the
+    player and salary files, an unnamed empty first column.
+    """
+    if row_index:
+        df = df.copy()
+        df.insert(0, "", "")
+    df.to_csv(path, index=False, quoting=csv.QUOTE_ALL, float_format="%.2f")
+
+
+def generate(folder, seasons=1, leagues=1, seed=0):
+    """
+    Write synthetic source files for every table of ingestion.DATA_FILES.
+    Args:
+        folder (str): Folder to write the files to.
+        seasons (int): Seasons per league, ending with LAST_SEASON.
+        leagues (int): Leagues of TEAMS_PER_LEAGUE teams.
+        seed (int): Random seed; the same seed and shape give the same files.
+    Returns:
+        dict: Table name to the path of its file, shaped like ingestion.DATA_FILES.
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(folder, exist_ok=True)
+    paths = {table_name: os.path.join(folder, os.path.basename(path)) for table_name, path in ingestion.DATA_FILES.items()}
+
+    base = build_player_seasons(rng, seasons, leagues)
+    write_csv(xg_frame(rng, base), paths["xg"])
+    write_csv(goals_added_frame(rng, base), paths["goals_added"])
+    write_csv(xp_frame(rng, base), paths["xp"])
+    write_csv(salaries_frame(rng, leagues), paths["salaries"])
+    write_csv(games_frame(rng, seasons, leagues), paths["xgoals_games"], row_index=False)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", required=True, help="Folder to write the files to.")
+    parser.add_argument("--seasons", type=int, default=1, help="Seasons per league.")
+    parser.add_argument("--leagues", type=int, default=1, help="Leagues of 29 teams.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    args = parser.parse_args()
+
+    for table_name, path in generate(args.out, args.seasons, args.leagues, args.seed).items():
+        with open(path) as f:
+            rows = sum(1 for _ in f) - 1
+        print(f"{table_name:<14}{rows:>9} rows  {path}")
+
+
+if __name__ == "__main__":
+    main()
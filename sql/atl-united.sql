@@ -32,4 +32,6 @@ CREATE TABLE salaries (
     median_guaranteed FLOAT,
     -- Median guaranteed salary (MedGuar)
     stddev_guaranteed FLOAT -- Standard deviation of guaranteed salary (StdDevGuar)
-);
\ No newline at end of file
+);
+-- Composite indexes for the head-to-head and team queries; see db.TABLE_INDEXES
+CREATE INDEX IF NOT EXISTS xgoals_games_date_teams ON xgoals_games (date, home_team, away_team);
@@ -0,0 +1,169 @@
+import threading
+
+try:
+    from src import impact, seasons, stage_cache, standings
+except ImportError:  # Running as a script from within src/
+    import impact
+    import seasons
+    import stage_cache
+    import standings
+
+# Columns the analysis stages read from each table
+ANALYSIS_COLUMNS = {
+    "player_performance_metrics": ["player", "team", "xg", "xa", "goals_added", "dribbling", "shooting", "minutes"],
+    "xgoals_games": standings.GAME_COLUMNS,
+    "salaries": ["team", "total_guaranteed"],
+}
+
+_context = None
+_context_lock = threading.Lock()
+
+
+class AnalysisContext:
+    """
+    Frames shared by the plotting and metric functions of one pipeline run. Each table is
+    fetched once per season selection, from the stage cache or the database, and handed
+    out from memory after that; the queries and bytes saved by the reuse are counted.
+    """
+
+    def __init__(self):
+        self._frames = {}
+        self._sizes = {}
+        self._scores = {}
+        self._latest_seasons = {}
+        self._lock = threading.Lock()
+        self.stats = {"queries": 0, "bytes_fetched": 0, "queries_avoided": 0, "bytes_avoided": 0}
+
+    def frame(self, name, season=None):
+        """
+        Return a table's analysis columns, fetching them on first use.
+        Args:
+            name (str): Table name, a key of ANALYSIS_COLUMNS.
+            season (int, str or list): Only the rows of these seasons, read through the
+                season-leading indexes; every season when None. Ignored for tables
+                without seasons, such as salaries.
+        Returns:
+            pd.DataFrame: Shallow copy of the shared frame, so callers may add columns.
+        """
+        partitioned = name in seasons.SEASON_COLUMNS or name in seasons.SEASON_DATE_COLUMNS
+        selected = seasons.normalize(season) if partitioned else None
+        key = (name, None if selected is None else tuple(selected))
+        with self._lock:
+            if key in self._frames:
+                self.stats["queries_avoided"] += 1
+                self.stats["bytes_avoided"] += self._sizes[key]
+            else:
+                columns = ANALYSIS_COLUMNS[name]
+                if selected is None:
+                    query = f"SELECT {', '.join(columns)} FROM {name}"
+                    df = stage_cache.read_frame_or_sql(name, query, columns=columns)
+                else:
+                    df = seasons.read_seasons(name, selected, columns=columns)
+                self._frames[key] = df
+                self._sizes[key] = int(df.memory_usage(deep=True).sum())
+                self.stats["queries"] += 1
+                self.stats["bytes_fetched"] += self._sizes[key]
+            return self._frames[key].copy(deep=False)
+
+    def latest_season(self, name="player_performance_metrics"):
+        """
+        Most recent season in a table, kept until the table is invalidated.
+        Args:
+            name (str): Key of seasons.SEASON_COLUMNS or seasons.SEASON_DATE_COLUMNS.
+        Returns:
+            str or None: Season, or None if the seasons cannot be read.
+        """
+        with self._lock:
+            if self._latest_seasons.get(name) is None:
+                stored = seasons.stored_seasons(name)
+                self._latest_seasons[name] = stored[-1] if stored else None
+            return self._latest_seasons[name]
+
+    def chart_season(self, season=None, name="player_performance_metrics"):
+        """
+        Season a chart or report covers: the given one, or by default the latest season of
+        the table it is drawn from.
+        Returns:
+            str or list: Season selection, seasons.ALL if the latest season is unknown.
+        """
+        if season is not None:
+            return season
+        return self.latest_season(name) or seasons.ALL
+
+    def scoring_players(self, season=None):
+        """
+        Players with non-zero goals_added and xg, the rows the player plots draw.
+        Args:
+            season (int, str or list): Only these seasons; every season when None.
+        """
+        df = self.frame("player_performance_metrics", season)
+        return df[(df["goals_added"] != 0) & (df["xg"] != 0)]
+
+    def impact_scores(self, weights=None, per_90=False, season=None):
+        """
+        League-wide impact scores, computed once per weighting and season and reused by
+        every team's report; slice a team out with impact.team_view.
+        Args:
+            weights (dict): Metric name to weight; impact.DEFAULT_WEIGHTS if not given.
+            per_90 (bool): Score per 90 minutes instead of season totals.
+            season (int, str or list): Rank within these seasons; every season when None.
+        Returns:
+            pd.DataFrame: Result of impact.score_players.
+        """
+        selected = seasons.normalize(season)
+        key = (
+            tuple(sorted((weights or impact.DEFAULT_WEIGHTS).items())), per_90,
+            None if selected is None else tuple(selected),
+        )
+        if key not in self._scores:
+            self._scores[key] = impact.score_players(self.frame("player_performance_metrics", selected), weights, per_90)
+        return self._scores[key]
+
+    def invalidate(self, *names):
+        """
+        Drop the cached frames of the given tables, or of every table if none are given.
+        """
+        with self._lock:
+            for key in list(self._frames):
+                if not names or key[0] in names:
+                    self._frames.pop(key)
+                    self._sizes.pop(key)
+            for name in names or list(self._latest_seasons):
+                self._latest_seasons.pop(name, None)
+            if not names or "player_performance_metrics" in names:
+                self._scores.clear()
+
+    def summary(self):
+        """
+        One-line description of the fetches made and avoided.
+        """
+        mb = 1024 * 1024
+        return (
+            f"{self.stats['queries']} table reads ({self.stats['bytes_fetched'] / mb:.1f} MB), "
+            f"{self.stats['queries_avoided']} reads avoided ({self.stats['bytes_avoided'] / mb:.1f} MB)"
+        )
+
+
+def get_context():
+    """
+    Return the context of the current pipeline run, creating it on first use.
+    Returns:
+        AnalysisContext: Shared context.
+    """
+    global _context
+    with _context_lock:
+        if _context is None:
+            _context = AnalysisContext()
+        return _context
+
+
+def reset_context():
+    """
+    Start a new pipeline run with an empty context, so no frame outlives the run that read it.
+    Returns:
+        AnalysisContext: The new context.
+    """
+    global _context
+    with _context_lock:
+        _context = AnalysisContext()
+        return _context
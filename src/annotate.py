@@ -0,0 +1,87 @@
+import numpy as np
+
+# Most labels drawn on one chart
+MAX_LABELS = 60
+
+# Label cells across and up the plot; one label is kept per cell. Labels are wider than
+# they are tall, so there are fewer columns than rows
+LABEL_GRID = (20, 40)
+
+
+def outlier_mask(columns, percentile):
+    """
+    Flag points above the percentile, or below its complement, in any of the columns.
+    Args:
+        columns (list): Equal-length NumPy arrays.
+        percentile (float): Upper quantile, e.g. 0.97.
+    Returns:
+        np.ndarray: Boolean mask of the outliers.
+    """
+    values = np.column_stack(columns)
+    upper = np.quantile(values, percentile, axis=0)
+    lower = np.quantile(values, 1 - percentile, axis=0)
+    return ((values > upper) | (values < lower)).any(axis=1)
+
+
+def select_labels(x, y, mask=None, priority=None, max_labels=MAX_LABELS, grid=LABEL_GRID):
+    """
+    Choose which points to label so labels neither overlap nor grow with the point count.
+    Candidates are bucketed into a grid over the plot area and only the highest priority
+    candidate in each cell is kept, then the max_labels highest priority ones are returned.
+    Args:
+        x (np.ndarray): Point x values.
+        y (np.ndarray): Point y values.
+        mask (np.ndarray): Boolean mask of candidate points; all points by default.
+        priority (np.ndarray): Higher values win a cell; by default the distance from the
+            centre of the data, in units of each axis's range.
+        max_labels (int): Most labels to return.
+        grid (tuple): Number of cells across and up the plot.
+    Returns:
+        np.ndarray: Indices of the points to label, highest priority first.
+    """
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    if len(x) == 0:
+        return np.array([], dtype="int64")
+
+    # Scale both axes to [0, 1] of the plotted range
+    x_span = np.ptp(x) or 1.0
+    y_span = np.ptp(y) or 1.0
+    x_scaled = (x - x.min()) / x_span
+    y_scaled = (y - y.min()) / y_span
+    if priority is None:
+        priority = np.hypot(x_scaled - x_scaled.mean(), y_scaled - y_scaled.mean())
+
+    candidates = np.flatnonzero(mask) if mask is not None else np.arange(len(x))
+    candidates = candidates[np.argsort(-np.asarray(priority)[candidates], kind="stable")]
+
+    columns, rows = grid
+    cells = (
+        np.minimum((x_scaled[candidates] * columns).astype("int64"), columns - 1) * rows
+        + np.minimum((y_scaled[candidates] * rows).astype("int64"), rows - 1)
+    )
+    # np.unique returns each cell's first index, which is its highest priority candidate
+    _, first = np.unique(cells, return_index=True)
+    return candidates[np.sort(first)][:max_labels]
+
+
+def label_arrays(x, y, text, indices):
+    """
+    Gather the positions and text of the chosen labels into a chart job's data.
+    Returns:
+        dict: label_x, label_y and label_text arrays.
+    """
+    return {"label_x": np.asarray(x)[indices], "label_y": np.asarray(y)[indices], "label_text": np.asarray(text)[indices]}
+
+
+def draw_labels(data, **text_kwargs):
+    """
+    Draw labels prepared by label_arrays on the current pyplot axes.
+    Args:
+        data (dict): Chart data holding label_x, label_y and label_text.
+        **text_kwargs: Passed to plt.text, e.g. fontsize.
+    """
+    import matplotlib.pyplot as plt
+
+    for x, y, text in zip(data["label_x"], data["label_y"], data["label_text"]):
+        plt.text(x, y, text, **text_kwargs)
@@ -1,34 +1,30 @@
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sqlalchemy import create_engine
-from dotenv import load_dotenv
 import os
 
-# Load environment variables
-load_dotenv()
+try:
+    from src import analysis_context, annotate, impact, instrument, manifest, render, seasons
+except ImportError:  # Running as a script from within src/
+    import analysis_context
+    import annotate
+    import impact
+    import instrument
+    import manifest
+    import render
+    import seasons
 
-# Database connection settings
-DB_HOST = os.getenv("DB_HOST")
-DB_PORT = os.getenv("DB_PORT")
-DB_NAME = os.getenv("DB_NAME")
-DB_USER = os.getenv("DB_USER")
-DB_PASSWORD = os.getenv("DB_PASSWORD")
 
-# Create SQLAlchemy engine
-engine = create_engine(f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}")
-
-def get_atlanta_united_players():
+@instrument.stage()
+def get_atlanta_united_players(context=None, season=None):
     """
     Fetch and filter Atlanta United players' data from the player_performance_metrics table.
+    Args:
+        context (AnalysisContext): Frames shared across stages; defaults to the run's context.
+        season (int, str or list): Only these seasons; every season when None.
     """
     try:
-        query = """
-            SELECT player, team, xg, xa, goals_added, dribbling, shooting, minutes
-            FROM player_performance_metrics
-            WHERE team = 'ATL'
-        """
-        atl_df = pd.read_sql(query, engine)
+        # The shared frame holds every team, so filter to Atlanta United here
+        players_df = (context or analysis_context.get_context()).frame("player_performance_metrics", season)
+        atl_df = players_df[players_df["team"] == "ATL"].reset_index(drop=True)
 
         # Ensure no NaN values in key metrics
         atl_df = atl_df.fillna(0)
@@ -39,80 +35,137 @@ def get_atlanta_united_players():
         print(f"Error fetching Atlanta United player data: {e}")
         return pd.DataFrame()
 
-def analyze_impact(atl_df):
+@instrument.stage()
+def analyze_impact(atl_df, weights=None, per_90=False):
     """
     Analyze and rank all Atlanta United players based on key metrics.
+    Args:
+        atl_df (pd.DataFrame): Player rows to score.
+        weights (dict): Metric name to weight; impact.DEFAULT_WEIGHTS if not given.
+        per_90 (bool): Score per 90 minutes instead of season totals.
     """
     try:
-        # Add an overall impact score (you can adjust weights based on importance)
-        atl_df["impact_score"] = (
-            atl_df["xg"] * 0.4 +     # Weight 40% for xG
-            atl_df["xa"] * 0.3 +     # Weight 30% for xA
-            atl_df["goals_added"] * 0.3  # Weight 30% for Goals Added
-        )
-
-        # Sort by impact_score (descending)
-        atl_df = atl_df.sort_values(by="impact_score", ascending=False)
-
-        return atl_df
+        return impact.score_players(atl_df, weights, per_90)
     except Exception as e:
         print(f"Error analyzing impact metrics: {e}")
         return atl_df
 
-def plot_minutes_vs_impact(atl_df):
+@instrument.stage()
+def team_impact(team="ATL", weights=None, per_90=False, context=None, season=None):
+    """
+    Rank one team's players by impact, sliced from the league-wide scores so reports for
+    every team share one fetch and one scoring pass.
+    Args:
+        team (str): Team abbreviation.
+        weights (dict): Metric name to weight; impact.DEFAULT_WEIGHTS if not given.
+        per_90 (bool): Score per 90 minutes instead of season totals.
+        context (AnalysisContext): Frames shared across stages; defaults to the run's context.
+        season (int, str or list): Rank against the league in these seasons; the latest
+            season by default and every season for seasons.ALL.
+    Returns:
+        pd.DataFrame: The team's players with league and team ranks and percentiles.
+    """
+    try:
+        context = context or analysis_context.get_context()
+        scored_df = context.impact_scores(weights, per_90, context.chart_season(season))
+        team_df = impact.team_view(scored_df, team)
+        print(f"Ranked {len(team_df)} players for {team}.")
+        return team_df
+    except Exception as e:
+        print(f"Error ranking {team} players: {e}")
+        return pd.DataFrame()
+
+@instrument.stage()
+def minutes_vs_impact_job(atl_df, output_folder="output", season=None):
+    """
+    Prepare the scatter plot of minutes played vs. impact_score for rendering.
+    Args:
+        atl_df (pd.DataFrame): Result of analyze_impact.
+        output_folder (str): Folder to save the plot.
+        season (int, str or list): Seasons atl_df covers, named in the title if given.
+    Returns:
+        dict: Chart job for render.render_charts.
+    """
+    minutes = atl_df["minutes"].to_numpy()
+    impact_score = atl_df["impact_score"].to_numpy()
+    players = atl_df["player"].to_numpy(dtype=str)
+    # Label players by impact, dropping the lower impact one where labels would overlap
+    labelled = annotate.select_labels(minutes, impact_score, priority=impact_score)
+    title = "Minutes Played vs. Impact Score (Atlanta United Players)"
+    if season is not None:
+        title = f"Minutes Played vs. Impact Score (Atlanta United Players, {seasons.label(season)})"
+    return {
+        "name": "minutes vs impact plot",
+        "render": render_minutes_vs_impact,
+        "path": os.path.join(output_folder, "minutes_vs_impact_score.png"),
+        "data": {
+            "minutes": minutes,
+            "impact_score": impact_score,
+            "player": players,
+            "title": title,
+            **annotate.label_arrays(minutes, impact_score, players, labelled),
+        },
+    }
+
+def render_minutes_vs_impact(data):
+    # Plotting libraries are only imported where charts are drawn, usually a render process
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    plt.figure(figsize=(12, 8))
+
+    # Scatter plot
+    sns.scatterplot(
+        x=data["minutes"],
+        y=data["impact_score"],
+        size=data["impact_score"],
+        sizes=(50, 300),
+        hue=data["player"],
+        palette="viridis",
+        legend=False
+    )
+
+    # Add labels for players
+    annotate.draw_labels(data, fontsize=9, ha="center", va="bottom")
+
+    # Titles and labels
+    plt.title(data["title"], fontsize=16)
+    plt.xlabel("Minutes Played", fontsize=14)
+    plt.ylabel("Impact Score", fontsize=14)
+    plt.grid(alpha=0.3)
+    plt.tight_layout()
+
+def plot_minutes_vs_impact(atl_df, season=None):
     """
     Plot a scatter plot of minutes played vs. impact_score for Atlanta United players.
+    Returns:
+        bool: True if the plot was drawn or skipped as unchanged.
     """
     try:
-        plt.figure(figsize=(12, 8))
-
-        # Scatter plot
-        sns.scatterplot(
-            data=atl_df,
-            x="minutes",
-            y="impact_score",
-            size="impact_score",
-            sizes=(50, 300),
-            hue="player",
-            palette="viridis",
-            legend=False
-        )
-
-        # Add labels for players
-        for i, row in atl_df.iterrows():
-            plt.text(
-                row["minutes"],
-                row["impact_score"],
-                row["player"],
-                fontsize=9,
-                ha="center",
-                va="bottom"
-            )
-
-        # Titles and labels
-        plt.title("Minutes Played vs. Impact Score (Atlanta United Players)", fontsize=16)
-        plt.xlabel("Minutes Played", fontsize=14)
-        plt.ylabel("Impact Score", fontsize=14)
-        plt.grid(alpha=0.3)
-        plt.tight_layout()
-
-        # Save the plot to the output folder
-        os.makedirs("output", exist_ok=True)
-        output_path = "output/minutes_vs_impact_score.png"
-        plt.savefig(output_path, dpi=300)
-        plt.close()
-
-        print(f"Scatter plot saved to {output_path}")
+        job = minutes_vs_impact_job(atl_df, season=season)
     except Exception as e:
         print(f"Error creating scatter plot: {e}")
+        return False
+    return render.render_all([job])
 
-def main():
-    # Get the list of all Atlanta United players
-    atl_df = get_atlanta_united_players()
-    # Analyze and rank players numerically
-    atl_df = analyze_impact(atl_df)
+def main(force=False, context=None):
+    """
+    Rank Atlanta United's players and plot their impact, unless player_performance_metrics
+    is unchanged this run.
+    Returns:
+        bool: True if the ranking and plot succeeded or were skipped.
+    """
+    if not force and not manifest.has_changed("player_performance_metrics"):
+        print("player_performance_metrics is unchanged, skipping Atlanta United metrics.\n")
+        return True
+    context = context or analysis_context.get_context()
+    season = context.chart_season()
+    # Rank every player in the latest season once and slice out Atlanta United
+    atl_df = team_impact("ATL", context=context, season=season)
+    if atl_df.empty:
+        return False
     # Plot scatter plot with minutes played vs. impact score
-    plot_minutes_vs_impact(atl_df)
+    return plot_minutes_vs_impact(atl_df, season)
 
 if __name__ == "__main__":
     main()
@@ -1,14 +1,189 @@
-import ingestion
-import transform
-import data_analysis 
-import atlanta_united_metrics
-
-def main_pipeline():
-    ingestion.main()
-    transform.main()
-    data_analysis.main()
-    atlanta_united_metrics.main()
-    print("Pipeline executed successfully!")
+import sys
+
+try:
+    from src import (
+        analysis_context, atlanta_united_metrics, cli, data_analysis, db, ingestion, instrument, manifest, pipeline,
+        render, stage_cache, transform,
+    )
+except ImportError:  # Running as a script from within src/
+    import analysis_context
+    import atlanta_united_metrics
+    import cli
+    import data_analysis
+    import db
+    import ingestion
+    import instrument
+    import manifest
+    import pipeline
+    import render
+    import stage_cache
+    import transform
+
+
+def ingest_node(table_name, chunksize=None, pool=None):
+    return {
+        "name": f"ingest_{table_name}",
+        "run": lambda force: ingestion.ingest_table(table_name, force=force, chunksize=chunksize, pool=pool),
+        # A changed source file invalidates the checkpoint
+        "key": lambda: manifest.compute_file_fingerprint(ingestion.DATA_FILES[table_name])["content_hash"],
+    }
+
+
+def build_nodes(context, chunksize=None, merge_method="pandas", incremental=False, parse_pool=None):
+    """
+    Declare the pipeline's steps and what each one depends on: every source file is
+    ingested on its own, the player files feed the merge and then the per 90 metrics,
+    and the points plot only waits for the games and salaries.
+    Args:
+        context (AnalysisContext): Frames shared by the analysis steps.
+        chunksize (int): Stream source files in chunks of this many rows.
+        merge_method (str): "pandas" or "sql".
+        incremental (bool): Update player_performance_metrics in place.
+        parse_pool (ProcessPoolExecutor): Preprocess the source files on this pool.
+    Returns:
+        list: Pipeline node dicts for pipeline.run_graph.
+    """
+    def chart_key():
+        # Charts differ by format and resolution, so a change of either invalidates them
+        settings = render.settings()
+        return f"{settings['fmt']}@{settings['dpi']}"
+
+    def add_metrics(force):
+        ok = transform.add_metrics(force, incremental)
+        # Anything the analysis read of the table before it was rebuilt, such as its
+        # latest season, is stale now
+        context.invalidate("player_performance_metrics")
+        return ok
+
+    player_tables = [f"ingest_{table_name}" for table_name in transform.SOURCE_TABLES]
+    return [ingest_node(table_name, chunksize, parse_pool) for table_name in ingestion.DATA_FILES] + [
+        {
+            "name": "merge_players",
+            "run": lambda force: transform.merge_players(force, merge_method, incremental),
+            "deps": player_tables,
+        },
+        {
+            "name": "per_90_metrics",
+            "run": add_metrics,
+            "deps": ["merge_players"],
+        },
+        {
+            "name": "player_charts",
+            "run": lambda force: render.render_all(data_analysis.player_chart_jobs(force, context)),
+            "deps": ["per_90_metrics"],
+            "key": chart_key,
+        },
+        {
+            "name": "points_charts",
+            "run": lambda force: render.render_all(data_analysis.points_chart_jobs(force, context)),
+            "deps": ["ingest_xgoals_games", "ingest_salaries"],
+            "key": chart_key,
+        },
+        {
+            "name": "atlanta_united_impact",
+            "run": lambda force: atlanta_united_metrics.main(force, context),
+            "deps": ["per_90_metrics"],
+            "key": chart_key,
+        },
+    ]
+
+
+def publishing_node(table_name):
+    """
+    Name of the pipeline step whose output is written to a table when the stage cache
+    is published.
+    """
+    if table_name in ingestion.DATA_FILES:
+        return f"ingest_{table_name}"
+    if table_name == "players":
+        return "merge_players"
+    return "per_90_metrics"
+
+
+def publish_cache(results, checkpoint_path=pipeline.CHECKPOINT_FILE):
+    """
+    Write the tables the steps left in the stage cache to the database. A table that
+    cannot be written fails the step that produced it, in results and in its checkpoint,
+    so the run exits with an error and the next run retries that step.
+    Args:
+        results (dict): Step name to its pipeline status, updated in place.
+        checkpoint_path (str): File holding the steps' checkpoints.
+    Returns:
+        list: Names of the steps failed by their writes.
+    """
+    pending = stage_cache.pending_tables()
+    published = stage_cache.publish_all()
+    if stage_cache.is_offline():
+        return []
+    failed = sorted({publishing_node(name) for name in pending if name not in published})
+    for name in failed:
+        print(f"Pipeline step {name} failed: its output could not be written to the database.")
+        results[name] = pipeline.FAILED
+    if failed:
+        pipeline.record_failures(failed, checkpoint_path)
+    return failed
+
+
+def main_pipeline(force=False, workers=None, chunksize=None, cache_dir=None, offline=False, merge_method="pandas",
+                  incremental=False, render_workers=None, chart_format="png", preview=False, resume=False,
+                  checkpoint_path=pipeline.CHECKPOINT_FILE, instrumented=True, metrics_path=instrument.METRICS_FILE,
+                  parse_workers=None):
+    """
+    Run every pipeline step, independent ones side by side.
+    Args:
+        workers (int): Steps run at once; pipeline.GRAPH_WORKERS by default.
+        parse_workers (int): Preprocess the source files on this many processes while the
+            ingest steps load them; each step parses its own file when not set.
+        resume (bool): Only rerun the steps that failed, or whose inputs changed, since
+            their last checkpoint, and the steps depending on them.
+        checkpoint_path (str): File holding the steps' checkpoints.
+        instrumented (bool): Record the time, database time, rows and memory of every
+            stage, and print a summary table at the end.
+        metrics_path (str): JSON lines file for the stage records.
+    Returns:
+        dict: Step name to its pipeline status.
+    """
+    instrument.configure(enabled=instrumented, path=metrics_path)
+    if cache_dir or offline:
+        stage_cache.enable(cache_dir or "cache", offline=offline)
+    render.configure(
+        workers=render_workers,
+        fmt=chart_format,
+        dpi=render.PREVIEW_DPI if preview else render.DEFAULT_DPI,
+        use_cache=not force,
+    )
+    if not stage_cache.is_offline():
+        ingestion.setup_tables()
+    manifest.reset_changed_tables()
+    # Analysis frames are fetched once per run and shared by every plot
+    context = analysis_context.reset_context()
+
+    parse_pool = ingestion.preprocess_pool(parse_workers) if parse_workers and parse_workers > 1 else None
+    try:
+        nodes = build_nodes(context, chunksize, merge_method, incremental, parse_pool)
+        results = pipeline.run_graph(
+            nodes, workers=workers or pipeline.GRAPH_WORKERS, force=force, resume=resume, checkpoint_path=checkpoint_path,
+        )
+    finally:
+        if parse_pool is not None:
+            parse_pool.shutdown()
+    render.shutdown()
+    if stage_cache.is_enabled():
+        # Stages passed their outputs through the cache, so write the database once at the end
+        publish_cache(results, checkpoint_path)
+    if db.get_stats()["checkouts"]:
+        print(f"Database: {db.summary()}")
+    if context.stats["queries"]:
+        print(f"Analysis: {context.summary()}")
+    if instrument.get_records():
+        print(f"Stages (records in {metrics_path}):\n{instrument.summary_table()}")
+    print(f"Pipeline steps: {pipeline.summary(results)}")
+    if pipeline.FAILED in results.values():
+        print("Pipeline finished with failures; rerun with --resume to retry only what failed.")
+    else:
+        print("Pipeline executed successfully!")
+    return results
 
 if __name__ == "__main__":
-    main_pipeline()
\ No newline at end of file
+    # Same flags as the run command of src/cli.py
+    raise SystemExit(cli.main(["run"] + sys.argv[1:]))
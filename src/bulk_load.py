@@ -0,0 +1,279 @@
+import io
+import re
+import pandas as pd
+from sqlalchemy import text
+
+try:
+    from src import db, seasons
+except ImportError:  # Running as a script from within src/
+    import db
+    import seasons
+
+# Matches "column_name TYPE" lines inside a CREATE TABLE statement
+COLUMN_PATTERN = re.compile(r"^\s*(\w+)\s+([A-Za-z]+)", re.MULTILINE)
+
+# Rows per executemany batch on backends without COPY
+INSERT_BATCH_SIZE = 10_000
+
+INTEGER_TYPES = {"INT", "INTEGER", "BIGINT", "SMALLINT"}
+FLOAT_TYPES = {"FLOAT", "REAL", "DOUBLE", "NUMERIC", "DECIMAL"}
+
+
+def parse_schema_columns(schema):
+    """
+    Extract the column names and SQL types declared in a CREATE TABLE statement.
+    Args:
+        schema (str): CREATE TABLE statement.
+    Returns:
+        dict: Mapping of column name to upper-cased SQL type, in declaration order.
+    """
+    body = schema[schema.index("(") + 1:schema.rindex(")")]
+    columns = {}
+    for name, sql_type in COLUMN_PATTERN.findall(body):
+        sql_type = sql_type.upper()
+        # SERIAL columns are filled in by the database
+        if sql_type in {"SERIAL", "BIGSERIAL"} or name.upper() in {"PRIMARY", "UNIQUE", "CONSTRAINT"}:
+            continue
+        columns[name] = sql_type
+    return columns
+
+
+def coerce_to_schema(df, column_types):
+    """
+    Cast DataFrame columns to match the declared SQL column types so COPY accepts them.
+    Args:
+        df (pd.DataFrame): DataFrame to cast.
+        column_types (dict): Mapping of column name to SQL type.
+    Returns:
+        pd.DataFrame: DataFrame restricted to the declared columns, in schema order.
+    """
+    columns = [col for col in column_types if col in df.columns]
+    df = df[columns].copy()
+    for col in columns:
+        sql_type = column_types[col]
+        if sql_type in INTEGER_TYPES:
+            # Floats such as 38.0 would be rejected by an INT column
+            df[col] = pd.to_numeric(df[col], errors="coerce").round().astype("Int64")
+        elif sql_type in FLOAT_TYPES:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df
+
+
+def dataframe_to_csv_buffer(df):
+    """
+    Serialize a DataFrame into an in-memory CSV buffer readable by COPY.
+    Args:
+        df (pd.DataFrame): DataFrame to serialize.
+    Returns:
+        io.StringIO: Buffer positioned at the start of the CSV data.
+    """
+    buffer = io.StringIO()
+    # Missing values are written as empty unquoted fields, which COPY reads as NULL
+    df.to_csv(buffer, index=False, header=False, na_rep="")
+    buffer.seek(0)
+    return buffer
+
+
+def add_missing_columns(conn, table_name, column_types):
+    """
+    Add declared columns that an existing table predates. CREATE TABLE IF NOT EXISTS
+    leaves older tables as they were, so columns added to a schema later are added here.
+    Args:
+        conn (sqlalchemy.engine.Connection): Open connection inside a transaction.
+        table_name (str): Target table name.
+        column_types (dict): Declared column types, from parse_schema_columns.
+    Returns:
+        list: Names of the columns added.
+    """
+    existing = set(conn.execute(text(f"SELECT * FROM {table_name} WHERE 1 = 0")).keys())
+    added = [name for name in column_types if name not in existing]
+    for name in added:
+        conn.execute(text(f'ALTER TABLE {table_name} ADD COLUMN "{name}" {column_types[name]}'))
+    return added
+
+
+def prepare_table(conn, df, table_name, schema=None, by_season=False):
+    """
+    Empty the target table before a load, keeping its declared types when a schema is given.
+    The table's db.TABLE_INDEXES are created if missing, including after a replace.
+    Args:
+        conn (sqlalchemy.engine.Connection): Open connection inside a transaction.
+        df (pd.DataFrame): DataFrame (or first chunk) that will be loaded.
+        table_name (str): Target table name.
+        schema (str): Optional CREATE TABLE statement for the target table.
+        by_season (bool): With a schema, only delete the rows of the seasons present in df
+            and keep the other seasons, see seasons.partition_values.
+    Returns:
+        dict or None: Declared column types, or None when the table was built from df.
+    """
+    if schema is not None:
+        db.execute_ddl(conn, schema)
+        add_missing_columns(conn, table_name, parse_schema_columns(schema))
+        db.create_indexes(conn, table_name)
+        if by_season:
+            clear_partitions(conn, table_name, seasons.partition_values(table_name, df))
+        elif conn.dialect.name == "postgresql":
+            conn.execute(text(f"TRUNCATE TABLE {table_name} RESTART IDENTITY"))
+        else:
+            conn.execute(text(f"DELETE FROM {table_name}"))
+        return parse_schema_columns(schema)
+
+    # Let pandas create an empty table, then stream the rows in with COPY
+    df.head(0).to_sql(table_name, conn, if_exists="replace", index=False)
+    db.create_indexes(conn, table_name)
+    return None
+
+
+def clear_partitions(conn, table_name, partitions):
+    """
+    Delete the rows of the given seasons, so a load replaces only those. The season- and
+    date-leading indexes make this touch only the deleted rows.
+    Args:
+        conn (sqlalchemy.engine.Connection): Open connection inside a transaction.
+        table_name (str): Target table name, a key of seasons.SEASON_COLUMNS or
+            seasons.SEASON_DATE_COLUMNS.
+        partitions (list): Season strings to clear.
+    Returns:
+        list: The seasons cleared.
+    """
+    partitions = seasons.normalize(partitions or [])
+    if partitions:
+        conn.execute(text(f"DELETE FROM {table_name} WHERE {seasons.season_condition(table_name, partitions)}"))
+    return partitions
+
+
+def copy_rows(conn, df, table_name, column_types=None):
+    """
+    Append a DataFrame to an existing table with COPY FROM STDIN on PostgreSQL. The
+    embedded backends have no COPY FROM STDIN, so DuckDB inserts from the registered
+    DataFrame and SQLite uses a batched executemany INSERT.
+    Args:
+        conn (sqlalchemy.engine.Connection): Open connection inside a transaction.
+        df (pd.DataFrame): DataFrame to load.
+        table_name (str): Target table name.
+        column_types (dict): Declared column types to cast to, if any.
+    Returns:
+        int: Number of rows copied.
+    """
+    if column_types is not None:
+        df = coerce_to_schema(df, column_types)
+
+    column_list = ", ".join(f'"{col}"' for col in df.columns)
+    if conn.dialect.name == "duckdb":
+        dbapi_connection = conn.connection.dbapi_connection
+        dbapi_connection.register("incoming_rows", df)
+        try:
+            conn.execute(text(f"INSERT INTO {table_name} ({column_list}) SELECT {column_list} FROM incoming_rows"))
+        finally:
+            dbapi_connection.unregister("incoming_rows")
+        return len(df)
+    if conn.dialect.name != "postgresql":
+        df.to_sql(table_name, conn, if_exists="append", index=False, chunksize=INSERT_BATCH_SIZE)
+        return len(df)
+
+    copy_sql = f"COPY {table_name} ({column_list}) FROM STDIN WITH (FORMAT csv)"
+
+    buffer = dataframe_to_csv_buffer(df)
+    cursor = conn.connection.cursor()
+    try:
+        cursor.copy_expert(copy_sql, buffer)
+    finally:
+        cursor.close()
+    return len(df)
+
+
+def copy_dataframe(conn, df, table_name, schema=None, by_season=False):
+    """
+    Replace the contents of a table with a DataFrame using PostgreSQL COPY FROM STDIN.
+    When a schema is given the typed table is created if needed and truncated, so its
+    declared types are kept. Otherwise the table is rebuilt from the DataFrame's dtypes.
+    Args:
+        conn (sqlalchemy.engine.Connection): Open connection inside a transaction.
+        df (pd.DataFrame): DataFrame to load.
+        table_name (str): Target table name.
+        schema (str): Optional CREATE TABLE statement for the target table.
+        by_season (bool): Replace only the seasons present in df, see prepare_table.
+    Returns:
+        int: Number of rows copied.
+    """
+    column_types = prepare_table(conn, df, table_name, schema, by_season)
+    return copy_rows(conn, df, table_name, column_types)
+
+
+def copy_chunks(conn, chunks, table_name, schema=None, by_season=False):
+    """
+    Replace the contents of a table with a stream of DataFrame chunks, copying each chunk
+    as it arrives so only one chunk is held in memory at a time.
+    Args:
+        conn (sqlalchemy.engine.Connection): Open connection inside a transaction.
+        chunks (iterable): DataFrames sharing the same columns.
+        table_name (str): Target table name.
+        schema (str): Optional CREATE TABLE statement for the target table.
+        by_season (bool): Replace only the seasons present in the chunks; each season is
+            cleared before its first rows are copied.
+    Returns:
+        int: Number of rows copied.
+    """
+    rows = 0
+    column_types = None
+    cleared = set()
+    for i, chunk in enumerate(chunks):
+        if i == 0:
+            column_types = prepare_table(conn, chunk, table_name, schema, by_season)
+            if by_season and schema is not None:
+                cleared.update(seasons.partition_values(table_name, chunk))
+        elif by_season and schema is not None:
+            new_seasons = set(seasons.partition_values(table_name, chunk)) - cleared
+            cleared.update(clear_partitions(conn, table_name, list(new_seasons)))
+        rows += copy_rows(conn, chunk, table_name, column_types)
+    return rows
+
+
+def upsert_rows(conn, df, table_name, key_columns):
+    """
+    Insert new rows and update existing ones in place, matching rows on a unique key.
+    Rows not in df are left untouched. The rows are bulk loaded into a staging table,
+    then merged with INSERT ... ON CONFLICT, which needs a unique index on the key.
+    Args:
+        conn (sqlalchemy.engine.Connection): Open connection inside a transaction.
+        df (pd.DataFrame): Rows to write, with the same columns as the target table.
+        table_name (str): Target table name.
+        key_columns (list): Columns identifying a row.
+    Returns:
+        int: Number of rows inserted or updated.
+    """
+    staging_table = f"{table_name}_staging"
+    copy_dataframe(conn, df, staging_table)
+    conn.execute(text(
+        f"CREATE UNIQUE INDEX IF NOT EXISTS {table_name}_key ON {table_name} "
+        f"({', '.join(key_columns)})"
+    ))
+
+    column_list = ", ".join(f'"{col}"' for col in df.columns)
+    updates = ", ".join(f'"{col}" = EXCLUDED."{col}"' for col in df.columns if col not in key_columns)
+    # WHERE true keeps SQLite from reading ON CONFLICT as part of the SELECT's join
+    conn.execute(text(f"""
+        INSERT INTO {table_name} ({column_list})
+        SELECT {column_list} FROM {staging_table} WHERE true
+        ON CONFLICT ({", ".join(key_columns)}) DO UPDATE SET {updates}
+    """))
+    conn.execute(text(f"DROP TABLE {staging_table}"))
+    return len(df)
+
+
+def delete_rows(conn, keys_df, table_name):
+    """
+    Delete the rows whose key values appear in keys_df.
+    Args:
+        conn (sqlalchemy.engine.Connection): Open connection inside a transaction.
+        keys_df (pd.DataFrame): Key columns of the rows to delete.
+        table_name (str): Target table name.
+    Returns:
+        int: Number of keys deleted.
+    """
+    staging_table = f"{table_name}_removed"
+    copy_dataframe(conn, keys_df, staging_table)
+    matches = " AND ".join(f'{staging_table}."{col}" = {table_name}."{col}"' for col in keys_df.columns)
+    conn.execute(text(f"DELETE FROM {table_name} WHERE EXISTS (SELECT 1 FROM {staging_table} WHERE {matches})"))
+    conn.execute(text(f"DROP TABLE {staging_table}"))
+    return len(keys_df)
@@ -0,0 +1,249 @@
+import argparse
+import importlib
+import sys
+
+# Only argparse is imported up front. Each command imports the pipeline modules it needs,
+# so --help starts instantly and only the plot and run commands can load matplotlib.
+
+# Mirrors of constants in modules that are only imported by the commands using them;
+# tests/test_cli.py checks they match
+TABLES = ["salaries", "xgoals_games", "xg", "goals_added", "xp"]
+CHART_FORMATS = ["png", "svg"]
+PREVIEW_DPI = 72
+GRAPH_WORKERS = 4
+CHARTS = ["four_quadrant", "top_players", "points_vs_salaries", "minutes_vs_impact"]
+
+
+def load(name):
+    """
+    Import a pipeline module on first use, from the src package or, when running as a
+    script from within src/, as a top-level module.
+    """
+    return importlib.import_module(f"{__package__}.{name}" if __package__ else name)
+
+
+def choice_of(options, kind):
+    """
+    Argument type accepting one of options. Used instead of choices, which argparse also
+    applies to an empty nargs="*" list.
+    """
+    def check(value):
+        if value not in options:
+            raise argparse.ArgumentTypeError(f"unknown {kind} {value!r}, choose from {', '.join(options)}")
+        return value
+    return check
+
+
+def ingest(args):
+    """
+    Load the named source files, or all of them, into their tables.
+    """
+    ingestion = load("ingestion")
+    ingestion.setup_tables()
+    return ingestion.ingest_tables(args.tables or TABLES, args.force, args.chunksize, args.parse_workers)
+
+
+def transform(args):
+    return load("transform").main(force=args.force, merge_method=args.merge, incremental=args.incremental)
+
+
+def configure_render(args):
+    load("render").configure(
+        workers=args.render_workers,
+        fmt=args.format,
+        dpi=PREVIEW_DPI if args.preview else load("render").DEFAULT_DPI,
+        use_cache=not args.force,
+    )
+
+
+def plot(args):
+    """
+    Draw the named charts, or all of them, from the tables already in the database.
+    """
+    analysis_context = load("analysis_context")
+    atlanta_united_metrics = load("atlanta_united_metrics")
+    data_analysis = load("data_analysis")
+    render = load("render")
+
+    configure_render(args)
+    context = analysis_context.get_context()
+    season = context.chart_season(args.season)
+    charts = args.charts or CHARTS
+    jobs = []
+    if "four_quadrant" in charts:
+        jobs.append(data_analysis.four_quadrant_job(context=context, season=season))
+    if "top_players" in charts:
+        jobs.extend(data_analysis.top_players_jobs(context=context, season=season) or [None])
+    if "points_vs_salaries" in charts:
+        jobs.append(data_analysis.points_vs_salaries_job(context=context, season=season))
+    if "minutes_vs_impact" in charts:
+        atl_df = atlanta_united_metrics.team_impact("ATL", context=context, season=season)
+        jobs.append(atlanta_united_metrics.minutes_vs_impact_job(atl_df, season=season) if not atl_df.empty else None)
+    try:
+        return render.render_all(jobs)
+    finally:
+        render.shutdown()
+
+
+def report(args):
+    """
+    Print a team's standing and its players ranked by impact in one season.
+    """
+    analysis_context = load("analysis_context")
+    atlanta_united_metrics = load("atlanta_united_metrics")
+    data_analysis = load("data_analysis")
+    seasons = load("seasons")
+
+    context = analysis_context.get_context()
+    season = context.chart_season(args.season)
+    points_df = data_analysis.calculate_team_points(context=context, season=season)
+    if args.team not in set(points_df["team"]):
+        print(f"No games found for {args.team}.")
+        return False
+    position = list(points_df["team"]).index(args.team) + 1
+    row = points_df[points_df["team"] == args.team].iloc[0]
+    print(
+        f"{args.team}: {position} of {len(points_df)} ({seasons.label(season)}), {row['total_points']} points "
+        f"({row['wins']}W {row['draws']}D {row['losses']}L), goal difference {row['goal_difference']}"
+    )
+
+    team_df = atlanta_united_metrics.team_impact(args.team, per_90=args.per_90, context=context, season=season)
+    if team_df.empty:
+        return False
+    columns = ["player", "minutes", "impact_score", "team_rank", "league_rank", "league_percentile"]
+    print(team_df[columns].head(args.top).to_string(index=False, float_format=lambda value: f"{value:.2f}"))
+    return True
+
+
+def run(args):
+    """
+    Run the whole pipeline graph, see automate_pipeline.main_pipeline.
+    """
+    automate_pipeline = load("automate_pipeline")
+    pipeline = load("pipeline")
+    results = automate_pipeline.main_pipeline(
+        force=args.force,
+        workers=args.workers,
+        chunksize=args.chunksize,
+        cache_dir=args.cache,
+        offline=args.offline,
+        merge_method=args.merge,
+        incremental=args.incremental,
+        render_workers=args.render_workers,
+        chart_format=args.format,
+        preview=args.preview,
+        resume=args.resume,
+        checkpoint_path=args.checkpoints or pipeline.CHECKPOINT_FILE,
+        instrumented=not args.no_instrument,
+        metrics_path=args.metrics or load("instrument").METRICS_FILE,
+        parse_workers=args.parse_workers,
+    )
+    return pipeline.FAILED not in results.values()
+
+
+def add_parse_arguments(parser):
+    parser.add_argument("--chunksize", type=int, default=None, help="Stream source files in chunks of this many rows.")
+    parser.add_argument(
+        "--parse-workers", type=int, default=None,
+        help="Preprocess source files on this many processes while loading them (default one at a time).",
+    )
+
+
+def add_transform_arguments(parser):
+    parser.add_argument(
+        "--merge", choices=["pandas", "sql"], default="pandas",
+        help="Merge the player tables in pandas or inside the database.",
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="Upsert only the changed player_performance_metrics rows instead of rebuilding the table.",
+    )
+
+
+def add_render_arguments(parser):
+    parser.add_argument(
+        "--render-workers", type=int, default=None,
+        help="Render charts on this many processes (default one per CPU).",
+    )
+    parser.add_argument("--format", choices=CHART_FORMATS, default="png", help="Chart output format.")
+    parser.add_argument("--preview", action="store_true", help=f"Render charts at {PREVIEW_DPI} dpi for quick iteration.")
+
+
+def add_season_argument(parser):
+    parser.add_argument(
+        "--season", default=None,
+        help='Season to cover, e.g. 2024, or "all" for every season (default the latest).',
+    )
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Atlanta United data pipeline.")
+    commands = parser.add_subparsers(dest="command", required=True, metavar="command")
+
+    ingest_parser = commands.add_parser("ingest", help="Load source files into their tables.")
+    ingest_parser.add_argument("tables", nargs="*", type=choice_of(TABLES, "table"), metavar="table", help=f"Tables to load: {', '.join(TABLES)} (default all).")
+    ingest_parser.add_argument("--force", action="store_true", help="Reload the files even if they are unchanged.")
+    add_parse_arguments(ingest_parser)
+    ingest_parser.set_defaults(handler=ingest)
+
+    transform_parser = commands.add_parser("transform", help="Build player_performance_metrics and its metrics.")
+    transform_parser.add_argument("--force", action="store_true", help="Rebuild the whole table.")
+    add_transform_arguments(transform_parser)
+    transform_parser.set_defaults(handler=transform)
+
+    plot_parser = commands.add_parser("plot", help="Draw charts from the tables in the database.")
+    plot_parser.add_argument("charts", nargs="*", type=choice_of(CHARTS, "chart"), metavar="chart", help=f"Charts to draw: {', '.join(CHARTS)} (default all).")
+    plot_parser.add_argument("--force", action="store_true", help="Redraw charts even if their data is unchanged.")
+    add_season_argument(plot_parser)
+    add_render_arguments(plot_parser)
+    plot_parser.set_defaults(handler=plot)
+
+    report_parser = commands.add_parser("report", help="Print a team's standing and player impact ranking.")
+    report_parser.add_argument("--team", default="ATL", help="Team abbreviation (default ATL).")
+    report_parser.add_argument("--top", type=int, default=15, help="Players to list (default 15).")
+    report_parser.add_argument("--per-90", action="store_true", help="Score players per 90 minutes.")
+    add_season_argument(report_parser)
+    report_parser.set_defaults(handler=report)
+
+    run_parser = commands.add_parser("run", help="Run every pipeline step, independent ones side by side.")
+    run_parser.add_argument("--force", action="store_true", help="Reload and rebuild everything, even unchanged files.")
+    run_parser.add_argument(
+        "--workers", type=int, default=None,
+        help=f"Run up to this many independent steps at once (default {GRAPH_WORKERS}).",
+    )
+    add_parse_arguments(run_parser)
+    run_parser.add_argument("--cache", metavar="DIR", default=None, help="Pass stage outputs through an Arrow cache in DIR.")
+    run_parser.add_argument("--offline", action="store_true", help="Run from the cache only, without a database.")
+    add_transform_arguments(run_parser)
+    add_render_arguments(run_parser)
+    run_parser.add_argument(
+        "--resume", action="store_true",
+        help="Rerun only the steps that failed or whose inputs changed since their checkpoint.",
+    )
+    run_parser.add_argument(
+        "--checkpoints", metavar="FILE", default=None,
+        help="File holding the step checkpoints (default .pipeline_checkpoints.json).",
+    )
+    run_parser.add_argument(
+        "--metrics", metavar="FILE", default=None,
+        help="JSON lines file for the stage timings (default .pipeline_metrics.jsonl).",
+    )
+    run_parser.add_argument("--no-instrument", action="store_true", help="Do not record stage timings.")
+    run_parser.set_defaults(handler=run)
+    return parser
+
+
+def main(argv=None):
+    """
+    Run one command.
+    Args:
+        argv (list): Command line arguments; sys.argv[1:] by default.
+    Returns:
+        int: Exit status, 1 if the command failed.
+    """
+    args = build_parser().parse_args(argv)
+    return 0 if args.handler(args) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
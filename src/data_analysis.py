@@ -1,220 +1,301 @@
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sqlalchemy import create_engine
-from dotenv import load_dotenv
 import os
 
-# Load environment variables
-load_dotenv()
+try:
+    from src import analysis_context, annotate, instrument, manifest, render, seasons, standings
+except ImportError:  # Running as a script from within src/
+    import analysis_context
+    import annotate
+    import instrument
+    import manifest
+    import render
+    import seasons
+    import standings
 
-# Database connection settings
-DB_HOST = os.getenv("DB_HOST")
-DB_PORT = os.getenv("DB_PORT")
-DB_NAME = os.getenv("DB_NAME")
-DB_USER = os.getenv("DB_USER")
-DB_PASSWORD = os.getenv("DB_PASSWORD")
 
-# Create SQLAlchemy engine
-engine = create_engine(f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}")
-
-def plot_four_quadrant_goals_added_vs_xg(output_folder="output", label_percentile = 0.97):
+@instrument.stage()
+def four_quadrant_job(output_folder="output", label_percentile = 0.97, context=None, season=None):
     """
-    Plot a four-quadrant scatter plot of goals_added vs. xg and save it to the output folder.
+    Prepare the four-quadrant scatter plot of goals_added vs. xg for rendering.
+    Args:
+        output_folder (str): Folder to save the plot.
+        label_percentile (float): Players above this quantile, or below its complement,
+            in either metric are labelled.
+        context (AnalysisContext): Frames shared across plots; defaults to the run's context.
+        season (int, str or list): Seasons to plot; the latest season by default and
+            every season for seasons.ALL.
+    Returns:
+        dict or None: Chart job for render.render_charts, or None if preparation failed.
     """
     try:
         print("Fetching player performance metrics data...")
-        # Fetch the player performance metrics table
-        query = "SELECT player, team, goals_added, xg FROM player_performance_metrics"
-        df = pd.read_sql(query, engine)
+        context = context or analysis_context.get_context()
+        season = context.chart_season(season)
+        # Players with non-zero goals_added and xg, shared with the other player plots
+        df = context.scoring_players(season)
+
+        instrument.add_rows(rows_in=len(df))
+        xg = df["xg"].to_numpy()
+        goals_added = df["goals_added"].to_numpy()
+
+        # Label the standout players and the negative outliers in either metric, keeping
+        # the most extreme one where labels would overlap
+        outliers = annotate.outlier_mask([goals_added, xg], label_percentile)
+        labelled = annotate.select_labels(xg, goals_added, outliers)
+
+        return {
+            "name": "four-quadrant plot",
+            "render": render_four_quadrant,
+            "path": os.path.join(output_folder, "four_quadrant_goals_added_vs_xg.png"),
+            "data": {
+                "xg": xg,
+                "goals_added": goals_added,
+                "team": df["team"].to_numpy(dtype=str),
+                "title": f"Four-Quadrant Analysis: Goals Added vs. Expected Goals (xG), {seasons.label(season)}",
+                **annotate.label_arrays(xg, goals_added, df["player"].to_numpy(dtype=str), labelled),
+            },
+        }
+    except Exception as e:
+        print(f"Error creating four-quadrant plot: {e}")
 
-        # Filter out rows with missing or zero values for goals_added and xg
-        df = df[(df["goals_added"] != 0) & (df["xg"] != 0)]
 
-        # Calculate the means of goals_added and xg to determine quadrant boundaries
-        xg_mean = df["xg"].mean()
-        goals_added_mean = df["goals_added"].mean()
+def render_four_quadrant(data):
+    # Plotting libraries are only imported where charts are drawn, usually a render process
+    import matplotlib.pyplot as plt
+    import seaborn as sns
 
-        # Calculate thresholds for standout players (e.g., 95th percentile)
-        goals_added_threshold = df["goals_added"].quantile(label_percentile)
-        xg_threshold = df["xg"].quantile(label_percentile)
-        neg_goals_added_threshold = df["goals_added"].quantile(1 - label_percentile)
-        neg_xg_threshold = df["xg"].quantile(1 - label_percentile)
+    # Scatter plot with team-based color coding
+    plt.figure(figsize=(12, 8))
+    sns.scatterplot(x=data["xg"], y=data["goals_added"], hue=data["team"], palette="tab10", s=100, legend = False)
 
-        print("Creating four-quadrant scatter plot...")
-        plt.figure(figsize=(12, 8))
+    # Draw vertical and horizontal lines for the quadrants at the means
+    plt.axvline(x=data["xg"].mean(), color="black", linestyle="--", linewidth=1, alpha=0.7, label="xG Mean")
+    plt.axhline(y=data["goals_added"].mean(), color="black", linestyle="--", linewidth=1, alpha=0.7, label="Goals Added Mean")
 
-        # Scatter plot with team-based color coding
-        sns.scatterplot(data=df, x="xg", y="goals_added", hue="team", palette="tab10", s=100, legend = False)
+    annotate.draw_labels(data, fontsize=7, alpha=0.7)
 
-        # Draw vertical and horizontal lines for the quadrants
-        plt.axvline(x=xg_mean, color="black", linestyle="--", linewidth=1, alpha=0.7, label="xG Mean")
-        plt.axhline(y=goals_added_mean, color="black", linestyle="--", linewidth=1, alpha=0.7, label="Goals Added Mean")
+    # Add titles, labels, and legend
+    plt.title(data["title"], fontsize=16)
+    plt.xlabel("Expected Goals (xG)", fontsize=14)
+    plt.ylabel("Goals Added", fontsize=14)
+    plt.grid(True, alpha=0.3)
 
-        for i, row in df.iterrows():
-            if row["goals_added"] > goals_added_threshold or row["xg"] > xg_threshold:
-                plt.text(row["xg"], row["goals_added"], row["player"], fontsize=7, alpha=0.7)
-            elif row["goals_added"] < neg_goals_added_threshold or row["xg"] < neg_xg_threshold:  # Optionally label negative outliers
-                plt.text(row["xg"], row["goals_added"], row["player"], fontsize=7, alpha=0.7)
 
+def plot_four_quadrant_goals_added_vs_xg(output_folder="output", label_percentile = 0.97, context=None, season=None):
+    """
+    Plot a four-quadrant scatter plot of goals_added vs. xg and save it to the output folder.
+    Args:
+        context (AnalysisContext): Frames shared across plots; defaults to the run's context.
+        season (int, str or list): Seasons to plot; the latest season by default.
+    """
+    render.render_charts([four_quadrant_job(output_folder, label_percentile, context, season)])
 
-        # Add titles, labels, and legend
-        plt.title("Four-Quadrant Analysis: Goals Added vs. Expected Goals (xG)", fontsize=16)
-        plt.xlabel("Expected Goals (xG)", fontsize=14)
-        plt.ylabel("Goals Added", fontsize=14)
-        plt.grid(True, alpha=0.3)
 
-        # Save the plot to the output folder
-        os.makedirs(output_folder, exist_ok=True)
-        output_file = os.path.join(output_folder, "four_quadrant_goals_added_vs_xg.png")
-    
-        plt.savefig(output_file, dpi=300)
-        plt.close()
-        print(f"Four-quadrant plot saved to {output_file}.\n")
+@instrument.stage()
+def top_players_jobs(output_folder="output", top_n=20, context=None, season=None):
+    """
+    Prepare bar charts of the top players for goals_added and xG for rendering.
+    Args:
+        output_folder (str): Folder to save the plots.
+        top_n (int): Number of top players to plot for each metric.
+        context (AnalysisContext): Frames shared across plots; defaults to the run's context.
+        season (int, str or list): Seasons to rank; the latest season by default and
+            every season for seasons.ALL.
+    Returns:
+        list: Chart jobs for render.render_charts, empty if preparation failed.
+    """
+    try:
+        print("Fetching player performance metrics data...")
+        context = context or analysis_context.get_context()
+        season = context.chart_season(season)
+        # Players with non-zero goals_added and xg, shared with the other player plots
+        df = context.scoring_players(season)
+
+        instrument.add_rows(rows_in=len(df))
+        charts = [
+            ("goals_added", "Goals Added", "Blues_d", "top_goals_added_players.png"),
+            ("xg", "Expected Goals (xG)", "Greens_d", "top_xg_players.png"),
+        ]
+        jobs = []
+        for metric, label, palette, file_name in charts:
+            top_df = df.sort_values(by=metric, ascending=False).head(top_n)
+            jobs.append({
+                "name": f"top {metric} players plot",
+                "render": render_top_players,
+                "path": os.path.join(output_folder, file_name),
+                "data": {
+                    "values": top_df[metric].to_numpy(),
+                    "player": top_df["player"].to_numpy(dtype=str),
+                    "title": f"Top {top_n} Players by {label}, {seasons.label(season)}",
+                    "xlabel": label,
+                    "palette": palette,
+                },
+            })
+        return jobs
     except Exception as e:
-        print(f"Error creating four-quadrant plot: {e}")
+        print(f"Error creating plots: {e}")
+        return []
+
+
+def render_top_players(data):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
 
+    plt.figure(figsize=(12, 6))
+    sns.barplot(x=data["values"], y=data["player"], hue=data["player"], palette=data["palette"])
+    plt.title(data["title"], fontsize=16)
+    plt.xlabel(data["xlabel"], fontsize=14)
+    plt.ylabel("Player", fontsize=14)
+    plt.tight_layout()
 
-def plot_top_players(output_folder="output", top_n=20):
+
+def plot_top_players(output_folder="output", top_n=20, context=None, season=None):
     """
     Fetch and plot the top players for xG and goals_added.
     
     Args:
         output_folder (str): Folder to save the plots.
         top_n (int): Number of top players to fetch and plot for each metric.
+        context (AnalysisContext): Frames shared across plots; defaults to the run's context.
+        season (int, str or list): Seasons to rank; the latest season by default.
     """
-    try:
-        print("Fetching player performance metrics data...")
-        # Query the database
-        query = "SELECT player, team, goals_added, xg FROM player_performance_metrics"
-        df = pd.read_sql(query, engine)
-
-        # Filter out rows with missing or zero values
-        df = df[(df["goals_added"] != 0) & (df["xg"] != 0)]
-
-        # Get top players for goals_added
-        top_goals_added = df.sort_values(by="goals_added", ascending=False).head(top_n)
-
-        # Get top players for xG
-        top_xg = df.sort_values(by="xg", ascending=False).head(top_n)
-
-        print("Creating plots...")
-        os.makedirs(output_folder, exist_ok=True)
-
-        # Plot top players by goals_added
-        plt.figure(figsize=(12, 6))
-        sns.barplot(data=top_goals_added, x="goals_added", y="player",  hue="player",palette="Blues_d")
-        plt.title(f"Top {top_n} Players by Goals Added", fontsize=16)
-        plt.xlabel("Goals Added", fontsize=14)
-        plt.ylabel("Player", fontsize=14)
-        plt.tight_layout()
-        plt.savefig(os.path.join(output_folder, "top_goals_added_players.png"), dpi=300)
-        plt.close()
-        print(f"Top goals added players plot saved to {output_folder}.")
-        # Plot top players by xG
-        plt.figure(figsize=(12, 6))
-        sns.barplot(data=top_xg, x="xg", y="player",  hue="player", palette="Greens_d")
-        plt.title(f"Top {top_n} Players by Expected Goals (xG)", fontsize=16)
-        plt.xlabel("Expected Goals (xG)", fontsize=14)
-        plt.ylabel("Player", fontsize=14)
-        plt.tight_layout()
-        plt.savefig(os.path.join(output_folder, "top_xg_players.png"), dpi=300)
-        plt.close()
-
-        print(f"xGoals saved to {output_folder}.")
-    except Exception as e:
-        print(f"Error creating plots: {e}")   
+    render.render_charts(top_players_jobs(output_folder, top_n, context, season))
 
 
-def calculate_team_points():
+@instrument.stage()
+def calculate_team_points(as_of=None, context=None, season=None):
     """
     Calculate the total points for each team from the xGoals_games table.
     Points:
         - 3 points for a win
         - 1 point for a tie
         - 0 points for a loss
+    Args:
+        as_of (str or datetime): Only count games played on or before this date.
+        context (AnalysisContext): Frames shared across plots; defaults to the run's context.
+        season (int, str or list): Only count games of these seasons; every game when None.
+    Returns:
+        pd.DataFrame: standings.compute_standings table with the points column named
+        total_points, sorted by total_points.
     """
     # Fetch the xGoals_games table
-    query = """
-    SELECT home_team, home_goals, away_team, away_goals
-    FROM xgoals_games
-    """
-    games_df = pd.read_sql(query, engine)
+    games_df = (context or analysis_context.get_context()).frame("xgoals_games", season)
 
-    # Calculate points for home teams
-    games_df["home_points"] = games_df.apply(
-        lambda row: 3 if row["home_goals"] > row["away_goals"] else (1 if row["home_goals"] == row["away_goals"] else 0),
-        axis=1
-    )
+    total_points = standings.compute_standings(games_df, as_of=as_of)
+    return total_points.rename(columns={"points": "total_points"})
 
-    # Calculate points for away teams
-    games_df["away_points"] = games_df.apply(
-        lambda row: 3 if row["away_goals"] > row["home_goals"] else (1 if row["away_goals"] == row["home_goals"] else 0),
-        axis=1
-    )
 
-    # Group by home and away teams to sum up points
-    home_points = games_df.groupby("home_team")["home_points"].sum().reset_index(name="home_points")
-    away_points = games_df.groupby("away_team")["away_points"].sum().reset_index(name="away_points")
-
-    # Merge home and away points into a single DataFrame
-    total_points = pd.merge(
-        home_points, away_points, left_on="home_team", right_on="away_team", how="outer"
-    ).fillna(0)
+@instrument.stage()
+def points_vs_salaries_job(output_folder="output", context=None, season=None):
+    """
+    Prepare the scatter plot of team points against total salaries for rendering.
+    Args:
+        output_folder (str): Folder to save the plot.
+        context (AnalysisContext): Frames shared across plots; defaults to the run's context.
+        season (int, str or list): Seasons whose games are counted; the latest season in
+            xgoals_games by default and every season for seasons.ALL.
+    Returns:
+        dict or None: Chart job for render.render_charts, or None if preparation failed.
+    """
+    try:
+        context = context or analysis_context.get_context()
+        # The latest season with games, as this chart does not wait for the player tables
+        season = context.chart_season(season, "xgoals_games")
+        # Calculate team points
+        total_points = calculate_team_points(context=context, season=season)
+
+        # Fetch salaries data
+        salaries_df = context.frame("salaries")
+
+        # Merge points and salaries data
+        comparison_df = pd.merge(total_points, salaries_df, on="team", how="inner")
+
+        instrument.add_rows(rows_in=len(comparison_df))
+        # Convert salaries to millions for better readability
+        salaries = comparison_df["total_guaranteed"].to_numpy() / 1e6
+        points = comparison_df["total_points"].to_numpy()
+        teams = comparison_df["team"].to_numpy(dtype=str)
+
+        return {
+            "name": "points vs salaries plot",
+            "render": render_points_vs_salaries,
+            "path": os.path.join(output_folder, "points_vs_salaries.png"),
+            "data": {
+                "salaries": salaries,
+                "points": points,
+                "title": f"Team Points vs Total Salaries, {seasons.label(season)}",
+                # Every team is a candidate; only overlapping labels are dropped
+                **annotate.label_arrays(salaries, points, teams, annotate.select_labels(salaries, points)),
+            },
+        }
+    except Exception as e:
+        print(f"Error creating points vs salaries plot: {e}")
 
-    # Calculate total points
-    total_points["total_points"] = total_points["home_points"] + total_points["away_points"]
 
-    # Rename columns for clarity and drop redundant column
-    total_points = total_points.rename(columns={"home_team": "team"}).drop(columns=["away_team"])
+def render_points_vs_salaries(data):
+    import matplotlib.pyplot as plt
 
-    # Sort by total_points for better readability
-    total_points = total_points.sort_values(by="total_points", ascending=False).reset_index(drop=True)
+    plt.figure(figsize=(12, 8))
+    plt.scatter(data["salaries"], data["points"], color="blue", alpha=0.7)
+    plt.title(data["title"], fontsize=16)
+    plt.xlabel("Total Salaries (in millions)", fontsize=14)
+    plt.ylabel("Total Points", fontsize=14)
+    plt.grid(True, alpha=0.3)
 
-    return total_points
+    # Annotate team names
+    annotate.draw_labels(data, fontsize=10, alpha=0.7)
 
 
-def compare_points_and_salaries():
+def compare_points_and_salaries(context=None):
     """
     Compare team points with their total salaries.
+    Args:
+        context (AnalysisContext): Frames shared across plots; defaults to the run's context.
     """
-    # Calculate team points
-    total_points = calculate_team_points()
-
-    # Fetch salaries data
-    query = "SELECT team, total_guaranteed FROM salaries"
-    salaries_df = pd.read_sql(query, engine)
+    render.render_charts([points_vs_salaries_job(context=context)])
 
-    # Merge points and salaries data
-    comparison_df = pd.merge(total_points, salaries_df, on="team", how="inner")
+def player_chart_jobs(force=False, context=None):
+    """
+    Prepare the player plots, unless player_performance_metrics is unchanged this run.
+    Args:
+        force (bool): Prepare them even if the table is unchanged.
+        context (AnalysisContext): Frames shared across plots; defaults to the run's context.
+    Returns:
+        list: Chart jobs, with None for a chart whose preparation failed.
+    """
+    if not force and not manifest.has_changed("player_performance_metrics"):
+        print("player_performance_metrics is unchanged, skipping player plots.\n")
+        return []
+    return [four_quadrant_job(context=context)] + (top_players_jobs(context=context) or [None])
 
-    # Convert salaries to millions for better readability
-    comparison_df["total_guaranteed"] = comparison_df["total_guaranteed"] / 1e6
 
-    # Plot points vs salaries
-    plt.figure(figsize=(12, 8))
-    plt.scatter(comparison_df["total_guaranteed"], comparison_df["total_points"], color="blue", alpha=0.7)
-    plt.title("Team Points vs Total Salaries", fontsize=16)
-    plt.xlabel("Total Salaries (in millions)", fontsize=14)
-    plt.ylabel("Total Points", fontsize=14)
-    plt.grid(True, alpha=0.3)
+def points_chart_jobs(force=False, context=None):
+    """
+    Prepare the points vs salaries plot, unless xgoals_games and salaries are unchanged.
+    Args:
+        force (bool): Prepare it even if the tables are unchanged.
+        context (AnalysisContext): Frames shared across plots; defaults to the run's context.
+    Returns:
+        list: Chart jobs, with None for a chart whose preparation failed.
+    """
+    if not force and not manifest.has_changed("xgoals_games", "salaries"):
+        print("xgoals_games and salaries are unchanged, skipping points vs salaries plot.\n")
+        return []
+    return [points_vs_salaries_job(context=context)]
 
-    # Annotate team names
-    for _, row in comparison_df.iterrows():
-        plt.text(row["total_guaranteed"], row["total_points"], row["team"], fontsize=10, alpha=0.7)
 
-    # Save the plot
-    output_path = "output/points_vs_salaries.png"
-    os.makedirs("output", exist_ok=True)
-    plt.savefig(output_path, dpi=300)
-    plt.close()
-    print(f"Plot saved to {output_path}.")
+def main(force=False, context=None):
+    """
+    Redraw the plots whose source tables changed during this run.
+    Returns:
+        bool: True if every plot was drawn or skipped as unchanged.
+    """
+    context = context or analysis_context.get_context()
+    jobs = player_chart_jobs(force, context) + points_chart_jobs(force, context)
 
-def main():
-    plot_four_quadrant_goals_added_vs_xg()
-    plot_top_players() 
-    compare_points_and_salaries()
+    # The charts are independent, so render them side by side
+    return render.render_all(jobs)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,333 @@
+import os
+import re
+import threading
+import time
+from sqlalchemy import create_engine, event, inspect, make_url, text
+from sqlalchemy.pool import QueuePool
+from dotenv import load_dotenv
+
+# Default database files for the embedded backends
+EMBEDDED_BACKENDS = {
+    "sqlite": "atl_united.sqlite",
+    "duckdb": "atl_united.duckdb",
+}
+
+SERIAL_PATTERN = re.compile(r"(\w+)\s+SERIAL\s+PRIMARY\s+KEY", re.IGNORECASE)
+TABLE_NAME_PATTERN = re.compile(r"CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)", re.IGNORECASE)
+FLOAT_PATTERN = re.compile(r"\bFLOAT\b", re.IGNORECASE)
+
+# Composite indexes on the columns the analysis queries filter and join on, as
+# (index name, columns, unique) per table. CREATE TABLE statements cannot declare them.
+# The season_team indexes lead on season, so season-scoped reads and partition
+# replacements only visit that season's rows.
+TABLE_INDEXES = {
+    "xg": [
+        ("xg_player_team_season", ["player", "team", "season"], False),
+        ("xg_team_season", ["team", "season"], False),
+        ("xg_season_team", ["season", "team"], False),
+    ],
+    "goals_added": [
+        ("goals_added_player_team_season", ["player", "team", "season"], False),
+        ("goals_added_team_season", ["team", "season"], False),
+        ("goals_added_season_team", ["season", "team"], False),
+    ],
+    "xp": [
+        ("xp_player_team_season", ["player", "team", "season"], False),
+        ("xp_team_season", ["team", "season"], False),
+        ("xp_season_team", ["season", "team"], False),
+    ],
+    "player_performance_metrics": [
+        # Also the ON CONFLICT target of incremental upserts
+        ("player_performance_metrics_key", ["player", "team", "season"], True),
+        ("player_performance_metrics_team_season", ["team", "season"], False),
+        ("player_performance_metrics_season_team", ["season", "team"], False),
+    ],
+    "xgoals_games": [("xgoals_games_date_teams", ["date", "home_team", "away_team"], False)],
+}
+
+# Versions of the schema migrations already applied to the database
+MIGRATIONS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version VARCHAR(100) PRIMARY KEY,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+"""
+
+_engine = None
+_engine_lock = threading.Lock()
+
+_stats_lock = threading.Lock()
+_stats = {}
+
+# Queries run by each thread, so a stage can measure its own database time while others run
+_thread_stats = threading.local()
+
+
+def reset_stats():
+    """
+    Clear the checkout and query counters.
+    """
+    with _stats_lock:
+        _stats.update({
+            "checkouts": 0,
+            "checkout_wait_seconds": 0.0,
+            "max_checkout_wait_seconds": 0.0,
+            "queries": 0,
+            "query_seconds": 0.0,
+            "max_query_seconds": 0.0,
+        })
+
+
+reset_stats()
+
+
+def get_stats():
+    """
+    Connection pool and query instrumentation collected since the last reset.
+    Returns:
+        dict: Checkout count and wait times, query count and latencies, in seconds.
+    """
+    with _stats_lock:
+        return dict(_stats)
+
+
+def thread_query_stats():
+    """
+    Queries run on the calling thread since it started.
+    Returns:
+        tuple: Query count and total query seconds.
+    """
+    return getattr(_thread_stats, "queries", 0), getattr(_thread_stats, "seconds", 0.0)
+
+
+def _record(count_key, total_key, max_key, seconds):
+    with _stats_lock:
+        _stats[count_key] += 1
+        _stats[total_key] += seconds
+        _stats[max_key] = max(_stats[max_key], seconds)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that records how long each checkout waits for a connection, including the
+    time to open a new one.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            _record("checkouts", "checkout_wait_seconds", "max_checkout_wait_seconds", time.perf_counter() - start)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    seconds = time.perf_counter() - conn.info["query_start"].pop()
+    _record("queries", "query_seconds", "max_query_seconds", seconds)
+    _thread_stats.queries = getattr(_thread_stats, "queries", 0) + 1
+    _thread_stats.seconds = getattr(_thread_stats, "seconds", 0.0) + seconds
+
+
+def database_url():
+    """
+    Build the database URL from the environment or .env file. DATABASE_URL wins if set;
+    otherwise DB_BACKEND picks "postgresql" (default, from the DB_* settings), or the
+    embedded "sqlite" or "duckdb" backends, stored in the file named by DB_PATH.
+    """
+    load_dotenv()
+    if os.getenv("DATABASE_URL"):
+        return os.getenv("DATABASE_URL")
+
+    backend = os.getenv("DB_BACKEND", "postgresql")
+    if backend in EMBEDDED_BACKENDS:
+        return f"{backend}:///{os.getenv('DB_PATH', EMBEDDED_BACKENDS[backend])}"
+    if backend != "postgresql":
+        raise ValueError(f"Unknown DB_BACKEND {backend!r}, expected postgresql, sqlite or duckdb")
+    return (
+        f"postgresql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}"
+        f"@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
+    )
+
+
+def build_engine():
+    """
+    Create an instrumented engine from the environment. Pool settings:
+        DB_POOL_SIZE: Connections kept open (default 5).
+        DB_MAX_OVERFLOW: Extra connections allowed under load (default 10).
+        DB_POOL_PRE_PING: Test connections before use, "0" to disable (default on).
+        DB_STATEMENT_TIMEOUT_MS: Cancel PostgreSQL statements running longer than this
+            (default off).
+    Returns:
+        sqlalchemy.engine.Engine: New engine.
+    """
+    load_dotenv()
+    url = make_url(database_url())
+    connect_args = {}
+    if url.get_backend_name() == "postgresql":
+        statement_timeout = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+        if statement_timeout:
+            connect_args["options"] = f"-c statement_timeout={statement_timeout}"
+    elif url.get_backend_name() == "sqlite":
+        # Loads run on a thread pool, so connections cross threads and wait on write locks
+        connect_args = {"check_same_thread": False, "timeout": 30}
+
+    engine = create_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        pool_pre_ping=os.getenv("DB_POOL_PRE_PING", "1") != "0",
+        connect_args=connect_args,
+    )
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    return engine
+
+
+def ddl_statements(schema, dialect):
+    """
+    Translate a PostgreSQL CREATE TABLE statement for the given SQL dialect.
+    SQLite gets an INTEGER PRIMARY KEY rowid in place of SERIAL. DuckDB gets a sequence
+    for the id, and DOUBLE for FLOAT, which DuckDB would otherwise store as 4 bytes.
+    Args:
+        schema (str): CREATE TABLE statement written for PostgreSQL.
+        dialect (str): SQLAlchemy dialect name, e.g. conn.dialect.name.
+    Returns:
+        list: Statements to execute in order.
+    """
+    if dialect == "sqlite":
+        return [SERIAL_PATTERN.sub(r"\1 INTEGER PRIMARY KEY", schema)]
+    if dialect == "duckdb":
+        statements = []
+        if SERIAL_PATTERN.search(schema):
+            sequence = f"{TABLE_NAME_PATTERN.search(schema).group(1)}_id_seq"
+            statements.append(f"CREATE SEQUENCE IF NOT EXISTS {sequence}")
+            schema = SERIAL_PATTERN.sub(rf"\1 INTEGER DEFAULT nextval('{sequence}') PRIMARY KEY", schema)
+        return statements + [FLOAT_PATTERN.sub("DOUBLE", schema)]
+    return [schema]
+
+
+def execute_ddl(conn, schema):
+    """
+    Run a PostgreSQL CREATE TABLE statement on any supported backend.
+    Args:
+        conn (sqlalchemy.engine.Connection): Open connection.
+        schema (str): CREATE TABLE statement written for PostgreSQL.
+    """
+    for statement in ddl_statements(schema, conn.dialect.name):
+        conn.execute(text(statement))
+
+
+def create_indexes(conn, table_name, indexes=None):
+    """
+    Create a table's indexes if they do not exist yet. Run after any step that creates or
+    replaces the table, since replacing a table drops its indexes.
+    Args:
+        conn (sqlalchemy.engine.Connection): Open connection.
+        table_name (str): Table to index.
+        indexes (list): (name, columns, unique) tuples; TABLE_INDEXES[table_name] by default.
+    Returns:
+        list: Names of the indexes ensured.
+    """
+    indexes = TABLE_INDEXES.get(table_name, []) if indexes is None else indexes
+    for name, columns, unique in indexes:
+        conn.execute(text(
+            f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {name} ON {table_name} ({', '.join(columns)})"
+        ))
+    return [name for name, _, _ in indexes]
+
+
+def drop_indexes(conn, table_name, indexes=None):
+    """
+    Drop a table's indexes, e.g. to measure queries without them.
+    Args:
+        conn (sqlalchemy.engine.Connection): Open connection.
+        table_name (str): Indexed table.
+        indexes (list): (name, columns, unique) tuples; TABLE_INDEXES[table_name] by default.
+    """
+    indexes = TABLE_INDEXES.get(table_name, []) if indexes is None else indexes
+    for name, _, _ in indexes:
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+
+def table_exists(conn, table_name):
+    return inspect(conn).has_table(table_name)
+
+
+def apply_migrations(migrations):
+    """
+    Apply schema migrations that have not run against this database yet, in order. Each
+    one runs in its own transaction together with the row recording it in
+    schema_migrations, so a failed migration is retried on the next run.
+    Args:
+        migrations (list): (version, function) pairs; the function takes an open connection.
+    Returns:
+        list: Versions applied by this call.
+    """
+    with get_engine().begin() as conn:
+        execute_ddl(conn, MIGRATIONS_SCHEMA)
+        applied = set(conn.execute(text("SELECT version FROM schema_migrations")).scalars())
+
+    applied_now = []
+    for version, migrate in migrations:
+        if version in applied:
+            continue
+        with get_engine().begin() as conn:
+            migrate(conn)
+            conn.execute(text("INSERT INTO schema_migrations (version) VALUES (:version)"), {"version": version})
+        applied_now.append(version)
+    return applied_now
+
+
+def get_engine():
+    """
+    Return the shared engine, creating it on first use so importing a module never
+    reads configuration or opens a pool.
+    Returns:
+        sqlalchemy.engine.Engine: Shared engine.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = build_engine()
+    return _engine
+
+
+def summary():
+    """
+    One-line description of the database activity recorded since the last reset.
+    """
+    stats = get_stats()
+    return (
+        f"{stats['queries']} queries in {stats['query_seconds']:.2f}s "
+        f"(slowest {stats['max_query_seconds']:.2f}s), "
+        f"{stats['checkouts']} connection checkouts waited {stats['checkout_wait_seconds']:.2f}s "
+        f"(longest {stats['max_checkout_wait_seconds']:.2f}s)"
+    )
+
+
+def dispose_engine():
+    """
+    Close the shared engine's connections and forget it, e.g. between tests.
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+        _engine = None
+
+
+def _forget_engine_after_fork():
+    # A forked child must not reuse the parent's sockets, so it builds its own engine if needed
+    global _engine
+    if _engine is not None:
+        _engine.dispose(close=False)
+    _engine = None
+
+
+os.register_at_fork(after_in_child=_forget_engine_after_fork)
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+try:
+    from src import instrument
+except ImportError:  # Running as a script from within src/
+    import instrument
+
+# Share of the impact score given to each metric
+DEFAULT_WEIGHTS = {
+    "xg": 0.4,           # Weight 40% for xG
+    "xa": 0.3,           # Weight 30% for xA
+    "goals_added": 0.3,  # Weight 30% for Goals Added
+}
+
+
+@instrument.stage()
+def score_players(players_df, weights=None, per_90=False):
+    """
+    Score and rank every player in one vectorized pass: the impact score is the weighted
+    sum of the metrics, computed as a single matrix-vector product.
+    Args:
+        players_df (pd.DataFrame): Player rows with team, minutes and the weighted metrics.
+        weights (dict): Metric name to weight; DEFAULT_WEIGHTS if not given.
+        per_90 (bool): Score each metric per 90 minutes instead of season totals. Players
+            without minutes score 0.
+    Returns:
+        pd.DataFrame: The rows with impact_score, league_rank, league_percentile, team_rank
+        and team_percentile added, sorted by impact_score. Rank 1 is the highest score and
+        percentiles run from 0 to 100.
+    """
+    weights = weights or DEFAULT_WEIGHTS
+    metrics = list(weights)
+    values = players_df[metrics].fillna(0).to_numpy(dtype="float64")
+    if per_90:
+        minutes = players_df["minutes"].fillna(0).to_numpy(dtype="float64")
+        scale = np.divide(90.0, minutes, out=np.zeros_like(minutes), where=minutes > 0)
+        values = values * scale[:, None]
+
+    scored_df = players_df.copy()
+    scored_df["impact_score"] = values @ np.array([weights[metric] for metric in metrics])
+
+    score = scored_df["impact_score"]
+    by_team = score.groupby(scored_df["team"], observed=True)
+    scored_df["league_rank"] = score.rank(method="min", ascending=False).astype("int64")
+    scored_df["league_percentile"] = (score.rank(pct=True) * 100).round(1)
+    scored_df["team_rank"] = by_team.rank(method="min", ascending=False).astype("int64")
+    scored_df["team_percentile"] = (by_team.rank(pct=True) * 100).round(1)
+    return scored_df.sort_values(by="impact_score", ascending=False)
+
+
+def team_view(scored_df, team):
+    """
+    Slice one team's players out of a score_players result, keeping the score order.
+    Args:
+        scored_df (pd.DataFrame): Result of score_players.
+        team (str): Team abbreviation, e.g. "ATL".
+    Returns:
+        pd.DataFrame: The team's rows.
+    """
+    return scored_df[scored_df["team"].to_numpy() == team]
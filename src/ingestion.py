@@ -1,19 +1,35 @@
+import multiprocessing
+import numpy as np
 import pandas as pd
-from sqlalchemy import create_engine, text
-import os
-from dotenv import load_dotenv
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 
-# Database connection settings
-load_dotenv()
+try:
+    from src import bulk_load, db, instrument, manifest, seasons, stage_cache
+except ImportError:  # Running as a script from within src/
+    import bulk_load
+    import db
+    import instrument
+    import manifest
+    import seasons
+    import stage_cache
 
-DB_HOST = os.getenv("DB_HOST")
-DB_PORT = os.getenv("DB_PORT")
-DB_NAME = os.getenv("DB_NAME")
-DB_USER = os.getenv("DB_USER")
-DB_PASSWORD = os.getenv("DB_PASSWORD")
+# Upper bound on concurrent loads so they fit within the engine's connection pool
+LOAD_WORKERS = 4
 
-# Create SQLAlchemy engine
-engine = create_engine(f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}")
+# Rows read per chunk when streaming large CSVs
+CHUNK_SIZE = 50_000
+
+# Low-cardinality text columns read as categoricals
+CATEGORY_COLUMNS = ["team", "season", "position", "home_team", "away_team"]
+
+# pd.read_csv dtypes for the numeric SQL types used in TABLE_SCHEMAS. Text columns are
+# left to the parser, which already reads them as strings. FLOAT columns are read as
+# float64, the width of the database column, so they load without widening
+SQL_READ_DTYPES = {
+    "INT": "int32",
+    "FLOAT": "float64",
+}
 
 # File paths and schema mappings
 DATA_FILES = {
@@ -57,11 +73,19 @@ RENAME_MAPPINGS = {
         "Season": "season",
         "Position": "position",
         "Minutes": "minutes",
+        "Shots": "shots",
+        "SoT": "shots_on_target",
+        "G": "goals",
         "xG": "xg",
-        "xA": "xa",
+        "xPlace": "xplace",
         "G-xG": "g_minus_xg",
+        "KeyP": "key_passes",
+        "A": "assists",
+        "xA": "xa",
         "A-xA": "a_minus_xa",
         "xG+xA": "xg_plus_xa",
+        "PA": "points_added",
+        "xPA": "xpoints_added",
     },
     "goals_added": {
         "Player": "player",
@@ -93,6 +117,10 @@ FORMAT_CURRENCY_COLUMNS = {
     "salaries": ["total_guaranteed", "avg_guaranteed", "median_guaranteed", "stddev_guaranteed"]
 }
 
+FORMAT_PERCENT_COLUMNS = {
+    "xp": ["pass_percentage", "xpass_percentage"]
+}
+
 TABLE_SCHEMAS = {
     "salaries": """
         CREATE TABLE IF NOT EXISTS salaries (
@@ -134,11 +162,19 @@ TABLE_SCHEMAS = {
             season VARCHAR(20),
             position VARCHAR(20),
             minutes INT,
+            shots INT,
+            shots_on_target INT,
+            goals INT,
             xg FLOAT,
-            xa FLOAT,
+            xplace FLOAT,
             g_minus_xg FLOAT,
+            key_passes INT,
+            assists INT,
+            xa FLOAT,
             a_minus_xa FLOAT,
-            xg_plus_xa FLOAT
+            xg_plus_xa FLOAT,
+            points_added FLOAT,
+            xpoints_added FLOAT
         );
     """,
     "goals_added": """
@@ -173,14 +209,117 @@ TABLE_SCHEMAS = {
     """,
 }
 
-def preprocess_data(file_path=None, rename_mapping=None, format_currency_columns=None, test_df=None):
+def read_dtypes(table_name, nullable=False):
+    """
+    Derive explicit pd.read_csv dtypes for a source file from its table schema, so
+    numeric types are not inferred: categoricals for team, position and season style
+    columns, int32 for INT columns, float64 for FLOAT columns and strings for "$"/"%"
+    formatted columns, which are parsed after reading.
+    Args:
+        table_name (str): Key into TABLE_SCHEMAS and RENAME_MAPPINGS.
+        nullable (bool): Read INT columns as nullable Int32, which accepts missing
+            values but parses noticeably slower than int32.
+    Returns:
+        dict: Mapping of source CSV column to dtype.
+    """
+    column_types = bulk_load.parse_schema_columns(TABLE_SCHEMAS[table_name])
+    formatted_columns = set(FORMAT_CURRENCY_COLUMNS.get(table_name, [])) | set(FORMAT_PERCENT_COLUMNS.get(table_name, []))
+
+    dtypes = {}
+    for source_column, column in RENAME_MAPPINGS[table_name].items():
+        if column in formatted_columns:
+            dtypes[source_column] = "object"
+        elif column in CATEGORY_COLUMNS:
+            dtypes[source_column] = "category"
+        elif column_types.get(column) in SQL_READ_DTYPES:
+            dtypes[source_column] = SQL_READ_DTYPES[column_types[column]]
+    return as_nullable(dtypes) if nullable else dtypes
+
+def as_nullable(dtypes):
+    """
+    Swap int32 read dtypes for nullable Int32 so columns with missing values can be read.
+    """
+    return {col: ("Int32" if dtype == "int32" else dtype) for col, dtype in dtypes.items()}
+
+def parse_formatted_numbers(series, dtype="float64"):
+    """
+    Parse "$42,227,583" or "63.2%" style values into numbers with vectorized string methods.
+    Args:
+        series (pd.Series): Column to parse.
+        dtype (str): Numeric dtype of the result.
+    Returns:
+        pd.Series: Parsed numeric column.
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype(dtype)
+    cleaned = (
+        series.astype("string")
+        .str.replace("$", "", regex=False)
+        .str.replace(",", "", regex=False)
+        .str.replace("%", "", regex=False)
+    )
+    return pd.to_numeric(cleaned).astype(dtype)
+
+def clean_columns(df, rename_mapping, format_currency_columns=None, format_percent_columns=None):
+    """
+    Select, rename and format the mapped columns of a raw CSV frame or chunk.
+    Args:
+        df (pd.DataFrame): Raw DataFrame or chunk.
+        rename_mapping (dict): Column rename mapping.
+        format_currency_columns (list): List of columns to format as currency.
+        format_percent_columns (list): List of "63.2%"-style columns to parse as numbers.
+    Returns:
+        pd.DataFrame: DataFrame with missing values filled.
+    """
+    # Drop miscellaneous columns
+    if len(df.columns) and df.columns[0].lower() in ["", "unnamed: 0"]:
+        df = df.iloc[:, 1:]
+
+    # Drop columns not in the rename_mapping
+    valid_columns = [col for col in rename_mapping.keys() if col in df.columns]
+    df = df[valid_columns]
+
+    # Rename columns
+    df = df.rename(columns=rename_mapping)
+
+    # Format currency columns if provided, keeping full precision for dollar amounts
+    if format_currency_columns:
+        for col in format_currency_columns:
+            if col in df.columns:
+                df[col] = parse_formatted_numbers(df[col], "float64")
+
+    # Strip the percent sign so the typed FLOAT columns accept the values
+    if format_percent_columns:
+        for col in format_percent_columns:
+            if col in df.columns:
+                df[col] = parse_formatted_numbers(df[col], "float64")
+
+    # Fill missing values, adding the fill value as a category where needed. Text
+    # categoricals get "0" so their categories keep a single type
+    fill_values = {}
+    for col in df.columns:
+        if not df[col].hasnans:
+            continue
+        fill_values[col] = 0
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            if df[col].cat.categories.dtype == object:
+                fill_values[col] = "0"
+            if fill_values[col] not in df[col].cat.categories:
+                df[col] = df[col].cat.add_categories([fill_values[col]])
+    return df.fillna(fill_values)
+
+@instrument.stage()
+def preprocess_data(file_path=None, rename_mapping=None, format_currency_columns=None, test_df=None,
+                    format_percent_columns=None, dtypes=None):
     """
-    General preprocessing for any CSV file with optional currency formatting.
+    General preprocessing for any CSV file with optional currency and percent formatting.
     Args:
         file_path (str): Path to the CSV file.
         rename_mapping (dict): Column rename mapping.
         format_currency_columns (list): List of columns to format as currency.
         test_df (pd.DataFrame): Optional DataFrame for testing.
+        format_percent_columns (list): List of "63.2%"-style columns to parse as numbers.
+        dtypes (dict): Optional read dtypes per source column, see read_dtypes.
     Returns:
         pd.DataFrame: Preprocessed DataFrame.
     """
@@ -188,73 +327,449 @@ def preprocess_data(file_path=None, rename_mapping=None, format_currency_columns
         if test_df is not None:  # Use the test DataFrame if provided
             df = test_df
         else:
-            df = pd.read_csv(file_path)
-
-        # Drop miscellaneous columns
-        if df.columns[0].lower() in ["", "unnamed: 0"]:
-            df = df.iloc[:, 1:]
-
-        # Drop columns not in the rename_mapping
-        valid_columns = [col for col in rename_mapping.keys() if col in df.columns]
-        df = df[valid_columns]
+            try:
+                df = pd.read_csv(file_path, usecols=lambda col: col in rename_mapping, dtype=dtypes)
+            except ValueError:
+                if not dtypes:
+                    raise
+                # An integer column has missing values, so read it as nullable instead
+                df = pd.read_csv(file_path, usecols=lambda col: col in rename_mapping, dtype=as_nullable(dtypes))
 
-        # Rename columns
-        df = df.rename(columns=rename_mapping)
+        df = clean_columns(df, rename_mapping, format_currency_columns, format_percent_columns)
 
-        # Format currency columns if provided
-        if format_currency_columns:
-            for col in format_currency_columns:
-                if col in df.columns:
-                    df[col] = df[col].replace(r"[\$,]", "", regex=True).astype(float)
-                    
-
-        # Fill missing values, drop duplicates
-        df = df.fillna(0).drop_duplicates()
+        # Drop duplicates
+        df = df.drop_duplicates()
         return df
     except Exception as e:
         print(f"Error preprocessing data: {e}")
         return pd.DataFrame()
 
-def load_data_to_postgres(df, table_name):
+def row_digests(df):
+    """
+    Hash each row to a 64-bit digest. Numeric columns are hashed as float64 so a row hashes
+    the same whether its chunk inferred a column as int or, after filling NaNs, as float.
+    Args:
+        df (pd.DataFrame): DataFrame to hash.
+    Returns:
+        pd.Series: uint64 digest per row.
+    """
+    numeric_columns = df.select_dtypes(include="number").columns
+    return pd.util.hash_pandas_object(df.astype({col: "float64" for col in numeric_columns}), index=False)
+
+def preprocess_chunks(file_path, rename_mapping, format_currency_columns=None, format_percent_columns=None,
+                      chunksize=CHUNK_SIZE, dtypes=None):
+    """
+    Streaming variant of preprocess_data that reads and cleans a CSV in fixed-size chunks.
+    Only the mapped columns are read, and duplicates are dropped across chunks by keeping
+    a set of 64-bit row digests rather than the rows themselves.
+    Args:
+        file_path (str): Path to the CSV file.
+        rename_mapping (dict): Column rename mapping.
+        format_currency_columns (list): List of columns to format as currency.
+        format_percent_columns (list): List of "63.2%"-style columns to parse as numbers.
+        chunksize (int): Number of rows read per chunk.
+        dtypes (dict): Optional read dtypes per source column, see read_dtypes.
+    Yields:
+        pd.DataFrame: Preprocessed chunk containing only rows not seen in earlier chunks.
+    """
+    seen_digests = set()
+    reader = pd.read_csv(file_path, usecols=lambda col: col in rename_mapping, dtype=dtypes, chunksize=chunksize)
+    for chunk in reader:
+        chunk = clean_columns(chunk, rename_mapping, format_currency_columns, format_percent_columns)
+
+        digests = row_digests(chunk)
+        # Probe the set per digest; isin would rebuild a hash table of every row seen so far
+        values = digests.to_numpy()
+        seen = np.fromiter((digest in seen_digests for digest in values), dtype=bool, count=len(values))
+        is_new = ~digests.duplicated() & ~seen
+        seen_digests.update(digests[is_new].tolist())
+
+        chunk = chunk[is_new.to_numpy()]
+        if not chunk.empty:
+            yield chunk
+
+@instrument.stage()
+def load_data_to_postgres(df, table_name, method="copy"):
     """
-    Load DataFrame into PostgreSQL using pandas.
+    Load DataFrame into PostgreSQL. Season-partitioned tables (seasons.is_partitioned)
+    only have the seasons present in df replaced, so earlier seasons are kept.
     Args:
         df (pd.DataFrame): DataFrame to load.
         table_name (str): Target table name in the database.
+        method (str): "copy" streams rows with COPY FROM STDIN into the typed table from
+            TABLE_SCHEMAS, "to_sql" fills the same table using pandas INSERTs.
+    Returns:
+        bool: True if the table was loaded.
     """
+    by_season = seasons.is_partitioned(table_name)
     try:
-        with engine.connect() as conn:
-            df.to_sql(table_name, conn, if_exists="replace", index=False)
+        if method == "copy":
+            with db.get_engine().begin() as conn:
+                bulk_load.copy_dataframe(conn, df, table_name, TABLE_SCHEMAS.get(table_name), by_season)
+        else:
+            with db.get_engine().begin() as conn:
+                # Empty the typed table rather than letting pandas replace it, which would
+                # drop its declared types and indexes
+                column_types = bulk_load.prepare_table(
+                    conn, df, table_name, TABLE_SCHEMAS.get(table_name), by_season
+                )
+                if column_types is not None:
+                    df = bulk_load.coerce_to_schema(df, column_types)
+                df.to_sql(table_name, conn, if_exists="append", index=False)
+        instrument.add_rows(rows_out=len(df))
         print(f"Data successfully loaded into table: {table_name}\n")
+        return True
     except Exception as e:
         print(f"Error loading data into {table_name}: {e}\n")
+        return False
 
-def setup_tables():
+def create_tables(conn):
     """
     Create tables dynamically based on the schema.
     """
+    for table_name, schema in TABLE_SCHEMAS.items():
+        db.execute_ddl(conn, schema)
+    db.execute_ddl(conn, manifest.MANIFEST_SCHEMA)
+
+
+def add_shot_and_assist_columns(conn):
+    # xg tables created before the shot and assist columns were ingested
+    bulk_load.add_missing_columns(conn, "xg", bulk_load.parse_schema_columns(TABLE_SCHEMAS["xg"]))
+
+
+def create_query_indexes(conn):
+    # Tables written later, such as player_performance_metrics, get theirs when they are created
+    for table_name in db.TABLE_INDEXES:
+        if db.table_exists(conn, table_name):
+            db.create_indexes(conn, table_name)
+
+
+# Schema changes applied once per database, in order, and recorded in schema_migrations.
+# Append new steps; never edit or reorder applied ones
+SCHEMA_MIGRATIONS = [
+    ("0001_create_tables", create_tables),
+    ("0002_add_shot_and_assist_columns", add_shot_and_assist_columns),
+    ("0003_create_query_indexes", create_query_indexes),
+    # Same step again for the season-leading indexes added to db.TABLE_INDEXES
+    ("0004_create_season_indexes", create_query_indexes),
+]
+
+
+def setup_tables():
+    """
+    Bring the database schema up to date by applying any pending SCHEMA_MIGRATIONS.
+    """
     try:
-        with engine.connect() as conn:
-            for table_name, schema in TABLE_SCHEMAS.items():
-                conn.execute(text(schema))
+        applied = db.apply_migrations(SCHEMA_MIGRATIONS)
+        if applied:
+            print(f"Applied schema migrations: {', '.join(applied)}")
         print("Tables created or verified.")
     except Exception as e:
         print(f"Error creating tables: {e}")
 
-def load_all_data():
+def read_manifest():
+    """
+    Fetch the ingestion manifest, or an empty one if it cannot be read.
+    """
+    try:
+        with db.get_engine().begin() as conn:
+            return manifest.read_manifest(conn)
+    except Exception as e:
+        print(f"Error reading ingestion manifest: {e}")
+        return {}
+
+def preprocess_source(table_name, file_path):
+    """
+    Preprocess one source file with the mappings registered for its table.
+    Args:
+        table_name (str): Key into RENAME_MAPPINGS.
+        file_path (str): Path to the CSV file.
+    Returns:
+        pd.DataFrame: Preprocessed DataFrame, empty on failure.
+    """
+    print(f"Processing {table_name}...")
+    return preprocess_data(
+        file_path,
+        RENAME_MAPPINGS[table_name],
+        FORMAT_CURRENCY_COLUMNS.get(table_name, None),
+        format_percent_columns=FORMAT_PERCENT_COLUMNS.get(table_name, None),
+        dtypes=read_dtypes(table_name),
+    )
+
+def write_source(table_name, file_path, fingerprint, df):
+    """
+    Load a preprocessed source into its table and record it in the ingestion manifest.
+    Args:
+        table_name (str): Target table name.
+        file_path (str): Source file the DataFrame was read from.
+        fingerprint (dict): Result of manifest.compute_file_fingerprint for the file.
+        df (pd.DataFrame): Preprocessed DataFrame.
+    Returns:
+        bool: True if the table was loaded.
+    """
+    if not load_data_to_postgres(df, table_name):
+        return False
+    try:
+        with db.get_engine().begin() as conn:
+            manifest.record_manifest(conn, table_name, file_path, fingerprint, len(df))
+    except Exception as e:
+        print(f"Error updating ingestion manifest for {table_name}: {e}")
+    return True
+
+def publish_seasons(table_name, file_path, fingerprint, file_seasons, df):
+    """
+    Publish a cached season-partitioned table, writing only the seasons of its source file.
+    """
+    return write_source(table_name, file_path, fingerprint, seasons.filter_frame(df, table_name, file_seasons))
+
+def cached_history(table_name, df):
+    """
+    Stored rows of the seasons a source file does not contain, so the cached table holds
+    every season as the database table will once the file is published.
+    Returns:
+        pd.DataFrame: df with the other seasons' rows appended.
+    """
+    stored = seasons.stored_seasons(table_name)
+    other_seasons = sorted(set(stored) - set(seasons.partition_values(table_name, df)))
+    if not other_seasons:
+        return df
+    history = seasons.read_seasons(table_name, other_seasons, columns=list(df.columns))[df.columns]
+    date_column = seasons.SEASON_DATE_COLUMNS.get(table_name)
+    if date_column and df[date_column].dtype == object:
+        # Dates come back typed from some backends but are parsed as text from the files
+        history[date_column] = history[date_column].astype(str).str[:10]
+    return pd.concat([history, df], ignore_index=True)
+
+def load_source(table_name, file_path, fingerprint, df):
+    """
+    Load a preprocessed source. With the stage cache enabled the DataFrame goes to the
+    cache and its database load is deferred until the end of the run. For season-partitioned
+    tables the seasons it replaced are recorded in the manifest.
+    Args:
+        table_name (str): Target table name.
+        file_path (str): Source file the DataFrame was read from.
+        fingerprint (dict): Result of manifest.compute_file_fingerprint for the file.
+        df (pd.DataFrame): Preprocessed DataFrame.
+    Returns:
+        bool: True if the table was loaded or cached.
+    """
+    if df.empty:
+        return False
+    file_seasons = seasons.partition_values(table_name, df)
+    if stage_cache.is_enabled():
+        try:
+            publish = partial(write_source, table_name, file_path, fingerprint)
+            if file_seasons is not None:
+                publish = partial(publish_seasons, table_name, file_path, fingerprint, file_seasons)
+                if not stage_cache.is_offline():
+                    df = cached_history(table_name, df)
+            stage_cache.write_frame(table_name, df, publish=publish)
+            print(f"Data cached for table: {table_name}\n")
+        except Exception as e:
+            print(f"Error caching data for {table_name}: {e}\n")
+            return False
+    elif not write_source(table_name, file_path, fingerprint, df):
+        return False
+    if file_seasons is not None:
+        manifest.mark_seasons(table_name, file_seasons)
+    return True
+
+@instrument.stage()
+def stream_source(table_name, file_path, fingerprint, chunksize=CHUNK_SIZE):
+    """
+    Stream a source file into its table chunk by chunk, so peak memory is bounded by the
+    chunk size rather than the file size, and record it in the ingestion manifest.
+    Args:
+        table_name (str): Target table name.
+        file_path (str): Path to the CSV file.
+        fingerprint (dict): Result of manifest.compute_file_fingerprint for the file.
+        chunksize (int): Number of rows read and copied per chunk.
+    Returns:
+        bool: True if the table was loaded.
+    """
+    print(f"Streaming {table_name} in chunks of {chunksize} rows...")
+    try:
+        chunks = preprocess_chunks(
+            file_path,
+            RENAME_MAPPINGS[table_name],
+            FORMAT_CURRENCY_COLUMNS.get(table_name, None),
+            FORMAT_PERCENT_COLUMNS.get(table_name, None),
+            chunksize=chunksize,
+            # A later chunk may have missing integers, so always read them as nullable
+            dtypes=read_dtypes(table_name, nullable=True),
+        )
+        with db.get_engine().begin() as conn:
+            rows = bulk_load.copy_chunks(
+                conn, chunks, table_name, TABLE_SCHEMAS.get(table_name), seasons.is_partitioned(table_name)
+            )
+            if rows:
+                manifest.record_manifest(conn, table_name, file_path, fingerprint, rows)
+        instrument.add_rows(rows_out=rows)
+        print(f"Data successfully streamed into table: {table_name} ({rows} rows)\n")
+        return rows > 0
+    except Exception as e:
+        print(f"Error streaming data into {table_name}: {e}\n")
+        return False
+
+def preprocess_pool(workers):
     """
-    Preprocess and load all datasets into PostgreSQL.
+    Process pool for preprocess_source, shared by the files of one run.
+    Args:
+        workers (int): Number of preprocessing processes.
+    Returns:
+        ProcessPoolExecutor: Pool to pass to load_concurrently or ingest_table.
     """
+    # Workers start from a fork server or a fresh interpreter rather than a fork of this
+    # process, which may hold locks in its loader threads
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method))
+
+def load_concurrently(sources, workers, load_workers=None):
+    """
+    Preprocess sources on a process pool and load each one on a thread pool as soon as
+    it is parsed. A failure in one file does not stop the others.
+    Args:
+        sources (dict): Mapping of table name to (file_path, fingerprint).
+        workers (int): Number of preprocessing processes.
+        load_workers (int): Number of concurrent loads, defaults to min(workers, LOAD_WORKERS).
+    Returns:
+        list: Names of the tables that were loaded.
+    """
+    load_workers = load_workers or min(workers, LOAD_WORKERS)
+    loaded = []
+    with preprocess_pool(workers) as processes, \
+            ThreadPoolExecutor(max_workers=load_workers) as threads:
+        parse_futures = {
+            processes.submit(preprocess_source, table_name, file_path): table_name
+            for table_name, (file_path, _) in sources.items()
+        }
+        load_futures = {}
+        for future in as_completed(parse_futures):
+            table_name = parse_futures[future]
+            file_path, fingerprint = sources[table_name]
+            try:
+                df = future.result()
+            except Exception as e:
+                print(f"Error preprocessing {table_name}: {e}")
+                continue
+            load_futures[threads.submit(load_source, table_name, file_path, fingerprint, df)] = table_name
+
+        for future in as_completed(load_futures):
+            table_name = load_futures[future]
+            try:
+                if future.result():
+                    loaded.append(table_name)
+            except Exception as e:
+                print(f"Error loading {table_name}: {e}")
+    return loaded
+
+def load_all_data(force=False, workers=None, chunksize=None):
+    """
+    Preprocess and load all datasets into PostgreSQL. Files whose content hash matches
+    the ingestion manifest are skipped unless force is set.
+    Args:
+        force (bool): Reload every file regardless of the manifest.
+        workers (int): Preprocess files on this many processes while loading on a
+            thread pool. Files are processed one at a time when not set.
+        chunksize (int): Stream each file into its table in chunks of this many rows
+            instead of reading it whole.
+    Returns:
+        set: Names of the tables that were reloaded.
+    """
+    manifest.reset_changed_tables()
+    previous_loads = {} if force or stage_cache.is_offline() else read_manifest()
+
+    sources = {}
     for table_name, file_path in DATA_FILES.items():
-        print(f"Processing {table_name}...")
-        format_currency_columns = FORMAT_CURRENCY_COLUMNS.get(table_name, None)
-        df = preprocess_data(file_path, RENAME_MAPPINGS[table_name], format_currency_columns)
-        if not df.empty:
-            load_data_to_postgres(df, table_name)
-
-def main(): 
-    setup_tables()
-    load_all_data()
+        try:
+            fingerprint = manifest.compute_file_fingerprint(file_path)
+        except OSError as e:
+            print(f"Error reading {file_path}: {e}\n")
+            continue
+        if manifest.is_unchanged(previous_loads, table_name, fingerprint):
+            print(f"Skipping {table_name}, {file_path} is unchanged.\n")
+            continue
+        sources[table_name] = (file_path, fingerprint)
+
+    # Streaming writes straight to the database, so it is only used without the stage cache
+    if chunksize and not stage_cache.is_enabled():
+        loaded = [
+            table_name
+            for table_name, (file_path, fingerprint) in sources.items()
+            if stream_source(table_name, file_path, fingerprint, chunksize)
+        ]
+    elif workers and workers > 1 and len(sources) > 1:
+        loaded = load_concurrently(sources, workers)
+    else:
+        loaded = [
+            table_name
+            for table_name, (file_path, fingerprint) in sources.items()
+            if load_source(table_name, file_path, fingerprint, preprocess_source(table_name, file_path))
+        ]
+
+    manifest.mark_changed(*loaded)
+    return manifest.changed_tables()
+
+def ingest_table(table_name, force=False, chunksize=None, pool=None):
+    """
+    Preprocess and load one source file, unless the ingestion manifest shows it unchanged,
+    and mark its table as changed for the later stages.
+    Args:
+        table_name (str): Key into DATA_FILES.
+        force (bool): Reload the file regardless of the manifest.
+        chunksize (int): Stream the file into its table in chunks of this many rows.
+        pool (ProcessPoolExecutor): Preprocess the file on this pool, see preprocess_pool,
+            so files ingested from several threads are parsed side by side.
+    Returns:
+        bool: True if the table was loaded or is unchanged.
+    """
+    file_path = DATA_FILES[table_name]
+    try:
+        fingerprint = manifest.compute_file_fingerprint(file_path)
+    except OSError as e:
+        print(f"Error reading {file_path}: {e}\n")
+        return False
+
+    previous_loads = {} if force or stage_cache.is_offline() else read_manifest()
+    if manifest.is_unchanged(previous_loads, table_name, fingerprint):
+        print(f"Skipping {table_name}, {file_path} is unchanged.\n")
+        return True
+
+    if chunksize and not stage_cache.is_enabled():
+        loaded = stream_source(table_name, file_path, fingerprint, chunksize)
+    else:
+        if pool is not None:
+            df = pool.submit(preprocess_source, table_name, file_path).result()
+        else:
+            df = preprocess_source(table_name, file_path)
+        loaded = load_source(table_name, file_path, fingerprint, df)
+    if loaded:
+        manifest.mark_changed(table_name)
+    return loaded
+
+def ingest_tables(table_names, force=False, chunksize=None, workers=None):
+    """
+    Ingest several source files with ingest_table, reporting whether all of them loaded.
+    Args:
+        table_names (list): Keys into DATA_FILES.
+        force (bool): Reload the files regardless of the manifest.
+        chunksize (int): Stream each file into its table in chunks of this many rows.
+        workers (int): Preprocess the files on this many processes, loading each one on a
+            thread pool as soon as it is parsed. Files are processed one at a time when not set.
+    Returns:
+        bool: True if every file was loaded or is unchanged.
+    """
+    if not workers or workers < 2 or len(table_names) < 2:
+        return all([ingest_table(table_name, force, chunksize) for table_name in table_names])
+    with preprocess_pool(workers) as processes, \
+            ThreadPoolExecutor(max_workers=min(workers, LOAD_WORKERS)) as threads:
+        results = threads.map(lambda table_name: ingest_table(table_name, force, chunksize, processes), table_names)
+        return all(list(results))
+
+def main(force=False, workers=None, chunksize=None):
+    if not stage_cache.is_offline():
+        setup_tables()
+    load_all_data(force=force, workers=workers, chunksize=chunksize)
 
 if __name__ == "__main__":
    main()
\ No newline at end of file
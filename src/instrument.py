@@ -0,0 +1,210 @@
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Not available on Windows, where peak memory is left out
+    resource = None
+
+try:
+    from src import db
+except ImportError:  # Running as a script from within src/
+    import db
+
+# JSON lines file the stage records of a pipeline run are written to
+METRICS_FILE = ".pipeline_metrics.jsonl"
+
+_settings = {"enabled": True, "path": None}
+_records = []
+_records_lock = threading.Lock()
+
+# Stage records open on each thread, innermost last, so add_rows reaches the running stage
+_active = threading.local()
+
+
+def configure(enabled=True, path=None):
+    """
+    Start recording a new run.
+    Args:
+        enabled (bool): Record stages at all; when off each stage costs one flag check.
+        path (str): JSON lines file to write each record to as it finishes, replacing the
+            previous run's file. Records are only kept in memory when not set.
+    """
+    with _records_lock:
+        _settings.update(enabled=enabled, path=path)
+        _records.clear()
+        if enabled and path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            open(path, "w").close()
+
+
+def is_enabled():
+    return _settings["enabled"]
+
+
+def peak_rss_mb():
+    """
+    Peak resident memory of this process so far.
+    Returns:
+        float or None: Megabytes, or None where the resource module is missing.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def count_rows(*values):
+    """
+    Total rows of the DataFrames and Series among the values.
+    Returns:
+        int or None: Row count, or None if none of the values has rows.
+    """
+    counts = [len(value) for value in values if isinstance(value, (pd.DataFrame, pd.Series))]
+    return sum(counts) if counts else None
+
+
+@contextmanager
+def measure(name, rows_in=None):
+    """
+    Record one stage: wall and CPU time, database queries and time on this thread, peak
+    memory and rows in and out. Nested stages are included in their parent's numbers.
+    Args:
+        name (str): Stage name in the records and summary.
+        rows_in (int): Rows the stage was given, if known.
+    Yields:
+        dict or None: The open record, e.g. to set rows_out; None while disabled.
+    """
+    if not _settings["enabled"]:
+        yield None
+        return
+
+    queries, db_seconds = db.thread_query_stats()
+    peak_before = peak_rss_mb()
+    record = {"stage": name, "started_at": round(time.time(), 3), "rows_in": rows_in, "rows_out": None, "ok": True}
+    if not hasattr(_active, "stack"):
+        _active.stack = []
+    stack = _active.stack
+    stack.append(record)
+    wall_start, cpu_start = time.perf_counter(), time.thread_time()
+    try:
+        yield record
+    except BaseException:
+        record["ok"] = False
+        raise
+    finally:
+        record["wall_seconds"] = round(time.perf_counter() - wall_start, 6)
+        record["cpu_seconds"] = round(time.thread_time() - cpu_start, 6)
+        queries_after, db_seconds_after = db.thread_query_stats()
+        record["db_queries"] = queries_after - queries
+        record["db_seconds"] = round(db_seconds_after - db_seconds, 6)
+        peak_after = peak_rss_mb()
+        if peak_after is not None:
+            record["peak_rss_mb"] = round(peak_after, 1)
+            record["rss_growth_mb"] = round(peak_after - peak_before, 1)
+        stack.pop()
+        _save(record)
+
+
+def stage(name=None):
+    """
+    Decorate a stage function so every call is recorded with measure. Rows in are counted
+    from DataFrame arguments and rows out from a DataFrame result; a result of False
+    marks the call as failed, as the stage functions return on error.
+    Args:
+        name (str): Stage name; "<module>.<function>" by default.
+    """
+    def decorate(func):
+        stage_name = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _settings["enabled"]:
+                return func(*args, **kwargs)
+            with measure(stage_name, count_rows(*args, *kwargs.values())) as record:
+                result = func(*args, **kwargs)
+                if record["rows_out"] is None:
+                    record["rows_out"] = count_rows(result)
+                if result is False:
+                    record["ok"] = False
+                return result
+
+        return wrapper
+
+    return decorate
+
+
+def add_rows(rows_in=None, rows_out=None):
+    """
+    Set the rows of the stage running on this thread, for stages whose DataFrames are not
+    arguments or results. Does nothing outside a stage or while disabled.
+    """
+    stack = getattr(_active, "stack", None)
+    if not stack:
+        return
+    if rows_in is not None:
+        stack[-1]["rows_in"] = rows_in
+    if rows_out is not None:
+        stack[-1]["rows_out"] = rows_out
+
+
+def _save(record):
+    with _records_lock:
+        _records.append(record)
+        if _settings["path"]:
+            with open(_settings["path"], "a") as f:
+                f.write(json.dumps(record) + "\n")
+
+
+def get_records():
+    """
+    Returns:
+        list: Copies of the records of this run, in the order the stages finished.
+    """
+    with _records_lock:
+        return [dict(record) for record in _records]
+
+
+def summary_table():
+    """
+    Per-stage totals of this run's records, one row per stage in the order they first
+    finished: calls, failures, wall, CPU and database seconds, rows and peak memory.
+    Returns:
+        str: Table, or an empty string if nothing was recorded.
+    """
+    totals = {}
+    for record in get_records():
+        total = totals.setdefault(record["stage"], {
+            "calls": 0, "failed": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0, "db_seconds": 0.0,
+            "rows_in": 0, "rows_out": 0, "peak_rss_mb": 0.0,
+        })
+        total["calls"] += 1
+        total["failed"] += not record["ok"]
+        for key in ["wall_seconds", "cpu_seconds", "db_seconds"]:
+            total[key] += record[key]
+        total["rows_in"] += record["rows_in"] or 0
+        total["rows_out"] += record["rows_out"] or 0
+        total["peak_rss_mb"] = max(total["peak_rss_mb"], record.get("peak_rss_mb") or 0.0)
+    if not totals:
+        return ""
+
+    width = max(len(name) for name in totals) + 2
+    lines = [
+        f"{'stage':<{width}}{'calls':>6}{'failed':>7}{'wall s':>9}{'cpu s':>9}{'db s':>9}"
+        f"{'rows in':>10}{'rows out':>10}{'peak MB':>9}"
+    ]
+    for name, total in totals.items():
+        lines.append(
+            f"{name:<{width}}{total['calls']:>6}{total['failed']:>7}{total['wall_seconds']:>9.3f}"
+            f"{total['cpu_seconds']:>9.3f}{total['db_seconds']:>9.3f}{total['rows_in']:>10}"
+            f"{total['rows_out']:>10}{total['peak_rss_mb']:>9.1f}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,172 @@
+import hashlib
+import os
+from sqlalchemy import text
+
+try:
+    from src import db
+except ImportError:  # Running as a script from within src/
+    import db
+
+MANIFEST_TABLE = "ingestion_manifest"
+
+MANIFEST_SCHEMA = f"""
+    CREATE TABLE IF NOT EXISTS {MANIFEST_TABLE} (
+        table_name VARCHAR(50) PRIMARY KEY,
+        file_path VARCHAR(255),
+        content_hash VARCHAR(64),
+        file_size BIGINT,
+        file_mtime FLOAT,
+        row_count INT,
+        loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+"""
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# Tables rewritten during this run; None until a stage records something
+_changed_tables = None
+
+# Seasons replaced per season-partitioned table during this run. A changed table without
+# an entry was rewritten whole, e.g. streamed in chunks
+_changed_seasons = {}
+
+
+def compute_file_fingerprint(file_path):
+    """
+    Hash a file's contents and collect its size and modification time.
+    Args:
+        file_path (str): Path to the file.
+    Returns:
+        dict: content_hash, file_size and file_mtime for the file.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    stat = os.stat(file_path)
+    return {
+        "content_hash": digest.hexdigest(),
+        "file_size": stat.st_size,
+        "file_mtime": stat.st_mtime,
+    }
+
+
+def read_manifest(conn):
+    """
+    Fetch the manifest entries recorded by previous loads.
+    Args:
+        conn (sqlalchemy.engine.Connection): Open database connection.
+    Returns:
+        dict: Mapping of table name to its manifest row as a dict.
+    """
+    db.execute_ddl(conn, MANIFEST_SCHEMA)
+    rows = conn.execute(text(f"SELECT * FROM {MANIFEST_TABLE}")).mappings()
+    return {row["table_name"]: dict(row) for row in rows}
+
+
+def record_manifest(conn, table_name, file_path, fingerprint, row_count):
+    """
+    Insert or update the manifest entry for a freshly loaded table.
+    Args:
+        conn (sqlalchemy.engine.Connection): Open connection inside a transaction.
+        table_name (str): Table that was loaded.
+        file_path (str): Source file the table was loaded from.
+        fingerprint (dict): Result of compute_file_fingerprint for the source file.
+        row_count (int): Number of rows loaded.
+    """
+    db.execute_ddl(conn, MANIFEST_SCHEMA)
+    conn.execute(
+        text(f"""
+            INSERT INTO {MANIFEST_TABLE}
+                (table_name, file_path, content_hash, file_size, file_mtime, row_count, loaded_at)
+            VALUES
+                (:table_name, :file_path, :content_hash, :file_size, :file_mtime, :row_count, CURRENT_TIMESTAMP)
+            ON CONFLICT (table_name) DO UPDATE SET
+                file_path = EXCLUDED.file_path,
+                content_hash = EXCLUDED.content_hash,
+                file_size = EXCLUDED.file_size,
+                file_mtime = EXCLUDED.file_mtime,
+                row_count = EXCLUDED.row_count,
+                loaded_at = EXCLUDED.loaded_at
+        """),
+        {"table_name": table_name, "file_path": file_path, "row_count": row_count, **fingerprint},
+    )
+
+
+def is_unchanged(manifest, table_name, fingerprint):
+    """
+    Check whether a source file matches the hash recorded at its last load.
+    Args:
+        manifest (dict): Result of read_manifest.
+        table_name (str): Table loaded from the file.
+        fingerprint (dict): Result of compute_file_fingerprint for the file.
+    Returns:
+        bool: True if the file's content hash is unchanged.
+    """
+    entry = manifest.get(table_name)
+    return entry is not None and entry["content_hash"] == fingerprint["content_hash"]
+
+
+def reset_changed_tables():
+    """
+    Start tracking changed tables for a new pipeline run.
+    """
+    global _changed_tables, _changed_seasons
+    _changed_tables = set()
+    _changed_seasons = {}
+
+
+def mark_changed(*table_names):
+    """
+    Record that the given tables were rewritten during this run.
+    """
+    global _changed_tables
+    if _changed_tables is None:
+        _changed_tables = set()
+    _changed_tables.update(table_names)
+
+
+def mark_seasons(table_name, seasons):
+    """
+    Record which seasons of a season-partitioned table a load replaced.
+    """
+    _changed_seasons.setdefault(table_name, set()).update(str(season) for season in seasons)
+
+
+def changed_tables():
+    """
+    Tables rewritten during this run.
+    Returns:
+        set or None: Changed table names, or None if no stage has recorded changes,
+        e.g. when a stage is run on its own.
+    """
+    return None if _changed_tables is None else set(_changed_tables)
+
+
+def changed_seasons(*table_names):
+    """
+    Seasons rewritten during this run in any of the given changed tables.
+    Returns:
+        list or None: Sorted season strings, or None if the seasons are unknown, e.g. when
+        nothing has been recorded or one of the tables was rewritten whole.
+    """
+    if _changed_tables is None:
+        return None
+    seasons = set()
+    for table_name in _changed_tables.intersection(table_names):
+        if table_name not in _changed_seasons:
+            return None
+        seasons |= _changed_seasons[table_name]
+    return sorted(seasons)
+
+
+def has_changed(*table_names):
+    """
+    Check whether any of the given tables changed during this run. When nothing has
+    been recorded the answer is unknown, so every table is treated as changed.
+    Returns:
+        bool: True if downstream work depending on these tables should run.
+    """
+    if _changed_tables is None:
+        return True
+    return any(name in _changed_tables for name in table_names)
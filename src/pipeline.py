@@ -0,0 +1,219 @@
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+try:
+    from src import instrument
+except ImportError:  # Running as a script from within src/
+    import instrument
+
+# Pipeline nodes are dicts:
+#   name: Unique node name, used for dependencies and checkpoints.
+#   run: Function taking force (bool) that does the node's work. Raising or returning
+#       False fails the node, and every node depending on it is blocked.
+#   deps: Names of the nodes that must finish first.
+#   key: Optional function returning a string describing the node's inputs, e.g. a file
+#       hash; a changed key invalidates the node's checkpoint.
+
+# Node completion records, kept between runs so --resume knows what already succeeded
+CHECKPOINT_FILE = ".pipeline_checkpoints.json"
+
+# Nodes run at once; the stages mostly wait on the database and the render processes
+GRAPH_WORKERS = 4
+
+DONE = "done"
+SKIPPED = "skipped"
+FAILED = "failed"
+BLOCKED = "blocked"
+
+
+def read_checkpoints(path=CHECKPOINT_FILE):
+    """
+    Load the checkpoints of earlier runs.
+    Returns:
+        dict: Node name to its checkpoint; empty if there are none yet.
+    """
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def write_checkpoints(entries, path=CHECKPOINT_FILE):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(entries, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def sort_nodes(nodes):
+    """
+    Order nodes so every node comes after its dependencies.
+    Args:
+        nodes (list): Pipeline node dicts.
+    Returns:
+        list: The nodes in dependency order.
+    Raises:
+        ValueError: If a dependency is not a node or the dependencies form a cycle.
+    """
+    by_name = {node["name"]: node for node in nodes}
+    ordered = []
+    state = {}
+
+    def visit(name, path):
+        if state.get(name) == DONE:
+            return
+        if state.get(name) == "visiting":
+            raise ValueError(f"Pipeline dependency cycle: {' -> '.join(path + [name])}")
+        if name not in by_name:
+            raise ValueError(f"Unknown pipeline node {name!r} required by {path[-1]!r}")
+        state[name] = "visiting"
+        for dep in by_name[name].get("deps", []):
+            visit(dep, path + [name])
+        state[name] = DONE
+        ordered.append(by_name[name])
+
+    for node in nodes:
+        visit(node["name"], [])
+    return ordered
+
+
+def is_current(node, checkpoints, key):
+    """
+    Check whether a node's checkpoint still holds: it succeeded, its key is unchanged and
+    none of its dependencies completed again since.
+    """
+    entry = checkpoints.get(node["name"])
+    if entry is None or entry.get("status") != DONE or entry.get("key") != key:
+        return False
+    return all(
+        dep in checkpoints and entry["deps"].get(dep) == checkpoints[dep].get("completed_at")
+        for dep in node.get("deps", [])
+    )
+
+
+def run_graph(nodes, workers=GRAPH_WORKERS, force=False, resume=False, checkpoint_path=CHECKPOINT_FILE):
+    """
+    Run pipeline nodes as soon as their dependencies succeed, independent ones side by
+    side on a thread pool. Every finished node's checkpoint is written straight away, so
+    an interrupted run keeps the work it completed.
+    A node that failed or was blocked last time always reruns with force set, as do the
+    nodes depending on one that did, so a step skipping unchanged inputs cannot record a
+    failed step as done.
+    Args:
+        nodes (list): Pipeline node dicts.
+        workers (int): Nodes run at once.
+        force (bool): Passed to every node's run function.
+        resume (bool): Skip nodes whose checkpoint is current; the rest, i.e. failed or
+            invalidated nodes and their dependents, rerun with force set.
+        checkpoint_path (str): JSON file holding the checkpoints.
+    Returns:
+        dict: Node name to DONE, SKIPPED, FAILED or BLOCKED.
+    """
+    nodes = sort_nodes(nodes)
+    checkpoints = read_checkpoints(checkpoint_path)
+    results = {}
+    forced = set()
+    waiting = list(nodes)
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=max(workers or 1, 1)) as pool:
+        while waiting or running:
+            for node in list(waiting):
+                deps = node.get("deps", [])
+                if any(results.get(dep) in (FAILED, BLOCKED) for dep in deps):
+                    waiting.remove(node)
+                    results[node["name"]] = BLOCKED
+                    # Recorded so the next run retries it, even without resume
+                    checkpoints[node["name"]] = {"status": BLOCKED, "key": None, "completed_at": None, "deps": {}}
+                    write_checkpoints(checkpoints, checkpoint_path)
+                    print(f"Skipping {node['name']}, a step it depends on failed.")
+                    continue
+                if not all(results.get(dep) in (DONE, SKIPPED) for dep in deps):
+                    continue
+                waiting.remove(node)
+                key = _node_key(node)
+                if resume and is_current(node, checkpoints, key):
+                    results[node["name"]] = SKIPPED
+                    print(f"Skipping {node['name']}, its checkpoint is current.")
+                    continue
+                retry = checkpoints.get(node["name"], {}).get("status") in (FAILED, BLOCKED)
+                if retry or any(dep in forced for dep in deps):
+                    forced.add(node["name"])
+                node_force = force or resume or node["name"] in forced
+                running[pool.submit(_run_node, node, node_force)] = (node, key)
+
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                node, key = running.pop(future)
+                ok, seconds = future.result()
+                results[node["name"]] = DONE if ok else FAILED
+                checkpoints[node["name"]] = {
+                    "status": results[node["name"]],
+                    "key": key,
+                    "completed_at": time.time(),
+                    "seconds": round(seconds, 3),
+                    "deps": {dep: checkpoints.get(dep, {}).get("completed_at") for dep in node.get("deps", [])},
+                }
+                write_checkpoints(checkpoints, checkpoint_path)
+    return results
+
+
+def record_failures(names, checkpoint_path=CHECKPOINT_FILE):
+    """
+    Mark nodes as failed after run_graph finished, e.g. when the database writes they
+    deferred to the end of the run failed, so the next run retries them.
+    Args:
+        names (list): Node names.
+        checkpoint_path (str): JSON file holding the checkpoints.
+    """
+    checkpoints = read_checkpoints(checkpoint_path)
+    for name in names:
+        checkpoints.setdefault(name, {"key": None, "completed_at": None, "deps": {}})["status"] = FAILED
+    write_checkpoints(checkpoints, checkpoint_path)
+
+
+def _node_key(node):
+    if not node.get("key"):
+        return None
+    try:
+        return node["key"]()
+    except Exception as e:
+        # An unknown key never matches a checkpoint, so the node reruns and reports the error
+        print(f"Error describing the inputs of {node['name']}: {e}")
+        return None
+
+
+def _run_node(node, force):
+    """
+    Run one node and report whether it succeeded.
+    Returns:
+        tuple: Success flag and seconds taken.
+    """
+    start = time.perf_counter()
+    try:
+        with instrument.measure(f"step {node['name']}") as record:
+            ok = node["run"](force) is not False
+            if record is not None:
+                record["ok"] = ok
+        if not ok:
+            print(f"Pipeline step {node['name']} failed.")
+    except Exception as e:
+        print(f"Error in pipeline step {node['name']}: {e}")
+        ok = False
+    return ok, time.perf_counter() - start
+
+
+def summary(results):
+    """
+    One-line description of how many nodes finished in each state.
+    """
+    counts = {}
+    for status in results.values():
+        counts[status] = counts.get(status, 0) + 1
+    return ", ".join(f"{counts[status]} {status}" for status in [DONE, SKIPPED, FAILED, BLOCKED] if status in counts)
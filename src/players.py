@@ -0,0 +1,232 @@
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+try:
+    from src import bulk_load, db, stage_cache
+except ImportError:  # Running as a script from within src/
+    import bulk_load
+    import db
+    import stage_cache
+
+# Player dimension: one row per player with a surrogate id that never changes once assigned
+PLAYERS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS players (
+        player_id INT PRIMARY KEY,
+        player VARCHAR(100),
+        name_key VARCHAR(100) UNIQUE
+    );
+"""
+
+# Other spellings of a player, as normalized name keys mapped to the key of the name they
+# belong to, e.g. {"nico lodeiro": "nicolas lodeiro"}
+PLAYER_ALIASES = {}
+
+# Punctuation that differs between spellings of the same name
+NAME_PUNCTUATION = re.compile(r"[.'’`\-]")
+
+
+def normalize_name(name):
+    """
+    Reduce a player name to the key spellings of the same name share: accents are
+    removed, case is folded, hyphens become spaces, dots and apostrophes are dropped and
+    whitespace is collapsed.
+    Args:
+        name (str): Player name as it appears in a source file.
+    Returns:
+        str: Normalized name key, e.g. "denis bouanga" for "Dénis  Bouanga".
+    """
+    name = unicodedata.normalize("NFKD", str(name))
+    name = "".join(char for char in name if not unicodedata.combining(char))
+    name = NAME_PUNCTUATION.sub(lambda match: " " if match.group() == "-" else "", name)
+    return " ".join(name.casefold().split())
+
+
+class PlayerIndex:
+    """
+    In-memory view of the player dimension: a dictionary from normalized name key to
+    player_id, so resolving a name is one lookup. Names not seen before get the next id
+    and are kept as new rows until save_player_index writes them.
+    """
+
+    def __init__(self, players_df=None, aliases=None):
+        """
+        Args:
+            players_df (pd.DataFrame): Stored player_id, player and name_key rows, if any.
+            aliases (dict): Name key aliases; PLAYER_ALIASES by default.
+        """
+        self.aliases = PLAYER_ALIASES if aliases is None else aliases
+        self._ids = {}
+        self._names = {}
+        self._new = []
+        if players_df is not None:
+            for player_id, player, name_key in players_df[["player_id", "player", "name_key"]].itertuples(index=False):
+                self._ids.setdefault(name_key, int(player_id))
+                self._names.setdefault(int(player_id), player)
+        self._next_id = max(self._names, default=0) + 1
+
+    def __len__(self):
+        return len(self._names)
+
+    def name_key(self, name):
+        key = normalize_name(name)
+        return self.aliases.get(key, key)
+
+    def lookup(self, name):
+        """
+        Returns:
+            int or None: The player's id, or None if the name is not in the index.
+        """
+        return self._ids.get(self.name_key(name))
+
+    def player_id(self, name):
+        """
+        Resolve one name, adding the player to the index if the name is new.
+        Returns:
+            int: The player's id.
+        """
+        key = self.name_key(name)
+        player_id = self._ids.get(key)
+        if player_id is None:
+            player_id = self._next_id
+            self._next_id += 1
+            self._ids[key] = player_id
+            self._names[player_id] = name
+            self._new.append((player_id, name, key))
+        return player_id
+
+    def adopt(self, player_id, name):
+        """
+        Add a player under an id assigned elsewhere, unless the name is already indexed.
+        The player is saved as a new row.
+        """
+        key = self.name_key(name)
+        if key in self._ids:
+            return
+        self._ids[key] = int(player_id)
+        self._names[int(player_id)] = name
+        self._new.append((int(player_id), name, key))
+        self._next_id = max(self._next_id, int(player_id) + 1)
+
+    def resolve(self, names):
+        """
+        Resolve a column of names to player ids. Each distinct name is normalized and looked
+        up once, so the cost grows with the number of players rather than rows.
+        Args:
+            names (pd.Series): Player names.
+        Returns:
+            np.ndarray: int64 player id per name, or float64 with NaN for missing names.
+        """
+        codes, uniques = pd.factorize(names)
+        ids = np.array([self.player_id(name) for name in uniques], dtype="int64")
+        # factorize codes a missing name as -1, which would index the last player
+        missing = codes == -1
+        if not missing.any():
+            return ids[codes]
+        resolved = ids[codes].astype("float64")
+        resolved[missing] = np.nan
+        return resolved
+
+    def canonical_names(self, names):
+        """
+        Replace every spelling of a player's name with the name stored for the player.
+        Args:
+            names (pd.Series): Player names.
+        Returns:
+            pd.Series: Names with the same index; missing names stay missing.
+        """
+        codes, uniques = pd.factorize(names)
+        canonical = np.array([self._names[self.player_id(name)] for name in uniques], dtype=object)
+        resolved = canonical[codes]
+        resolved[codes == -1] = np.nan
+        return pd.Series(resolved, index=names.index, name=names.name)
+
+    def new_players(self):
+        """
+        Returns:
+            pd.DataFrame: Players added since the index was loaded.
+        """
+        return pd.DataFrame(self._new, columns=["player_id", "player", "name_key"])
+
+    def to_frame(self):
+        """
+        Returns:
+            pd.DataFrame: Every player in the index, in id order.
+        """
+        names = dict(self._names)
+        keys = {}
+        for key, player_id in self._ids.items():
+            keys.setdefault(player_id, key)
+        ids = sorted(names)
+        return pd.DataFrame({
+            "player_id": ids,
+            "player": [names[player_id] for player_id in ids],
+            "name_key": [keys[player_id] for player_id in ids],
+        })
+
+
+def load_player_index(aliases=None):
+    """
+    Load the player dimension. The first time it is used on a database that predates it,
+    the ids already in player_performance_metrics are adopted so they do not change.
+    Offline runs only read the stage cache and never connect to the database.
+    Args:
+        aliases (dict): Name key aliases; PLAYER_ALIASES by default.
+    Returns:
+        PlayerIndex: Index of the stored players, empty if there are none yet.
+    """
+    try:
+        players_df = stage_cache.read_frame_or_sql("players", "SELECT player_id, player, name_key FROM players")
+        return PlayerIndex(players_df, aliases)
+    except Exception:
+        pass
+
+    index = PlayerIndex(aliases=aliases)
+    try:
+        stored_df = stage_cache.read_frame_or_sql(
+            "player_performance_metrics",
+            "SELECT DISTINCT player_id, player FROM player_performance_metrics ORDER BY player_id",
+            columns=["player_id", "player"],
+        ).drop_duplicates().sort_values("player_id")
+        for player_id, player in stored_df.itertuples(index=False):
+            index.adopt(player_id, player)
+    except Exception:
+        pass
+    return index
+
+
+def write_players(df):
+    """
+    Replace the contents of the players table.
+    Args:
+        df (pd.DataFrame): Every player, as returned by PlayerIndex.to_frame.
+    """
+    with db.get_engine().begin() as conn:
+        bulk_load.copy_dataframe(conn, df, "players", PLAYERS_SCHEMA)
+
+
+def save_player_index(index):
+    """
+    Store the players added to the index. Only the new rows are inserted, so existing ids
+    are never rewritten. With the stage cache enabled the whole dimension goes to the
+    cache and is written to the database when the run is published.
+    Args:
+        index (PlayerIndex): Index returned by load_player_index.
+    Returns:
+        int: Number of players added.
+    """
+    new_df = index.new_players()
+    if new_df.empty:
+        return 0
+
+    if stage_cache.is_enabled():
+        stage_cache.write_frame("players", index.to_frame(), publish=write_players)
+    else:
+        with db.get_engine().begin() as conn:
+            db.execute_ddl(conn, PLAYERS_SCHEMA)
+            bulk_load.copy_rows(conn, new_df, "players", bulk_load.parse_schema_columns(PLAYERS_SCHEMA))
+    index._new = []
+    print(f"Added {len(new_df)} players to the player index.")
+    return len(new_df)
@@ -0,0 +1,257 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+try:
+    from src import instrument
+except ImportError:  # Running as a script from within src/
+    import instrument
+
+# Chart jobs are dicts:
+#   name: Label used in timings and errors.
+#   render: Module-level function drawing the chart on a new pyplot figure from data.
+#   data: Dict of NumPy arrays and scalars, which pickle far smaller than DataFrames.
+#   path: Output file; its extension is replaced by the configured format.
+
+FORMATS = ["png", "svg"]
+DEFAULT_DPI = 300
+PREVIEW_DPI = 72
+
+# Sidecar file in each output folder mapping chart file names to the key they were rendered from
+RENDER_MANIFEST = ".render_manifest.json"
+
+_settings = {"workers": 1, "fmt": "png", "dpi": DEFAULT_DPI, "use_cache": True}
+_pool = None
+_pool_workers = 0
+
+# Pipeline steps render from several threads. pyplot is not thread safe, so in-process
+# renders take turns, and manifest updates are merged under a lock so none are lost;
+# charts sent to the process pool render side by side
+_pyplot_lock = threading.Lock()
+_manifest_lock = threading.Lock()
+_pool_lock = threading.Lock()
+
+
+def configure(workers=None, fmt="png", dpi=DEFAULT_DPI, use_cache=True):
+    """
+    Set how charts are rendered for the rest of the run.
+    Args:
+        workers (int): Render processes; None uses one per CPU, 1 renders in this process.
+        fmt (str): Output format, "png" or "svg".
+        dpi (int): Resolution of raster output, e.g. PREVIEW_DPI for quick previews.
+        use_cache (bool): Skip charts whose inputs match the render manifest.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown chart format {fmt!r}, expected one of {FORMATS}")
+    _settings.update(workers=workers or os.cpu_count() or 1, fmt=fmt, dpi=dpi, use_cache=use_cache)
+
+
+def settings():
+    """
+    Returns:
+        dict: Copy of the settings from configure: workers, fmt, dpi and use_cache.
+    """
+    return dict(_settings)
+
+
+def output_path(job, fmt):
+    return f"{os.path.splitext(job['path'])[0]}.{fmt}"
+
+
+def job_key(job, fmt, dpi):
+    """
+    Hash everything a chart depends on: the render function, its input arrays and
+    parameters, the format and the dpi.
+    Returns:
+        str: Hex digest.
+    """
+    digest = hashlib.sha256()
+    # Only the last module name part, so running from src/ or the root gives the same key
+    render_name = f"{job['render'].__module__.rsplit('.', 1)[-1]}.{job['render'].__qualname__}"
+    digest.update(f"{render_name}|{fmt}|{dpi}".encode())
+    for name in sorted(job["data"]):
+        value = job["data"][name]
+        digest.update(name.encode())
+        if isinstance(value, np.ndarray):
+            digest.update(f"{value.dtype.str}{value.shape}".encode())
+            digest.update(np.ascontiguousarray(value).tobytes())
+        else:
+            digest.update(repr(value).encode())
+    return digest.hexdigest()
+
+
+def read_render_manifest(folder):
+    """
+    Load the render manifest of an output folder.
+    Returns:
+        dict: Chart file name to render key; empty if there is no manifest yet.
+    """
+    try:
+        with open(os.path.join(folder, RENDER_MANIFEST)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def write_render_manifest(folder, entries):
+    os.makedirs(folder, exist_ok=True)
+    tmp_path = os.path.join(folder, RENDER_MANIFEST + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(entries, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, os.path.join(folder, RENDER_MANIFEST))
+
+
+def _use_agg():
+    import matplotlib
+
+    matplotlib.use("Agg")
+
+
+def _render_job(job, fmt, dpi):
+    """
+    Render one chart job and save it. Runs in a worker process or in-process.
+    Returns:
+        tuple: Saved path and render seconds.
+    """
+    import matplotlib.pyplot as plt
+
+    start = time.perf_counter()
+    path = output_path(job, fmt)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    try:
+        job["render"](job["data"])
+        plt.savefig(path, dpi=dpi)
+    finally:
+        plt.close("all")
+    return path, time.perf_counter() - start
+
+
+def _render_in_process(job, fmt, dpi):
+    with _pyplot_lock:
+        _use_agg()
+        return _render_job(job, fmt, dpi)
+
+
+def _process_context():
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(method)
+
+
+def _get_pool(workers):
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            _shutdown_pool()
+            # Charts are rendered from worker threads, so the pool must not fork them
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=_process_context(), initializer=_use_agg)
+            _pool_workers = workers
+        return _pool
+
+
+def render_charts(jobs):
+    """
+    Render independent chart jobs, on the shared process pool when more than one worker
+    is configured, and print each chart's render time. Charts whose file exists and whose
+    key matches the output folder's render manifest are skipped. A failing chart does not
+    stop the others.
+    Args:
+        jobs (list): Chart job dicts; None entries, e.g. from failed preparation, are skipped.
+    Returns:
+        dict: Render seconds per saved path; skipped charts are not included.
+    """
+    return _render_charts(jobs)[0]
+
+
+def render_all(jobs):
+    """
+    Render chart jobs like render_charts and report whether every chart made it.
+    Args:
+        jobs (list): Chart job dicts; None entries count as charts whose preparation failed.
+    Returns:
+        bool: True if every job was prepared and then rendered or skipped as unchanged.
+    """
+    failed = _render_charts(jobs)[1]
+    return not failed and all(job is not None for job in jobs)
+
+
+@instrument.stage("render.render_charts")
+def _render_charts(jobs):
+    """
+    Returns:
+        tuple: Render seconds per saved path, and the names of the charts that failed.
+    """
+    fmt, dpi = _settings["fmt"], _settings["dpi"]
+    manifests = {}
+    pending = []
+    with _manifest_lock:
+        for job in jobs:
+            if job is None:
+                continue
+            path = output_path(job, fmt)
+            folder, file_name = os.path.split(path)
+            folder = folder or "."
+            manifest = manifests.setdefault(folder, read_render_manifest(folder))
+            key = job_key(job, fmt, dpi)
+            if _settings["use_cache"] and manifest.get(file_name) == key and os.path.exists(path):
+                print(f"Skipping {job['name']}, its inputs are unchanged: {path}")
+                continue
+            pending.append((job, folder, file_name, key))
+
+    workers = min(_settings["workers"], len(pending))
+    start = time.perf_counter()
+    if workers > 1:
+        pool = _get_pool(_settings["workers"])
+        results = [pool.submit(_render_job, job, fmt, dpi).result for job, *_ in pending]
+    else:
+        results = [lambda job=job: _render_in_process(job, fmt, dpi) for job, *_ in pending]
+
+    timings = {}
+    failed = []
+    # Chart file name to its new key, or None to forget it, per folder
+    updates = {}
+    for (job, folder, file_name, key), result in zip(pending, results):
+        try:
+            path, seconds = result()
+            timings[path] = seconds
+            updates.setdefault(folder, {})[file_name] = key
+            print(f"Rendered {job['name']} in {seconds:.2f}s: {path}")
+        except Exception as e:
+            print(f"Error rendering {job['name']}: {e}")
+            failed.append(job["name"])
+            updates.setdefault(folder, {})[file_name] = None
+    if len(pending) > 1:
+        print(f"Rendered {len(timings)} charts in {time.perf_counter() - start:.2f}s on {max(workers, 1)} processes.\n")
+
+    with _manifest_lock:
+        # Re-read, as other threads may have recorded their charts in the same folder meanwhile
+        for folder, changes in updates.items():
+            entries = read_render_manifest(folder)
+            for file_name, key in changes.items():
+                if key is None:
+                    entries.pop(file_name, None)
+                else:
+                    entries[file_name] = key
+            write_render_manifest(folder, entries)
+    return timings, failed
+
+
+def shutdown():
+    """
+    Stop the render processes, if any were started.
+    """
+    with _pool_lock:
+        _shutdown_pool()
+
+
+def _shutdown_pool():
+    global _pool, _pool_workers
+    if _pool is not None:
+        _pool.shutdown()
+    _pool = None
+    _pool_workers = 0
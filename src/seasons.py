@@ -0,0 +1,160 @@
+try:
+    from src import stage_cache
+except ImportError:  # Running as a script from within src/
+    import stage_cache
+
+# Tables stored as one partition per season. Loads replace only the seasons they contain,
+# so history from earlier loads is kept, and the season-leading indexes in
+# db.TABLE_INDEXES let a season-scoped read skip the other seasons' rows.
+# Tables in SEASON_DATE_COLUMNS are partitioned the same way by the year of their date.
+SEASON_COLUMNS = {
+    "xg": "season",
+    "goals_added": "season",
+    "xp": "season",
+    "player_performance_metrics": "season",
+}
+
+# Tables without a season column, whose season is the calendar year of a date column
+SEASON_DATE_COLUMNS = {"xgoals_games": "date"}
+
+# Season argument of the analysis functions for every season at once
+ALL = "all"
+
+
+def normalize(seasons):
+    """
+    Turn a season, or a list of seasons, into the strings they are stored as.
+    Args:
+        seasons (int, str or list): E.g. 2024, "2024" or [2023, 2024]; None for no filter.
+    Returns:
+        list or None: Sorted distinct season strings, or None for every season.
+    """
+    if seasons is None or (isinstance(seasons, str) and seasons == ALL):
+        return None
+    if not isinstance(seasons, (list, tuple, set)):
+        seasons = [seasons]
+    return sorted({str(season).strip() for season in seasons})
+
+
+def _quote(value):
+    return "'" + value.replace("'", "''") + "'"
+
+
+def season_condition(table_name, seasons):
+    """
+    SQL condition selecting the given seasons of a table.
+    Args:
+        table_name (str): Key of SEASON_COLUMNS or SEASON_DATE_COLUMNS.
+        seasons (int, str or list): Seasons to select; None for every season.
+    Returns:
+        str or None: Condition for a WHERE clause, or None to read every row.
+    """
+    seasons = normalize(seasons)
+    if seasons is None:
+        return None
+    if not seasons:
+        return "1 = 0"
+    if table_name in SEASON_COLUMNS:
+        return f"{SEASON_COLUMNS[table_name]} IN ({', '.join(_quote(season) for season in seasons)})"
+    column = SEASON_DATE_COLUMNS[table_name]
+    # A date range per season, so the index leading on the date column applies. The end is
+    # exclusive so dates stored with a time of day on December 31 are included
+    return " OR ".join(
+        f"({column} >= {_quote(f'{season}-01-01')} AND {column} < {_quote(f'{int(season) + 1}-01-01')})"
+        for season in seasons
+    )
+
+
+def filter_frame(df, table_name, seasons):
+    """
+    Keep the rows of the given seasons, for frames that were not read with season_condition,
+    such as stage cache frames holding the whole table.
+    """
+    seasons = normalize(seasons)
+    if seasons is None:
+        return df
+    return df[season_values(table_name, df).isin(seasons).to_numpy()]
+
+
+def season_values(table_name, df):
+    """
+    Season of every row of a frame, from its season column or the year of its date column.
+    Returns:
+        pd.Series: Season strings, missing where the season or date is missing.
+    """
+    if table_name in SEASON_COLUMNS:
+        values = df[SEASON_COLUMNS[table_name]]
+        return values.astype(str).str.strip().where(values.notna())
+    values = df[SEASON_DATE_COLUMNS[table_name]]
+    return values.astype(str).str[:4].where(values.notna())
+
+
+def is_partitioned(table_name):
+    """
+    Whether loads of a table replace only the seasons they contain.
+    """
+    return table_name in SEASON_COLUMNS or table_name in SEASON_DATE_COLUMNS
+
+
+def read_seasons(table_name, seasons=None, columns=None):
+    """
+    Read the given seasons of a table, from the stage cache or the database.
+    Args:
+        table_name (str): Key of SEASON_COLUMNS or SEASON_DATE_COLUMNS.
+        seasons (int, str or list): Seasons to read; None for every season.
+        columns (list): Columns to read, all by default. The season column is added when
+            seasons are given, as cached frames are filtered on it.
+    Returns:
+        pd.DataFrame: Rows of the given seasons.
+    """
+    condition = season_condition(table_name, seasons)
+    if columns is not None and condition is not None:
+        season_column = SEASON_COLUMNS.get(table_name) or SEASON_DATE_COLUMNS[table_name]
+        if season_column not in columns:
+            columns = list(columns) + [season_column]
+    query = f"SELECT {', '.join(columns) if columns else '*'} FROM {table_name}"
+    if condition is not None:
+        query += f" WHERE {condition}"
+    df = stage_cache.read_frame_or_sql(table_name, query, columns=columns)
+    return filter_frame(df, table_name, seasons)
+
+
+def partition_values(table_name, df):
+    """
+    Seasons present in a frame about to be loaded into a season-partitioned table, from
+    its season column or, for dated games, the years of its dates.
+    Returns:
+        list or None: Season strings, or None if the table is not partitioned by season.
+    """
+    column = SEASON_COLUMNS.get(table_name) or SEASON_DATE_COLUMNS.get(table_name)
+    if column is None or column not in df.columns:
+        return None
+    return normalize(season_values(table_name, df).dropna().unique().tolist())
+
+
+def stored_seasons(table_name="player_performance_metrics"):
+    """
+    Seasons stored in a season-partitioned table, or with games in a table of dated games.
+    Returns:
+        list: Season strings, oldest first; empty if the table cannot be read.
+    """
+    column = SEASON_COLUMNS.get(table_name) or SEASON_DATE_COLUMNS[table_name]
+    try:
+        df = stage_cache.read_frame_or_sql(
+            table_name, f"SELECT DISTINCT {column} FROM {table_name}", columns=[column]
+        )
+    except Exception:
+        return []
+    return normalize(season_values(table_name, df).dropna().unique().tolist())
+
+
+def label(seasons):
+    """
+    Describe a season selection for chart titles, e.g. "2024 season" or "all seasons".
+    """
+    seasons = normalize(seasons)
+    if seasons is None:
+        return "all seasons"
+    if len(seasons) == 1:
+        return f"{seasons[0]} season"
+    return f"{seasons[0]}-{seasons[-1]} seasons"
@@ -0,0 +1,152 @@
+import os
+
+try:
+    from src import db
+except ImportError:  # Running as a script from within src/
+    import db
+
+# Folder holding one Arrow IPC file per table; None while the cache is disabled
+_cache_dir = None
+_offline = False
+
+# Tables written to the cache but not yet to the database, with the function that writes them
+_pending_publish = {}
+
+
+def enable(cache_dir="cache", offline=False):
+    """
+    Keep each stage's output in a local Arrow IPC cache and defer database writes until
+    publish_all is called at the end of the run.
+    Args:
+        cache_dir (str): Folder for the cached tables.
+        offline (bool): Never touch the database; stages only read and write the cache.
+    """
+    global _cache_dir, _offline
+    os.makedirs(cache_dir, exist_ok=True)
+    _cache_dir = cache_dir
+    _offline = offline
+
+
+def disable():
+    """
+    Turn the cache off and forget any unpublished tables.
+    """
+    global _cache_dir, _offline
+    _cache_dir = None
+    _offline = False
+    _pending_publish.clear()
+
+
+def is_enabled():
+    return _cache_dir is not None
+
+
+def is_offline():
+    return _offline
+
+
+def frame_path(name):
+    return os.path.join(_cache_dir, f"{name}.arrow")
+
+
+def write_frame(name, df, publish=None):
+    """
+    Write a stage's output to the cache as an Arrow IPC file.
+    Args:
+        name (str): Table name.
+        df (pd.DataFrame): DataFrame to cache.
+        publish (callable): Optional function taking the DataFrame that writes it to the
+            database; it is called by publish_all.
+    """
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    # Write to a temporary file and rename it so readers still mapping the old file are unaffected
+    tmp_path = frame_path(name) + ".tmp"
+    with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp_path, frame_path(name))
+
+    if publish is not None:
+        _pending_publish[name] = publish
+
+
+def read_frame(name, columns=None):
+    """
+    Read a cached table through a memory map.
+    Args:
+        name (str): Table name.
+        columns (list): Optional subset of columns to read.
+    Returns:
+        pd.DataFrame or None: Cached table, or None if the cache is disabled or has no
+        copy of the table.
+    """
+    if not is_enabled() or not os.path.exists(frame_path(name)):
+        return None
+
+    import pyarrow as pa
+
+    with pa.memory_map(frame_path(name), "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    if columns is not None:
+        table = table.select(columns)
+
+    # Decode categoricals so cached frames match what the same query returns from the database
+    decoded = pa.schema([
+        field.with_type(field.type.value_type) if pa.types.is_dictionary(field.type) else field
+        for field in table.schema
+    ])
+    return table.cast(decoded).to_pandas()
+
+
+def read_frame_or_sql(name, query, columns=None):
+    """
+    Read a table from the cache, falling back to a database query when it is not cached.
+    Args:
+        name (str): Table name.
+        query (str): Query returning the same rows and columns from the database.
+        columns (list): Columns to read from the cached table.
+    Returns:
+        pd.DataFrame: Table contents.
+    """
+    import pandas as pd
+
+    df = read_frame(name, columns)
+    if df is None:
+        if _offline:
+            raise FileNotFoundError(f"{name} is not in the stage cache and the run is offline")
+        df = pd.read_sql(query, db.get_engine())
+    return df
+
+
+def pending_tables():
+    """
+    Returns:
+        list: Names of the cached tables waiting to be written to the database.
+    """
+    return list(_pending_publish)
+
+
+def publish_all():
+    """
+    Write every cached table that is waiting on the database, in the order the stages
+    produced them. Skipped when running offline. A table whose write fails is reported
+    and does not stop the others.
+    Returns:
+        list: Names of the tables written to the database.
+    """
+    if _offline:
+        print(f"Offline run, {len(_pending_publish)} tables kept in {_cache_dir} only.")
+        return []
+
+    published = []
+    for name, publish in list(_pending_publish.items()):
+        try:
+            if publish(read_frame(name)) is not False:
+                published.append(name)
+            else:
+                print(f"Error publishing cached table {name} to the database.")
+        except Exception as e:
+            print(f"Error publishing cached table {name} to the database: {e}")
+        del _pending_publish[name]
+    return published
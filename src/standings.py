@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+
+# Columns of xgoals_games the standings are computed from
+GAME_COLUMNS = [
+    "date", "home_team", "home_goals", "away_team", "away_goals",
+    "home_xg", "away_xg", "home_xpts", "away_xpts",
+]
+
+STANDINGS_COLUMNS = [
+    "team", "played", "wins", "draws", "losses", "points", "home_points", "away_points",
+    "goals_for", "goals_against", "goal_difference", "xg_for", "xg_against", "xpts",
+]
+
+
+def _team_games(games_df):
+    """
+    Stack every game into one row per team per game: home rows first, then away rows.
+    Returns:
+        tuple: Team codes, team names, and a dict of per team-game NumPy arrays.
+    """
+    n = len(games_df)
+    codes, teams = pd.factorize(
+        np.concatenate([games_df["home_team"].to_numpy(dtype=object), games_df["away_team"].to_numpy(dtype=object)])
+    )
+
+    def stacked(own, other):
+        return np.concatenate([
+            games_df[own].to_numpy(dtype="float64"), games_df[other].to_numpy(dtype="float64")
+        ])
+
+    goals_for = stacked("home_goals", "away_goals")
+    goals_against = stacked("away_goals", "home_goals")
+    result = np.sign(goals_for - goals_against)
+    points = np.select([result > 0, result == 0], [3, 1], 0)
+    arrays = {
+        "played": np.ones(2 * n),
+        "wins": (result > 0).astype("float64"),
+        "draws": (result == 0).astype("float64"),
+        "losses": (result < 0).astype("float64"),
+        "points": points,
+        "home_points": np.where(np.arange(2 * n) < n, points, 0),
+        "away_points": np.where(np.arange(2 * n) >= n, points, 0),
+        "goals_for": goals_for,
+        "goals_against": goals_against,
+        "xg_for": stacked("home_xg", "away_xg") if "home_xg" in games_df else np.zeros(2 * n),
+        "xg_against": stacked("away_xg", "home_xg") if "home_xg" in games_df else np.zeros(2 * n),
+        "xpts": stacked("home_xpts", "away_xpts") if "home_xpts" in games_df else np.zeros(2 * n),
+    }
+    return codes, teams, arrays
+
+
+def _finish(standings):
+    counts = ["played", "wins", "draws", "losses", "points", "home_points", "away_points", "goals_for", "goals_against"]
+    standings[counts] = standings[counts].astype("int64")
+    standings["goal_difference"] = standings["goals_for"] - standings["goals_against"]
+    standings[["xg_for", "xg_against", "xpts"]] = standings[["xg_for", "xg_against", "xpts"]].round(2)
+    return standings
+
+
+def compute_standings(games_df, as_of=None):
+    """
+    Build the league table from game results in one vectorized pass: every game becomes a
+    home and an away team-game row, and each stat is summed per team with np.bincount.
+    Teams with only home or only away games are included.
+    Args:
+        games_df (pd.DataFrame): Games with home_team, away_team, home_goals and away_goals,
+            plus optional home_xg/away_xg, home_xpts/away_xpts and date columns.
+        as_of (str or datetime): Only count games played on or before this date.
+    Returns:
+        pd.DataFrame: One row per team with played, W/D/L, points (home, away and total),
+        goals and xG for and against, goal difference and expected points, ranked by
+        points, goal difference and goals scored.
+    """
+    if as_of is not None:
+        games_df = games_df[pd.to_datetime(games_df["date"]) <= pd.Timestamp(as_of)]
+
+    codes, teams, arrays = _team_games(games_df)
+    standings = pd.DataFrame({
+        name: np.bincount(codes, weights=values, minlength=len(teams)) for name, values in arrays.items()
+    })
+    standings.insert(0, "team", teams)
+    standings = _finish(standings)[STANDINGS_COLUMNS]
+    return standings.sort_values(
+        ["points", "goal_difference", "goals_for", "team"], ascending=[False, False, False, True]
+    ).reset_index(drop=True)
+
+
+def standings_by_date(games_df):
+    """
+    Running standings after every matchday, computed with one sort and a grouped cumulative
+    sum rather than one table per date.
+    Args:
+        games_df (pd.DataFrame): Games as for compute_standings, with a date column.
+    Returns:
+        pd.DataFrame: One row per team per date it played, with date, team and the
+        compute_standings totals up to and including that date.
+    """
+    codes, teams, arrays = _team_games(games_df)
+    dates = pd.to_datetime(np.concatenate([games_df["date"].to_numpy()] * 2))
+    team_games = pd.DataFrame({"date": dates, "team": teams[codes], **arrays})
+
+    # Sum multiple games on one date first, then accumulate per team in date order
+    daily = team_games.groupby(["team", "date"], sort=True).sum()
+    running = daily.groupby(level="team").cumsum().reset_index()
+    running = _finish(running)
+    return running[["date"] + STANDINGS_COLUMNS].sort_values(["date", "points"], ascending=[True, False]).reset_index(drop=True)
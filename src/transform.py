@@ -1,79 +1,325 @@
 import pandas as pd
-from sqlalchemy import create_engine
-from dotenv import load_dotenv
-import os
 import numpy as np
 
-# Load environment variables
-load_dotenv()
+from sqlalchemy import text
+
+try:
+    from src import bulk_load, db, ingestion, instrument, manifest, players, seasons, stage_cache
+except ImportError:  # Running as a script from within src/
+    import bulk_load
+    import db
+    import ingestion
+    import instrument
+    import manifest
+    import players
+    import seasons
+    import stage_cache
+
+# Ingested tables that feed player_performance_metrics
+SOURCE_TABLES = ["goals_added", "xg", "xp"]
+
+# Columns identifying one player's season with one team
+MERGE_KEYS = ["player", "team", "season"]
+
+TEXT_TYPES = {"VARCHAR", "TEXT", "CHAR"}
+
+# Numeric columns of the merged table that are not counting stats, so get no per 90 rate:
+# ids and the row hash, minutes themselves, and rates, percentages and per-pass averages.
+# The source row ids are excluded through SOURCE_ID_COLUMNS
+PER_90_EXCLUDED = {
+    "player_id", "source_hash", "season", "minutes",
+    "pass_percentage", "xpass_percentage", "score", "per100", "distance", "vertical",
+}
+
+# Efficiency metrics as (metric, numerator, denominator) columns
+EFFICIENCY_RATIOS = [
+    ("goal_conversion_rate", "goals", "shots"),             # Goals scored per shot taken
+    ("shot_accuracy", "shots_on_target", "shots"),          # Shots on target per shot
+    ("key_pass_to_assist_ratio", "assists", "key_passes"),  # Assists per key pass
+    ("xg_conversion_rate", "goals", "xg"),                  # Goals per expected goal
+    ("xa_conversion_rate", "assists", "xa"),                # Assists per expected assist
+]
+
+# Row ids of the source tables, which are renumbered on every load and so left out of source_hash
+SOURCE_ID_COLUMNS = ["id", "id_x", "id_y"]
+
+
+@instrument.stage()
+def create_player_performance_metrics(method="pandas"):
+    """
+    Combine goalsadded, xGoals, and xPass into a single table: player_performance_metrics.
+    Args:
+        method (str): "pandas" merges the tables in memory, "sql" builds the table inside
+            the database with build_merge_sql so no rows are fetched.
+    Returns:
+        bool: True if the table was built.
+    """
+    if method == "sql":
+        if stage_cache.is_enabled():
+            # The source tables may only exist in the cache until the end of the run
+            print("Stage cache enabled, merging in pandas instead of SQL.")
+        else:
+            return create_player_performance_metrics_in_database()
+    try:
+        player_index = players.load_player_index()
+        merged_df = merge_player_sources(player_index)
 
-# Database connection settings
-DB_HOST = os.getenv("DB_HOST")
-DB_PORT = os.getenv("DB_PORT")
-DB_NAME = os.getenv("DB_NAME")
-DB_USER = os.getenv("DB_USER")
-DB_PASSWORD = os.getenv("DB_PASSWORD")
+        # Look up each player's stable ID, adding new players to the player index
+        merged_df = assign_player_ids(merged_df, player_index)
+        players.save_player_index(player_index)
 
-# Create SQLAlchemy engine
-engine = create_engine(f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}")
+        # Save the merged table into PostgreSQL
+        instrument.add_rows(rows_out=len(merged_df))
+        print("Saving combined player performance metrics to the database...")
+        if not save_to_database(merged_df, "player_performance_metrics"):
+            return False
+        print("Player performance metrics table created successfully.\n")
+        return True
+    except Exception as e:
+        print(f"Error creating player_performance_metrics: {e}")
+        return False
 
+@instrument.stage()
+def merge_player_sources(player_index=None, season_scope=None):
+    """
+    Fetch goals_added, xg and xp and outer merge them on player, team and season. Player
+    names are resolved through the player index first, so every spelling of a name merges
+    as the same player.
+    Args:
+        player_index (players.PlayerIndex): Index to resolve names with; loaded if not given.
+        season_scope (list): Only fetch and merge these seasons; every season when None.
+    Returns:
+        pd.DataFrame: One row per player, team and season, missing stats filled with 0.
+    """
+    if player_index is None:
+        player_index = players.load_player_index()
+
+    print("Fetching data from the database...")
+    # Fetch data from the database; the season filter uses the season-leading indexes
+    goalsadded_df = seasons.read_seasons("goals_added", season_scope)
+    xgoals_df = seasons.read_seasons("xg", season_scope)
+    xpass_df = seasons.read_seasons("xp", season_scope)
+
+    for df in [goalsadded_df, xgoals_df, xpass_df]:
+        df["player"] = df["player"].str.strip()
+        df["team"] = df["team"].str.strip()
+        df["season"] = df["season"].astype(str).str.strip()
+        df["player"] = player_index.canonical_names(df["player"])
+
+    # Deduplicate after stripping so the keys are unique, as the upsert key requires
+    goalsadded_df = goalsadded_df.drop_duplicates(subset=MERGE_KEYS)
+    xgoals_df = xgoals_df.drop_duplicates(subset=MERGE_KEYS)
+    xpass_df = xpass_df.drop_duplicates(subset=MERGE_KEYS)
+
+    print("Merging datasets...")
+    # Merge datasets on player, team, and season
+    merged_df = (
+        goalsadded_df.merge(xgoals_df, on=MERGE_KEYS, how="outer")
+        .merge(xpass_df, on=MERGE_KEYS, how="outer")
+    )
+
+    # Fill NaN values with 0 for easier analysis
+    merged_df = merged_df.fillna(0)
+
+    if "Position" in merged_df.columns:
+        merged_df = merged_df.drop(columns=["Position"])
 
-def create_player_performance_metrics():
+    # Fingerprint each merged row so incremental runs can tell which rows changed
+    hashed = merged_df.drop(columns=[col for col in SOURCE_ID_COLUMNS if col in merged_df.columns])
+    merged_df["source_hash"] = ingestion.row_digests(hashed).to_numpy().view("int64")
+    return merged_df
+
+
+def read_stored_hashes(table_name="player_performance_metrics", season_scope=None):
     """
-    Combine goalsadded, xGoals, and xPass into a single table: player_performance_metrics.
+    Fetch the key and source_hash of every row already in the table.
+    Args:
+        season_scope (list): Only fetch the rows of these seasons; every season when None.
+    Returns:
+        pd.DataFrame or None: Stored rows, or None if the table does not exist yet or was
+        built without source hashes.
     """
+    query = f"SELECT {', '.join(MERGE_KEYS)}, source_hash FROM {table_name}"
+    if season_scope is not None:
+        query += f" WHERE {seasons.season_condition('player_performance_metrics', season_scope)}"
     try:
-        print("Fetching data from the database...")
-        # Fetch data from the database
-        goalsadded_query = "SELECT * FROM goals_added"
-        xgoals_query = "SELECT * FROM xg"
-        xpass_query = "SELECT * FROM xp"
-
-        goalsadded_df = pd.read_sql(goalsadded_query, engine)
-        xgoals_df = pd.read_sql(xgoals_query, engine)
-        xpass_df = pd.read_sql(xpass_query, engine)
-
-        goalsadded_df = goalsadded_df.drop_duplicates(subset=["player", "team", "season"])
-        xgoals_df = xgoals_df.drop_duplicates(subset=["player", "team", "season"])
-        xpass_df = xpass_df.drop_duplicates(subset=["player", "team", "season"])
-
-        for df in [goalsadded_df, xgoals_df, xpass_df]:
-            df["player"] = df["player"].str.strip()
-            df["team"] = df["team"].str.strip()
-            df["season"] = df["season"].astype(str).str.strip()
-
-
-        print("Merging datasets...")
-        # Merge datasets on player, team, and season
-        merged_df = (
-            goalsadded_df.merge(xgoals_df, on=["player", "team", "season"], how="outer")
-            .merge(xpass_df, on=["player", "team", "season"], how="outer")
-        )
+        return pd.read_sql(query, db.get_engine())
+    except Exception:
+        return None
 
-        # Fill NaN values with 0 for easier analysis
-        merged_df = merged_df.fillna(0)
 
-        if "Position" in merged_df.columns:
-            merged_df = merged_df.drop(columns=["Position"])
+@instrument.stage()
+def update_player_performance_metrics(table_name="player_performance_metrics", season_scope=None):
+    """
+    Incrementally refresh player_performance_metrics. Only rows whose merged source values
+    changed are recomputed and upserted on (player, team, season); rows that disappeared
+    from the sources are deleted and unchanged rows are not touched. Player ids come from
+    the player index, so existing players keep theirs.
+    Falls back to a full rebuild when the table has no stored hashes.
+    Args:
+        table_name (str): Table to update.
+        season_scope (list): Only compare the rows of these seasons, e.g. the seasons a load
+            replaced; the other seasons are neither read nor touched. Every season when None.
+    Returns:
+        bool: True if the table was updated or rebuilt.
+    """
+    stored_df = read_stored_hashes(table_name, season_scope)
+    if stored_df is None:
+        print(f"{table_name} has no stored row hashes, rebuilding it.")
+        return create_player_performance_metrics() and add_per_90_and_efficiency_metrics()
 
-        # Assign unique player IDs
-        merged_df = assign_player_ids(merged_df)
+    try:
+        player_index = players.load_player_index()
+        merged_df = merge_player_sources(player_index, season_scope)
+        stored_df["season"] = stored_df["season"].astype(str)
 
-        # Save the merged table into PostgreSQL
-        print("Saving combined player performance metrics to the database...")
-        merged_df.to_sql("player_performance_metrics", engine, if_exists="replace", index=False)
+        stored_df["source_hash"] = stored_df["source_hash"].astype("Int64")
+        keyed = merged_df[MERGE_KEYS + ["source_hash"]].merge(
+            stored_df[MERGE_KEYS + ["source_hash"]], on=MERGE_KEYS, how="left", suffixes=("", "_stored")
+        )
+        changed = keyed["source_hash"].ne(keyed["source_hash_stored"]).fillna(True)
+        changed_df = merged_df[changed.to_numpy(dtype=bool)].copy()
+
+        current = stored_df[MERGE_KEYS].merge(merged_df[MERGE_KEYS], on=MERGE_KEYS, how="left", indicator=True)
+        removed_df = current.loc[current["_merge"].eq("left_only"), MERGE_KEYS]
+
+        if changed_df.empty and removed_df.empty:
+            print(f"No player rows changed, {table_name} left as is.\n")
+            return True
+
+        changed_df = assign_player_ids(changed_df, player_index)
+        changed_df = calculate_efficiency_metrics(calculate_per_90_stats(changed_df))
+
+        # A table written before a metric was added cannot take the new columns in place
+        stored_columns = pd.read_sql(f"SELECT * FROM {table_name} WHERE 1 = 0", db.get_engine()).columns
+        if not set(changed_df.columns) <= set(stored_columns):
+            print(f"{table_name} is missing new metric columns, rebuilding it.")
+            return create_player_performance_metrics() and add_per_90_and_efficiency_metrics()
+
+        players.save_player_index(player_index)
+        instrument.add_rows(rows_in=len(merged_df), rows_out=len(changed_df))
+        print(f"Upserting {len(changed_df)} changed rows and deleting {len(removed_df)} removed rows...")
+        with db.get_engine().begin() as conn:
+            if not changed_df.empty:
+                bulk_load.upsert_rows(conn, changed_df, table_name, MERGE_KEYS)
+            if not removed_df.empty:
+                bulk_load.delete_rows(conn, removed_df, table_name)
+        print(f"{table_name} updated incrementally.\n")
+        return True
+    except Exception as e:
+        print(f"Error updating {table_name}: {e}")
+        return False
+
+def build_merge_sql(table_name="player_performance_metrics"):
+    """
+    Build a CREATE TABLE AS statement that does the pandas merge in SQL: keys are trimmed,
+    player names are replaced through the player_names lookup table written by
+    create_player_performance_metrics_in_database, each source keeps its first row per
+    player, team and season, the sources are outer joined on those keys, missing values
+    become 0 and player_id comes from the players table.
+    Source ids are left out, as they only identify rows in the source tables.
+    Args:
+        table_name (str): Table to create.
+    Returns:
+        str: SQL statement.
+    """
+    ctes = []
+    columns = []
+    seen = set(MERGE_KEYS)
+    for source in SOURCE_TABLES:
+        column_types = bulk_load.parse_schema_columns(ingestion.TABLE_SCHEMAS[source])
+        values = [col for col in column_types if col not in MERGE_KEYS]
+        ctes.append(f"""
+            {source}_rows AS (
+                SELECT * FROM (
+                    SELECT player_names.player AS player, TRIM(team) AS team, TRIM(season) AS season,
+                        {", ".join(f"{source}.{col}" for col in values)},
+                        ROW_NUMBER() OVER (
+                            PARTITION BY player_names.player_id, TRIM(team), TRIM(season) ORDER BY {source}.id
+                        ) AS row_num
+                    FROM {source} JOIN player_names ON player_names.name = TRIM({source}.player)
+                ) ranked
+                WHERE row_num = 1
+            )""")
+        for col in values:
+            if col in seen:
+                continue
+            seen.add(col)
+            fill = "'0'" if column_types[col] in TEXT_TYPES else "0"
+            columns.append(f"COALESCE({source}_rows.{col}, {fill}) AS {col}")
+
+    # A FULL OUTER JOIN chain needs COALESCEd join keys, which SQLite can only nested-loop,
+    # so join every source onto the union of their keys instead, which gives the same rows
+    keys = " UNION ".join(f"SELECT {', '.join(MERGE_KEYS)} FROM {source}_rows" for source in SOURCE_TABLES)
+    joins = [
+        f"LEFT JOIN {source}_rows ON "
+        + " AND ".join(f"{source}_rows.{key} = merge_keys.{key}" for key in MERGE_KEYS)
+        for source in SOURCE_TABLES
+    ]
+    return f"""
+        CREATE TABLE {table_name} AS
+        WITH {",".join(ctes)},
+            merge_keys AS ({keys}),
+            merged AS (
+                SELECT {", ".join([f"merge_keys.{key}" for key in MERGE_KEYS] + columns)}
+                FROM merge_keys {" ".join(joins)}
+            )
+        SELECT players.player_id, merged.*
+        FROM merged JOIN players ON players.player = merged.player
+    """
+
+
+@instrument.stage()
+def create_player_performance_metrics_in_database(table_name="player_performance_metrics"):
+    """
+    Rebuild player_performance_metrics from the source tables inside the database.
+    Args:
+        table_name (str): Table to create.
+    Returns:
+        bool: True if the table was built.
+    """
+    try:
+        # Resolve each distinct spelling once in Python; the rows themselves stay in the database
+        print("Resolving player names...")
+        player_index = players.load_player_index()
+        names_query = " UNION ".join(f"SELECT TRIM(player) AS name FROM {source}" for source in SOURCE_TABLES)
+        names = pd.read_sql(names_query, db.get_engine())["name"]
+        player_names = pd.DataFrame({
+            "name": names,
+            "player_id": player_index.resolve(names),
+            "player": player_index.canonical_names(names),
+        })
+        players.save_player_index(player_index)
+
+        print("Merging datasets in the database...")
+        with db.get_engine().begin() as conn:
+            bulk_load.copy_dataframe(conn, player_names, "player_names")
+            conn.execute(text(f"DROP TABLE IF EXISTS {table_name}"))
+            conn.execute(text(build_merge_sql(table_name)))
+            conn.execute(text("DROP TABLE player_names"))
+            db.create_indexes(conn, table_name)
         print("Player performance metrics table created successfully.\n")
+        return True
     except Exception as e:
-        print(f"Error creating player_performance_metrics: {e}")
+        print(f"Error creating {table_name} in the database: {e}")
+        return False
 
-def assign_player_ids(merged_df): 
+
+def assign_player_ids(merged_df, player_index=None):
+    """
+    Set player_id from the player index. IDs are stable across runs: a player keeps their
+    ID however many players are added, and new players are numbered after the highest one.
+    Args:
+        merged_df (pd.DataFrame): Merged player rows.
+        player_index (players.PlayerIndex): Index to resolve names with; loaded if not given.
+            New players are added to it but not saved.
+    Returns:
+        pd.DataFrame: The rows with player_id as the first column.
+    """
     print("Assigning unique player IDs...")
-    # Assign unique player IDs using groupby and ngroup
-    merged_df["player_id"] = (
-        merged_df.groupby(["player"])
-        .ngroup()  # Assigns a unique number to each player
-        + 1  # Start IDs from 1 instead of 0
-    )
+    if player_index is None:
+        player_index = players.load_player_index()
+    merged_df["player_id"] = player_index.resolve(merged_df["player"])
 
     # Reorder columns to place player_id at the front (optional)
     columns = ["player_id"] + [col for col in merged_df.columns if col != "player_id"]
@@ -82,16 +328,20 @@ def assign_player_ids(merged_df):
     return merged_df[columns]
 
 
+@instrument.stage()
 def add_per_90_and_efficiency_metrics():
     """
     Add per 90 stats and efficiency metrics to the player_performance_metrics table in one step.
+    Returns:
+        bool: True if the metrics were added and saved.
     """
     try:
         print("Fetching player performance metrics data...")
         # Fetch the player performance metrics table
         query = "SELECT * FROM player_performance_metrics"
-        df = pd.read_sql(query, engine)
+        df = stage_cache.read_frame_or_sql("player_performance_metrics", query)
 
+        instrument.add_rows(rows_in=len(df), rows_out=len(df))
         # Calculate per 90 stats
         print("Calculating per 90 stats...")
         df = calculate_per_90_stats(df)
@@ -102,93 +352,195 @@ def add_per_90_and_efficiency_metrics():
 
         # Save the updated table back to the database
         print("Saving updated player performance metrics...\n")
-        save_to_database(df, "player_performance_metrics")
+        if not save_to_database(df, "player_performance_metrics"):
+            return False
         print("Per 90 stats and efficiency metrics added successfully!")
+        return True
     except Exception as e:
         print(f"Error adding per 90 and efficiency metrics: {e}\n")
+        return False
 
-def calculate_per_90_stats(df):
+def per_90_metrics(df):
     """
-    Calculate per 90 stats for the given DataFrame.
+    Every counting stat in a player metrics frame: its numeric columns other than
+    PER_90_EXCLUDED, the source row ids, the efficiency ratios and columns that already
+    are per 90 rates.
     Args:
         df (pd.DataFrame): Player performance metrics DataFrame.
     Returns:
-        pd.DataFrame: DataFrame with per 90 stats added.
+        list: Column names, in frame order.
     """
-    per_90_metrics = [
-        "goals_added",  # Example from goals_added
-        "xg",           # Expected Goals
-        "xa",           # Expected Assists
-        "passes",       # Total Passes
-        "dribbling",    # Dribbling metric
-        "shooting",     # Shooting metric (if available)
+    excluded = PER_90_EXCLUDED | set(SOURCE_ID_COLUMNS) | {metric for metric, _, _ in EFFICIENCY_RATIOS}
+    return [
+        col for col in df.columns
+        if col not in excluded and not col.endswith("_per_90")
+        and pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col])
     ]
 
-    # Ensure minutes are non-zero to avoid division errors
-    df["minutes"] = pd.to_numeric(df["minutes"], errors="coerce").fillna(0).astype(int)
-
-
-    for metric in ["xg", "xa"]:
-        df[f"{metric}_per_90"] = (df[metric] / df["minutes"] * 90).replace([np.inf, -np.inf], 0).fillna(0).round(3)
+@instrument.stage()
+def calculate_per_90_stats(df, metrics=None, min_minutes=0, dtype="float64"):
+    """
+    Calculate per 90 stats for the given DataFrame. Every counting stat present is divided
+    by minutes in a single matrix operation, so adding metrics costs almost nothing.
+    Args:
+        df (pd.DataFrame): Player performance metrics DataFrame.
+        metrics (list): Columns to convert; defaults to every counting stat, see per_90_metrics.
+        min_minutes (int): Players with fewer minutes get 0 rather than a noisy rate.
+            Players without minutes always get 0.
+        dtype (str): dtype of the per 90 columns, e.g. "float32" to halve their size.
+    Returns:
+        pd.DataFrame: DataFrame with a <metric>_per_90 column added for each metric.
+    """
+    if metrics is None:
+        metrics = per_90_metrics(df)
 
+    df["minutes"] = pd.to_numeric(df["minutes"], errors="coerce").fillna(0).astype(int)
+    minutes = df["minutes"].to_numpy(dtype="float64")
+
+    # Divide the whole metric matrix at once, leaving 0 wherever minutes are too few
+    eligible = (minutes > 0) & (minutes >= min_minutes)
+    per_90 = np.zeros((len(df), len(metrics)))
+    np.divide(
+        df[metrics].to_numpy(dtype="float64"), minutes[:, None],
+        out=per_90, where=eligible[:, None],
+    )
+    per_90 *= 90
+    df[[f"{metric}_per_90" for metric in metrics]] = np.round(per_90, 3).astype(dtype)
 
     return df
 
-def calculate_efficiency_metrics(df):
+@instrument.stage()
+def calculate_efficiency_metrics(df, ratios=None):
     """
-    Calculate efficiency metrics for the given DataFrame.
+    Calculate efficiency metrics for the given DataFrame. Every ratio whose columns are
+    present is evaluated in one vectorized divide; a zero denominator gives 0.
     Args:
         df (pd.DataFrame): Player performance metrics DataFrame.
+        ratios (list): (metric, numerator, denominator) column triples; EFFICIENCY_RATIOS
+            by default.
     Returns:
         pd.DataFrame: DataFrame with efficiency metrics added.
     """
-    # Goal Conversion Rate
-    if "G" in df.columns and "Shots" in df.columns:
-        df["goal_conversion_rate"] = (df["G"] / df["Shots"]).round(3)
-
-    # Shot Accuracy
-    if "SoT" in df.columns and "Shots" in df.columns:
-        df["shot_accuracy"] = (df["SoT"] / df["Shots"]).round(3)
-
-    # Key Pass to Assist Ratio
-    if "A" in df.columns and "KeyP" in df.columns:
-        df["key_pass_to_assist_ratio"] = (df["A"] / df["KeyP"]).round(3)
-
-    # xG Conversion Rate
-    if "G" in df.columns and "xg" in df.columns:
-        df["xg_conversion_rate"] = (df["G"] / df["xg"]).round(3)
-
-    # Goals Added Efficiency (Per 90 minutes)
-    if "goals_added" in df.columns and "minutes" in df.columns:
-        df["goals_added_per_90"] = ((df["goals_added"] / df["minutes"]) * 90).round(3)
+    ratios = [
+        ratio for ratio in (ratios or EFFICIENCY_RATIOS)
+        if ratio[1] in df.columns and ratio[2] in df.columns
+    ]
+    if not ratios:
+        return df
 
-    # Expected Assist Efficiency
-    if "A" in df.columns and "xa" in df.columns:
-        df["xa_conversion_rate"] = (df["A"] / df["xa"]).round(3)
+    metrics, numerators, denominators = zip(*ratios)
+    numerator_values = df[list(numerators)].to_numpy(dtype="float64")
+    denominator_values = df[list(denominators)].to_numpy(dtype="float64")
+    values = np.zeros_like(numerator_values)
+    np.divide(numerator_values, denominator_values, out=values, where=denominator_values != 0)
 
-    # Handle NaN or infinite values caused by division by zero
-    df = df.fillna(0).replace([float("inf"), -float("inf")], 0)
+    # Handle NaN or infinite values caused by missing inputs
+    values[~np.isfinite(values)] = 0
+    df[list(metrics)] = np.round(values, 3)
 
     return df
 
-def save_to_database(df, table_name):
+def save_to_database(df, table_name, method="copy"):
     """
-    Save the given DataFrame to the database.
+    Save the given DataFrame to the database. With the stage cache enabled the DataFrame
+    goes to the cache and the database write is deferred until the end of the run.
     Args:
         df (pd.DataFrame): DataFrame to save.
         table_name (str): Table name in the database.
+        method (str): "copy" bulk loads with COPY FROM STDIN, "to_sql" uses pandas INSERTs.
+    Returns:
+        bool: True if the table was saved or cached.
+    """
+    if stage_cache.is_enabled():
+        try:
+            stage_cache.write_frame(
+                table_name, df, publish=lambda frame: write_to_database(frame, table_name, method)
+            )
+            print(f"Data cached for table: {table_name}")
+            return True
+        except Exception as e:
+            print(f"Error caching table {table_name}: {e}")
+            return False
+    return write_to_database(df, table_name, method)
+
+def write_to_database(df, table_name, method="copy"):
+    """
+    Write the given DataFrame to the database, replacing the table's contents.
+    Args:
+        df (pd.DataFrame): DataFrame to save.
+        table_name (str): Table name in the database.
+        method (str): "copy" bulk loads with COPY FROM STDIN, "to_sql" uses pandas INSERTs.
+    Returns:
+        bool: True if the table was written.
     """
     try:
-        df.to_sql(table_name, engine, if_exists="replace", index=False)
+        if method == "copy":
+            with db.get_engine().begin() as conn:
+                bulk_load.copy_dataframe(conn, df, table_name)
+        else:
+            with db.get_engine().begin() as conn:
+                df.to_sql(table_name, conn, if_exists="replace", index=False)
+                db.create_indexes(conn, table_name)
         print(f"Data saved to table: {table_name}")
+        return True
     except Exception as e:
         print(f"Error saving to table {table_name}: {e}")
+        return False
+
+
+def merge_players(force=False, merge_method="pandas", incremental=False):
+    """
+    Build player_performance_metrics from the source tables, or update it incrementally,
+    unless none of the source tables changed this run.
+    Args:
+        force (bool): Rebuild even if the source tables are unchanged.
+        merge_method (str): "pandas" or "sql", see create_player_performance_metrics.
+        incremental (bool): Upsert only the changed rows with update_player_performance_metrics,
+            which also computes their metrics.
+    Returns:
+        bool: True if the table was built, updated or left as is.
+    """
+    if not force and not manifest.has_changed(*SOURCE_TABLES):
+        print("Player source tables are unchanged, skipping transformation.\n")
+        return True
+    if incremental and not force and not stage_cache.is_enabled():
+        season_scope = manifest.changed_seasons(*SOURCE_TABLES)
+        if season_scope is not None:
+            print(f"Updating the {seasons.label(season_scope)} of player_performance_metrics.")
+        return update_player_performance_metrics(season_scope=season_scope)
+    return create_player_performance_metrics(merge_method)
+
+
+def add_metrics(force=False, incremental=False):
+    """
+    Add the per 90 and efficiency metrics after merge_players and mark
+    player_performance_metrics as changed.
+    Args:
+        force (bool): Recompute even if the source tables are unchanged.
+        incremental (bool): merge_players updated the table incrementally, which already
+            computed the metrics of the changed rows.
+    Returns:
+        bool: True if the metrics were added or had nothing to do.
+    """
+    if not force and not manifest.has_changed(*SOURCE_TABLES):
+        return True
+    if not (incremental and not force and not stage_cache.is_enabled()):
+        if not add_per_90_and_efficiency_metrics():
+            return False
+    manifest.mark_changed("player_performance_metrics")
+    return True
 
 
-def main(): 
-    create_player_performance_metrics()
-    add_per_90_and_efficiency_metrics()
-    print("Data transformation complete!")
+def main(force=False, merge_method="pandas", incremental=False):
+    """
+    Returns:
+        bool: True if the transformation succeeded or had nothing to do.
+    """
+    if not merge_players(force, merge_method, incremental) or not add_metrics(force, incremental):
+        return False
+    if force or manifest.has_changed(*SOURCE_TABLES):
+        print("Data transformation complete!")
+    return True
 
 
 if __name__ == "__main__":
@@ -0,0 +1,72 @@
+import pytest
+import pandas as pd
+import src.analysis_context as analysis_context
+import src.stage_cache as stage_cache
+
+
+@pytest.fixture
+def cached_players(tmp_path):
+    stage_cache.enable(str(tmp_path), offline=True)
+    df = pd.DataFrame({
+        "player": ["Thiago Almada", "Brad Guzan", "Riqui Puig"],
+        "team": ["ATL", "ATL", "LAG"],
+        "xg": [7.2, 0.0, 5.5],
+        "xa": [9.1, 0.0, 6.3],
+        "goals_added": [4.1, 0.4, 8.06],
+        "dribbling": [1.2, 0.0, 3.0],
+        "shooting": [0.9, 0.0, 1.63],
+        "minutes": [2800, 3060, 2874],
+    })
+    stage_cache.write_frame("player_performance_metrics", df)
+    yield df
+    stage_cache.disable()
+
+
+def test_context_reads_each_table_once(cached_players):
+    context = analysis_context.AnalysisContext()
+
+    scoring_df = context.scoring_players()
+    players_df = context.frame("player_performance_metrics")
+    players_df["impact_score"] = players_df["xg"]
+
+    assert list(scoring_df["player"]) == ["Thiago Almada", "Riqui Puig"]
+    assert context.stats["queries"] == 1
+    assert context.stats["queries_avoided"] == 1
+    assert context.stats["bytes_avoided"] == context.stats["bytes_fetched"] > 0
+    # Callers adding columns do not change the shared frame
+    assert "impact_score" not in context.frame("player_performance_metrics").columns
+
+    context.invalidate("player_performance_metrics")
+    context.frame("player_performance_metrics")
+    assert context.stats["queries"] == 2
+
+
+def test_reset_context_starts_a_new_run(cached_players):
+    first = analysis_context.get_context()
+    first.frame("player_performance_metrics")
+
+    second = analysis_context.reset_context()
+
+    assert second is analysis_context.get_context()
+    assert second is not first
+    assert second.stats["queries"] == 0
+
+
+def test_latest_season_per_table_until_invalidated(tmp_path):
+    stage_cache.enable(str(tmp_path), offline=True)
+    try:
+        stage_cache.write_frame("player_performance_metrics", pd.DataFrame({"season": ["2023", "2024"]}))
+        stage_cache.write_frame("xgoals_games", pd.DataFrame({"date": ["2024-10-19", "2025-03-01"]}))
+        context = analysis_context.AnalysisContext()
+
+        assert context.chart_season() == "2024"
+        assert context.chart_season(name="xgoals_games") == "2025"
+        assert context.chart_season("2023") == "2023"
+
+        # A rebuilt table is only seen once the context is told about it
+        stage_cache.write_frame("player_performance_metrics", pd.DataFrame({"season": ["2025"]}))
+        assert context.latest_season() == "2024"
+        context.invalidate("player_performance_metrics")
+        assert context.latest_season() == "2025"
+    finally:
+        stage_cache.disable()
@@ -0,0 +1,35 @@
+import numpy as np
+import src.annotate as annotate
+
+
+def test_outlier_mask_flags_either_tail_of_any_column():
+    xg = np.arange(100, dtype=float)
+    goals_added = np.zeros(100)
+    goals_added[50] = 10.0
+
+    mask = annotate.outlier_mask([goals_added, xg], 0.97)
+
+    assert set(np.flatnonzero(mask)) == {0, 1, 2, 50, 97, 98, 99}
+
+
+def test_select_labels_keeps_one_label_per_cell():
+    x = np.array([0.0, 0.001, 10.0, 5.0])
+    y = np.array([0.0, 0.001, 10.0, 5.0])
+    priority = np.array([1.0, 2.0, 0.5, 0.1])
+
+    selected = annotate.select_labels(x, y, priority=priority)
+
+    # Points 0 and 1 share a cell and the higher priority one wins
+    assert list(selected) == [1, 2, 3]
+
+
+def test_select_labels_is_capped_for_large_scatters():
+    rng = np.random.default_rng(0)
+    x, y = rng.normal(size=(2, 50_000))
+
+    selected = annotate.select_labels(x, y, max_labels=40)
+    labels = annotate.label_arrays(x, y, np.arange(len(x)).astype(str), selected)
+
+    assert len(selected) == 40
+    assert len(set(selected)) == 40
+    assert list(labels["label_x"]) == list(x[selected])
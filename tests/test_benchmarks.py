@@ -0,0 +1,36 @@
+import pytest
+import pandas as pd
+import src.ingestion as ingestion
+from benchmarks import suite, synthetic
+
+
+def test_synthetic_files_are_deterministic_and_parse(tmp_path):
+    paths = synthetic.generate(str(tmp_path / "a"), seasons=2, leagues=2, seed=3)
+    again = synthetic.generate(str(tmp_path / "b"), seasons=2, leagues=2, seed=3)
+
+    for table_name, path in paths.items():
+        # Same seed and shape, same bytes
+        with open(path, "rb") as f, open(again[table_name], "rb") as g:
+            assert f.read() == g.read()
+
+        df = ingestion.preprocess_data(
+            path,
+            ingestion.RENAME_MAPPINGS[table_name],
+            ingestion.FORMAT_CURRENCY_COLUMNS.get(table_name),
+            format_percent_columns=ingestion.FORMAT_PERCENT_COLUMNS.get(table_name),
+        )
+        # Every mapped column of the source layout is present
+        assert list(df.columns) == list(ingestion.RENAME_MAPPINGS[table_name].values())
+
+    xg_df = pd.read_csv(paths["xg"])
+    squad = synthetic.TEAMS_PER_LEAGUE * synthetic.PLAYERS_PER_TEAM
+    assert len(xg_df) == squad * 2 * 2
+    assert sorted(xg_df["Season"].unique()) == [2023, 2024]
+    assert "ATL" in set(xg_df["Team"]) and xg_df["Player"].nunique() == squad * 2
+
+def test_compare_with_baseline():
+    results = {"fast": {"median": 0.1}, "slow": {"median": 0.3}, "new": {"median": 1.0}}
+    baseline = {"fast": {"median": 0.2}, "slow": {"median": 0.2}}
+
+    # Cases without a baseline are not compared
+    assert suite.compare(results, baseline) == pytest.approx({"fast": 0.5, "slow": 1.5})
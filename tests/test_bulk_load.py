@@ -0,0 +1,47 @@
+import pytest
+import pandas as pd
+import src.bulk_load as bulk_load
+import src.ingestion as ingestion
+
+
+def test_parse_schema_columns():
+    columns = bulk_load.parse_schema_columns(ingestion.TABLE_SCHEMAS["salaries"])
+
+    # SERIAL id is skipped and the rest keep their declared order
+    assert columns == {
+        "team": "VARCHAR",
+        "num_players": "INT",
+        "total_guaranteed": "FLOAT",
+        "avg_guaranteed": "FLOAT",
+        "median_guaranteed": "FLOAT",
+        "stddev_guaranteed": "FLOAT",
+    }
+
+def test_coerce_to_schema_and_csv_buffer():
+    # Sample input with a float INT column, an unknown column and a missing value
+    df = pd.DataFrame({
+        "extra": ["x", "y"],
+        "num_players": [38.0, None],
+        "team": ["MIA", "TOR"],
+    })
+    column_types = {"team": "VARCHAR", "num_players": "INT"}
+
+    coerced = bulk_load.coerce_to_schema(df, column_types)
+    buffer = bulk_load.dataframe_to_csv_buffer(coerced)
+
+    # Columns follow the schema, ints are written without decimals and NaN becomes NULL
+    assert list(coerced.columns) == ["team", "num_players"]
+    assert buffer.read() == "MIA,38\nTOR,\n"
+
+def test_add_missing_columns():
+    from sqlalchemy import create_engine, text
+
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE players (player VARCHAR(100), minutes INT)"))
+        added = bulk_load.add_missing_columns(conn, "players", {"player": "VARCHAR", "minutes": "INT", "shots": "INT"})
+        columns = list(conn.execute(text("SELECT * FROM players WHERE 1 = 0")).keys())
+
+    # Only the column the older table lacks is added
+    assert added == ["shots"]
+    assert columns == ["player", "minutes", "shots"]
@@ -0,0 +1,50 @@
+import subprocess
+import sys
+import pytest
+import src.analysis_context as analysis_context
+import src.cli as cli
+import src.db as db
+import src.ingestion as ingestion
+import src.manifest as manifest
+import src.pipeline as pipeline
+import src.render as render
+
+
+def test_cli_constants_match_their_modules():
+    assert cli.TABLES == list(ingestion.DATA_FILES)
+    assert cli.CHART_FORMATS == render.FORMATS
+    assert cli.PREVIEW_DPI == render.PREVIEW_DPI
+    assert cli.GRAPH_WORKERS == pipeline.GRAPH_WORKERS
+
+def test_non_plot_commands_do_not_import_plotting_libraries():
+    # A fresh interpreter, as this one may already have imported matplotlib
+    code = (
+        "import sys, src.cli as cli\n"
+        "cli.build_parser().parse_args(['report', '--team', 'ATL'])\n"
+        "assert 'pandas' not in sys.modules\n"
+        "import src.automate_pipeline\n"
+        "print(sorted(name for name in ('matplotlib', 'seaborn') if name in sys.modules))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
+
+def test_ingest_transform_and_report(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("DB_PATH", str(tmp_path / "cli.sqlite"))
+    db.dispose_engine()
+    analysis_context.reset_context()
+    try:
+        # Files parsed on a process pool, loaded from threads
+        assert cli.main(["ingest", "--force", "--parse-workers", "2"]) == 0
+        assert cli.main(["transform", "--force"]) == 0
+        assert cli.main(["report", "--team", "ATL", "--top", "3"]) == 0
+        assert cli.main(["report", "--team", "XXX"]) == 1
+    finally:
+        db.dispose_engine()
+        manifest.reset_changed_tables()
+
+    output = capsys.readouterr().out
+    assert "ATL: " in output and "No games found for XXX." in output
+
+    with pytest.raises(SystemExit):
+        cli.main(["ingest", "not_a_table"])
@@ -0,0 +1,36 @@
+import pytest
+import src.db as db
+import src.transform as transform
+
+
+def test_engine_is_created_lazily(monkeypatch):
+    db.dispose_engine()
+    for key, value in {
+        "DB_HOST": "localhost", "DB_PORT": "5432", "DB_NAME": "mls", "DB_USER": "atl", "DB_PASSWORD": "secret",
+        "DB_POOL_SIZE": "3", "DB_STATEMENT_TIMEOUT_MS": "30000",
+    }.items():
+        monkeypatch.setenv(key, value)
+
+    # Importing a module for its pure functions does not build an engine
+    assert transform.calculate_per_90_stats is not None
+    assert db._engine is None
+
+    engine = db.get_engine()
+    try:
+        # One shared, instrumented engine configured from the environment
+        assert db.get_engine() is engine
+        assert isinstance(engine.pool, db.InstrumentedQueuePool)
+        assert engine.pool.size() == 3
+        assert engine.url.database == "mls"
+    finally:
+        db.dispose_engine()
+
+def test_ddl_statements_for_embedded_backends():
+    schema = "CREATE TABLE IF NOT EXISTS xg (id SERIAL PRIMARY KEY, xg FLOAT)"
+
+    assert db.ddl_statements(schema, "postgresql") == [schema]
+    assert db.ddl_statements(schema, "sqlite") == ["CREATE TABLE IF NOT EXISTS xg (id INTEGER PRIMARY KEY, xg FLOAT)"]
+    assert db.ddl_statements(schema, "duckdb") == [
+        "CREATE SEQUENCE IF NOT EXISTS xg_id_seq",
+        "CREATE TABLE IF NOT EXISTS xg (id INTEGER DEFAULT nextval('xg_id_seq') PRIMARY KEY, xg DOUBLE)",
+    ]
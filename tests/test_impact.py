@@ -0,0 +1,41 @@
+import pytest
+import pandas as pd
+import src.impact as impact
+
+
+def sample_players():
+    return pd.DataFrame({
+        "player": ["Thiago Almada", "Saba Lobjanidze", "Brad Guzan", "Riqui Puig"],
+        "team": ["ATL", "ATL", "ATL", "LAG"],
+        "minutes": [1800, 2700, 0, 2874],
+        "xg": [6.0, 10.0, 0.0, 9.5],
+        "xa": [8.0, 4.0, 0.0, 6.3],
+        "goals_added": [4.0, 3.0, 0.4, 8.06],
+    })
+
+
+def test_score_players_ranks_league_and_teams():
+    scored = impact.score_players(sample_players()).set_index("player")
+
+    assert scored.loc["Riqui Puig", "impact_score"] == pytest.approx(0.4 * 9.5 + 0.3 * 6.3 + 0.3 * 8.06)
+    assert list(scored.index) == ["Riqui Puig", "Saba Lobjanidze", "Thiago Almada", "Brad Guzan"]
+    assert scored.loc["Saba Lobjanidze", ["league_rank", "team_rank"]].tolist() == [2, 1]
+    assert scored.loc["Saba Lobjanidze", "team_percentile"] == 100.0
+    assert scored.loc["Brad Guzan", "league_percentile"] == 25.0
+
+
+def test_score_players_with_custom_weights_per_90():
+    scored = impact.score_players(sample_players(), weights={"xa": 1.0}, per_90=True).set_index("player")
+
+    assert scored.loc["Thiago Almada", "impact_score"] == 0.4
+    # No minutes means no per 90 rate rather than a division by zero
+    assert scored.loc["Brad Guzan", "impact_score"] == 0.0
+
+
+def test_team_view_is_a_slice_in_score_order():
+    scored = impact.score_players(sample_players())
+
+    atl = impact.team_view(scored, "ATL")
+
+    assert list(atl["player"]) == ["Saba Lobjanidze", "Thiago Almada", "Brad Guzan"]
+    assert impact.team_view(scored, "MIA").empty
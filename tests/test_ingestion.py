@@ -1,6 +1,8 @@
 import pytest
 import pandas as pd
+import src.db as db
 import src.ingestion as ingestion
+import src.instrument as instrument
 
 
 def test_preprocess_data():
@@ -42,3 +44,71 @@ def test_preprocess_data():
     # Assert the processed dataframe matches the expected output
     pd.testing.assert_frame_equal(processed_df, expected_df, check_dtype=True)
 
+
+def test_load_all_data_isolates_failures(monkeypatch):
+    # One missing file should not stop the other files from loading
+    monkeypatch.setattr(ingestion, "DATA_FILES", {
+        "salaries": "data/MLS_TeamSalaries.csv",
+        "xg": "data/MLS_xGoals_Players.csv",
+        "xp": "data/missing.csv",
+    })
+    monkeypatch.setattr(ingestion, "read_manifest", lambda: {})
+    monkeypatch.setattr(ingestion, "load_source", lambda table_name, file_path, fingerprint, df: not df.empty)
+
+    changed = ingestion.load_all_data(workers=2)
+
+    assert changed == {"salaries", "xg"}
+
+def test_preprocess_chunks_matches_preprocess_data(tmp_path):
+    # Duplicate rows split across chunks are only kept once
+    file_path = tmp_path / "salaries.csv"
+    file_path.write_text(
+        '"","Team","N","TotalGuar"\n'
+        '"","MIA","38","$42,227,583"\n'
+        '"","TOR","34","$32,976,320"\n'
+        '"","MIA","38","$42,227,583"\n'
+        '"","NYC",,"$1,000"\n'
+    )
+    rename_mapping = {"Team": "team", "N": "num_players", "TotalGuar": "total_guaranteed"}
+
+    chunks = list(ingestion.preprocess_chunks(
+        str(file_path), rename_mapping, ["total_guaranteed"], chunksize=2
+    ))
+    streamed_df = pd.concat(chunks)
+    expected_df = ingestion.preprocess_data(str(file_path), rename_mapping, ["total_guaranteed"])
+
+    assert len(chunks) == 2
+    pd.testing.assert_frame_equal(
+        streamed_df.reset_index(drop=True), expected_df.reset_index(drop=True), check_dtype=False
+    )
+
+def test_read_dtypes_and_formatted_numbers():
+    dtypes = ingestion.read_dtypes("xp")
+
+    # Dtypes come from the xp schema, and percent columns are left as text to be parsed
+    assert dtypes["Team"] == "category"
+    assert dtypes["Season"] == "category"
+    assert dtypes["Passes"] == "int32"
+    assert dtypes["Score"] == "float64"
+    assert dtypes["Pass %"] == "object"
+    assert "Player" not in dtypes
+
+    parsed = ingestion.parse_formatted_numbers(pd.Series(["$42,227,583", "63.2%", None]))
+    pd.testing.assert_series_equal(parsed, pd.Series([42227583.0, 63.2, None], dtype="float64"))
+
+
+@pytest.mark.parametrize("method", ["copy", "to_sql"])
+def test_load_records_rows_written(tmp_path, monkeypatch, method):
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("DB_PATH", str(tmp_path / "load.sqlite"))
+    db.dispose_engine()
+    instrument.configure()
+    try:
+        df = ingestion.preprocess_source("xg", ingestion.DATA_FILES["xg"]).head(25)
+        assert ingestion.load_data_to_postgres(df, "xg", method=method)
+
+        record = instrument.get_records()[-1]
+        assert record["stage"] == "ingestion.load_data_to_postgres"
+        assert record["rows_in"] == 25 and record["rows_out"] == 25
+    finally:
+        db.dispose_engine()
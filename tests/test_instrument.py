@@ -0,0 +1,50 @@
+import json
+import pandas as pd
+import src.instrument as instrument
+
+
+@instrument.stage("test.double")
+def double(df):
+    return df.assign(value=df["value"] * 2)
+
+
+@instrument.stage()
+def failing_stage():
+    return False
+
+
+def test_stage_records_rows_and_writes_json_lines(tmp_path):
+    path = tmp_path / "metrics.jsonl"
+    instrument.configure(path=str(path))
+
+    double(pd.DataFrame({"value": [1, 2, 3]}))
+    failing_stage()
+
+    records = instrument.get_records()
+    assert [record["stage"] for record in records] == ["test.double", "test_instrument.failing_stage"]
+    assert records[0]["rows_in"] == 3 and records[0]["rows_out"] == 3 and records[0]["ok"]
+    # A stage returning False is recorded as failed
+    assert not records[1]["ok"]
+    assert records[0]["wall_seconds"] >= 0 and records[0]["db_queries"] == 0
+
+    written = [json.loads(line) for line in path.read_text().splitlines()]
+    assert written == records
+    table = instrument.summary_table()
+    assert "test.double" in table and "failing_stage" in table
+
+def test_nested_stage_rows_and_disabled_mode(tmp_path):
+    instrument.configure()
+    with instrument.measure("outer"):
+        instrument.add_rows(rows_in=10, rows_out=4)
+    assert instrument.get_records()[0]["rows_in"] == 10
+    assert instrument.get_records()[0]["rows_out"] == 4
+
+    # Turned off, stages run as before and nothing is recorded or written
+    path = tmp_path / "metrics.jsonl"
+    instrument.configure(enabled=False, path=str(path))
+    result = double(pd.DataFrame({"value": [1]}))
+    assert result["value"].tolist() == [2]
+    assert instrument.get_records() == []
+    assert instrument.summary_table() == ""
+    assert not path.exists()
+    instrument.configure()
@@ -0,0 +1,39 @@
+import pytest
+import src.manifest as manifest
+
+
+def test_compute_file_fingerprint(tmp_path):
+    file_path = tmp_path / "games.csv"
+    file_path.write_text("Date,Home,Away\n2024-10-19,ATX,COL\n")
+
+    fingerprint = manifest.compute_file_fingerprint(str(file_path))
+
+    assert fingerprint["file_size"] == len("Date,Home,Away\n2024-10-19,ATX,COL\n")
+    assert manifest.is_unchanged({"xgoals_games": fingerprint}, "xgoals_games", fingerprint)
+
+    # Changing the contents changes the hash
+    file_path.write_text("Date,Home,Away\n2024-10-19,ATX,SKC\n")
+    assert not manifest.is_unchanged(
+        {"xgoals_games": fingerprint}, "xgoals_games", manifest.compute_file_fingerprint(str(file_path))
+    )
+
+def test_changed_tables():
+    manifest.reset_changed_tables()
+    assert not manifest.has_changed("xg")
+
+    manifest.mark_changed("xg")
+    assert manifest.has_changed("goals_added", "xg")
+    assert manifest.changed_tables() == {"xg"}
+
+def test_changed_seasons():
+    manifest.reset_changed_tables()
+    manifest.mark_seasons("xg", ["2024"])
+    manifest.mark_changed("xg")
+    manifest.mark_seasons("xp", [2023])
+    manifest.mark_changed("xp")
+    assert manifest.changed_seasons("goals_added", "xg", "xp") == ["2023", "2024"]
+
+    # A table rewritten whole, e.g. streamed, makes the seasons unknown
+    manifest.mark_changed("goals_added")
+    assert manifest.changed_seasons("goals_added", "xg") is None
+    manifest.reset_changed_tables()
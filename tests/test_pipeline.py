@@ -0,0 +1,210 @@
+import pytest
+import pandas as pd
+from sqlalchemy import text
+import src.analysis_context as analysis_context
+import src.automate_pipeline as automate_pipeline
+import src.db as db
+import src.ingestion as ingestion
+import src.manifest as manifest
+import src.pipeline as pipeline
+import src.stage_cache as stage_cache
+import src.transform as transform
+import src.data_analysis as data_analysis
+
+
+@pytest.fixture(params=["sqlite", "duckdb"])
+def embedded_backend(request, tmp_path, monkeypatch):
+    if request.param == "duckdb":
+        pytest.importorskip("duckdb_engine")
+    monkeypatch.setenv("DB_BACKEND", request.param)
+    monkeypatch.setenv("DB_PATH", str(tmp_path / f"pipeline.{request.param}"))
+    db.dispose_engine()
+    analysis_context.reset_context()
+    yield request.param
+    db.dispose_engine()
+    manifest.reset_changed_tables()
+
+
+def test_pipeline_runs_on_embedded_backend(embedded_backend):
+    ingestion.main(force=True)
+    transform.main(force=True)
+
+    metrics_df = pd.read_sql("SELECT * FROM player_performance_metrics", db.get_engine())
+    salaries_df = pd.read_sql("SELECT * FROM salaries ORDER BY id", db.get_engine())
+    points_df = data_analysis.calculate_team_points()
+
+    # Every source table and the merged table are queryable without PostgreSQL
+    assert len(metrics_df) == 800
+    assert {"xg_per_90", "xa_per_90", "goals_added_per_90"} <= set(metrics_df.columns)
+    assert salaries_df.loc[0, "team"] == "MIA"
+    assert salaries_df.loc[0, "total_guaranteed"] == 42227583.0
+    assert len(points_df) == 29
+
+    # A second run finds every file unchanged
+    assert ingestion.load_all_data() == set()
+
+
+def test_sql_merge_matches_pandas_merge(embedded_backend):
+    ingestion.main(force=True)
+    query = "SELECT * FROM player_performance_metrics ORDER BY player, team, season"
+
+    transform.create_player_performance_metrics("pandas")
+    pandas_df = pd.read_sql(query, db.get_engine())
+    transform.create_player_performance_metrics("sql")
+    sql_df = pd.read_sql(query, db.get_engine())
+
+    # The SQL merge leaves out the source tables' ids
+    pandas_df = pandas_df[sql_df.columns].astype({"player_id": "int64"})
+    sql_df = sql_df.astype({"player_id": "int64"})
+    pd.testing.assert_frame_equal(pandas_df, sql_df, check_dtype=False)
+
+
+def test_incremental_update_touches_only_changed_rows(embedded_backend):
+    ingestion.main(force=True)
+    transform.main(force=True)
+    query = "SELECT * FROM player_performance_metrics ORDER BY player, team, season"
+    before_df = pd.read_sql(query, db.get_engine())
+    changed_player, removed_player = before_df["player"].iloc[[0, 1]]
+
+    with db.get_engine().begin() as conn:
+        conn.execute(text("UPDATE xg SET xg = xg + 1 WHERE player = :player"), {"player": changed_player})
+        for table in transform.SOURCE_TABLES:
+            conn.execute(text(f"DELETE FROM {table} WHERE player = :player"), {"player": removed_player})
+    transform.update_player_performance_metrics()
+    after_df = pd.read_sql(query, db.get_engine())
+
+    assert removed_player not in set(after_df["player"])
+    before_df = before_df[before_df["player"] != removed_player].reset_index(drop=True)
+    changed = after_df["player"] == changed_player
+    assert (after_df.loc[changed, "xg"].to_numpy() == before_df.loc[changed, "xg"].to_numpy() + 1).all()
+    assert (after_df.loc[changed, "xg_per_90"] != before_df.loc[changed, "xg_per_90"]).all()
+    # Every other row, including its player_id, is unchanged
+    pd.testing.assert_frame_equal(after_df[~changed], before_df[~changed], check_dtype=False)
+
+
+def test_player_ids_survive_new_players_and_name_variants(embedded_backend):
+    ingestion.main(force=True)
+    transform.main(force=True)
+    query = "SELECT player, team, season, player_id FROM player_performance_metrics ORDER BY player, team, season"
+    before_df = pd.read_sql(query, db.get_engine())
+    renamed = before_df["player"].iloc[5]
+
+    with db.get_engine().begin() as conn:
+        # A new player who sorts before everyone, and an upper-cased spelling of an existing one
+        conn.execute(text("UPDATE xg SET player = '  Aaaron Aardvark' WHERE id = (SELECT MIN(id) FROM xg)"))
+        conn.execute(text("UPDATE xp SET player = :upper WHERE player = :player"), {"upper": renamed.upper(), "player": renamed})
+    transform.main(force=True)
+    after_df = pd.read_sql(query, db.get_engine())
+
+    new_player = after_df[after_df["player"] == "Aaaron Aardvark"]
+    assert new_player["player_id"].tolist() == [before_df["player_id"].max() + 1]
+    # Every existing player keeps their id and the variant spelling merges into the same rows
+    kept = after_df.merge(before_df, on=["player", "team", "season"], suffixes=("", "_before"))
+    assert (kept["player_id"] == kept["player_id_before"]).all()
+    assert renamed.upper() not in set(after_df["player"])
+
+
+def test_migrations_apply_once_and_indexes_survive_loads(embedded_backend):
+    ingestion.setup_tables()
+    assert db.apply_migrations(ingestion.SCHEMA_MIGRATIONS) == []
+
+    ingestion.main(force=True)
+    transform.main(force=True)
+    index_query = {
+        "sqlite": "SELECT name FROM sqlite_master WHERE type = 'index'",
+        "duckdb": "SELECT index_name FROM duckdb_indexes()",
+    }[embedded_backend]
+    with db.get_engine().connect() as conn:
+        index_names = set(conn.execute(text(index_query)).scalars())
+
+    # Reloading the source tables and rebuilding the merged table keeps every index
+    expected = {name for indexes in db.TABLE_INDEXES.values() for name, _, _ in indexes}
+    assert expected <= index_names
+
+
+def test_graph_blocks_dependents_of_failures_and_resumes_them(tmp_path):
+    checkpoint_path = str(tmp_path / "checkpoints.json")
+    calls = []
+    broken = {"merge": True}
+
+    def step(name):
+        def run(force):
+            calls.append((name, force))
+            return not broken.get(name, False)
+        return run
+
+    nodes = [
+        {"name": "charts", "run": step("charts"), "deps": ["merge"]},
+        {"name": "merge", "run": step("merge"), "deps": ["ingest"]},
+        {"name": "ingest", "run": step("ingest")},
+        {"name": "points", "run": step("points"), "deps": ["ingest"]},
+    ]
+    results = pipeline.run_graph(nodes, checkpoint_path=checkpoint_path)
+
+    # Dependencies run first, and a failure only stops the steps downstream of it
+    assert results == {"ingest": "done", "merge": "failed", "charts": "blocked", "points": "done"}
+    assert calls.index(("ingest", False)) < calls.index(("merge", False))
+    assert ("charts", False) not in calls
+
+    calls.clear()
+    broken.clear()
+    results = pipeline.run_graph(nodes, resume=True, checkpoint_path=checkpoint_path)
+
+    # Only the failed step and the one it blocked rerun, forced
+    assert sorted(calls) == [("charts", True), ("merge", True)]
+    assert results["ingest"] == results["points"] == "skipped"
+
+
+def test_graph_retries_failed_steps_without_resume(tmp_path):
+    checkpoint_path = str(tmp_path / "checkpoints.json")
+    calls = []
+    broken = {"metrics": True}
+
+    def step(name):
+        def run(force):
+            calls.append((name, force))
+            return not broken.get(name, False)
+        return run
+
+    nodes = [
+        {"name": "merge", "run": step("merge")},
+        {"name": "metrics", "run": step("metrics"), "deps": ["merge"]},
+        {"name": "charts", "run": step("charts"), "deps": ["metrics"]},
+    ]
+    assert pipeline.run_graph(nodes, checkpoint_path=checkpoint_path)["charts"] == "blocked"
+
+    calls.clear()
+    broken.clear()
+    results = pipeline.run_graph(nodes, checkpoint_path=checkpoint_path)
+
+    # The failed and blocked steps are forced, so an unchanged-input skip cannot mark them done
+    assert sorted(calls) == [("charts", True), ("merge", False), ("metrics", True)]
+    assert set(results.values()) == {"done"}
+
+
+def test_graph_rejects_cycles():
+    nodes = [
+        {"name": "a", "run": lambda force: True, "deps": ["b"]},
+        {"name": "b", "run": lambda force: True, "deps": ["a"]},
+    ]
+    with pytest.raises(ValueError, match="cycle"):
+        pipeline.run_graph(nodes)
+
+
+def test_failed_cache_publish_fails_its_step(tmp_path):
+    checkpoint_path = str(tmp_path / "checkpoints.json")
+    nodes = [{"name": name, "run": lambda force: True} for name in ["ingest_xg", "ingest_xp", "per_90_metrics"]]
+    results = pipeline.run_graph(nodes, checkpoint_path=checkpoint_path)
+
+    stage_cache.enable(str(tmp_path / "cache"))
+    try:
+        df = pd.DataFrame({"player": ["Riqui Puig"], "xg": [5.5]})
+        stage_cache.write_frame("xg", df, publish=lambda frame: False)
+        stage_cache.write_frame("xp", df, publish=lambda frame: True)
+        assert automate_pipeline.publish_cache(results, checkpoint_path) == ["ingest_xg"]
+    finally:
+        stage_cache.disable()
+
+    # The run reports the failure, and the next run retries the step
+    assert results == {"ingest_xg": "failed", "ingest_xp": "done", "per_90_metrics": "done"}
+    assert pipeline.read_checkpoints(checkpoint_path)["ingest_xg"]["status"] == "failed"
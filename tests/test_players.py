@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import src.db as db
+import src.players as players
+import src.stage_cache as stage_cache
+
+
+def test_normalize_name_folds_accents_case_and_whitespace():
+    assert players.normalize_name("Dénis  Bouanga ") == "denis bouanga"
+    assert players.normalize_name("DENIS BOUANGA") == "denis bouanga"
+    assert players.normalize_name("Jean-Aniel Assi") == "jean aniel assi"
+    assert players.normalize_name("D'Avilla Jr.") == "davilla jr"
+
+
+def test_player_ids_are_stable_and_variants_share_one():
+    index = players.PlayerIndex(pd.DataFrame({
+        "player_id": [1, 2],
+        "player": ["Thiago Almada", "Dénis Bouanga"],
+        "name_key": ["thiago almada", "denis bouanga"],
+    }), aliases={"nico lodeiro": "nicolas lodeiro"})
+
+    names = pd.Series(["Aaron Long", "Denis Bouanga", "Thiago Almada", "Nicolás Lodeiro", "Nico Lodeiro"])
+    ids = index.resolve(names)
+
+    # A new name sorting first does not shift existing ids, and new players follow the highest id
+    assert ids.tolist() == [3, 2, 1, 4, 4]
+    assert index.canonical_names(names).tolist() == [
+        "Aaron Long", "Dénis Bouanga", "Thiago Almada", "Nicolás Lodeiro", "Nicolás Lodeiro",
+    ]
+    assert index.new_players()["player_id"].tolist() == [3, 4]
+    assert index.lookup("thiago  ALMADA") == 1
+    assert index.lookup("Unknown Player") is None
+
+
+def test_missing_names_resolve_to_no_player():
+    index = players.PlayerIndex()
+    names = pd.Series(["Riqui Puig", np.nan, "Dénis Bouanga"])
+
+    ids = index.resolve(names)
+    assert ids[0] == 1 and np.isnan(ids[1]) and ids[2] == 2
+    canonical = index.canonical_names(names)
+    assert canonical[0] == "Riqui Puig" and pd.isna(canonical[1]) and canonical[2] == "Dénis Bouanga"
+    assert len(index) == 2
+
+
+def test_offline_index_never_connects(tmp_path, monkeypatch):
+    engines = []
+    monkeypatch.setattr(db, "get_engine", lambda: engines.append(1))
+    stage_cache.enable(str(tmp_path), offline=True)
+    try:
+        # Nothing cached: an empty index
+        assert len(players.load_player_index()) == 0
+
+        # A cached metrics table from before the player dimension: its ids are adopted
+        stage_cache.write_frame("player_performance_metrics", pd.DataFrame({
+            "player_id": [7, 7, 3],
+            "player": ["Riqui Puig", "Riqui Puig", "Dénis Bouanga"],
+        }))
+        index = players.load_player_index()
+        assert index.lookup("Riqui Puig") == 7 and index.lookup("Denis Bouanga") == 3
+        assert engines == []
+    finally:
+        stage_cache.disable()
@@ -0,0 +1,82 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pytest
+import src.render as render
+import src.data_analysis as data_analysis
+
+
+@pytest.fixture
+def chart_job(tmp_path):
+    return {
+        "name": "top xg players plot",
+        "render": data_analysis.render_top_players,
+        "path": str(tmp_path / "top_xg_players.png"),
+        "data": {
+            "values": np.array([21.43, 19.57]),
+            "player": np.array(["Dénis Bouanga", "Christian Benteke"]),
+            "title": "Top 2 Players by Expected Goals (xG)",
+            "xlabel": "Expected Goals (xG)",
+            "palette": "Greens_d",
+        },
+    }
+
+
+def test_render_charts_in_process_as_svg(chart_job, tmp_path):
+    render.configure(workers=1, fmt="svg")
+    try:
+        timings = render.render_charts([chart_job, None])
+    finally:
+        render.configure(workers=1)
+
+    svg_path = str(tmp_path / "top_xg_players.svg")
+    assert list(timings) == [svg_path]
+    assert os.path.getsize(svg_path) > 0
+
+
+def test_render_charts_on_process_pool(chart_job, tmp_path):
+    broken_job = dict(chart_job, name="broken plot", path=str(tmp_path / "broken.png"), data={})
+    render.configure(workers=2, dpi=render.PREVIEW_DPI)
+    try:
+        timings = render.render_charts([chart_job, broken_job])
+    finally:
+        render.shutdown()
+        render.configure(workers=1)
+
+    # The failing chart is reported without stopping the other one
+    assert list(timings) == [str(tmp_path / "top_xg_players.png")]
+    assert not os.path.exists(tmp_path / "broken.png")
+
+
+def test_unchanged_charts_are_skipped(chart_job, tmp_path):
+    render.configure(workers=1)
+    first = render.render_charts([chart_job])
+    second = render.render_charts([chart_job])
+    changed_job = dict(chart_job, data=dict(chart_job["data"], title="Top 2 Players by xG"))
+    third = render.render_charts([changed_job])
+
+    assert len(first) == 1
+    assert second == {}
+    assert len(third) == 1
+    assert os.path.exists(tmp_path / render.RENDER_MANIFEST)
+
+    # A different dpi is a different chart
+    render.configure(workers=1, dpi=render.PREVIEW_DPI)
+    try:
+        assert len(render.render_charts([changed_job])) == 1
+    finally:
+        render.configure(workers=1)
+
+def test_concurrent_render_calls_keep_each_others_manifest_entries(chart_job, tmp_path):
+    jobs = [dict(chart_job, path=str(tmp_path / f"chart_{i}.png")) for i in range(4)]
+    render.configure(workers=2, dpi=render.PREVIEW_DPI)
+    try:
+        # Pipeline steps render from their own threads
+        with ThreadPoolExecutor(max_workers=2) as threads:
+            results = list(threads.map(render.render_all, [jobs[:2], jobs[2:]]))
+    finally:
+        render.shutdown()
+        render.configure(workers=1)
+
+    assert results == [True, True]
+    assert sorted(render.read_render_manifest(str(tmp_path))) == [f"chart_{i}.png" for i in range(4)]
@@ -0,0 +1,97 @@
+import pytest
+import pandas as pd
+import src.analysis_context as analysis_context
+import src.data_analysis as data_analysis
+import src.db as db
+import src.ingestion as ingestion
+import src.manifest as manifest
+import src.seasons as seasons
+import src.transform as transform
+
+
+@pytest.fixture
+def sqlite_backend(tmp_path, monkeypatch):
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("DB_PATH", str(tmp_path / "seasons.sqlite"))
+    db.dispose_engine()
+    analysis_context.reset_context()
+    ingestion.setup_tables()
+    yield
+    db.dispose_engine()
+    manifest.reset_changed_tables()
+
+
+def source_frame(table_name, season, rows=40):
+    # The first rows of a source file, relabelled as the given season
+    df = ingestion.preprocess_source(table_name, ingestion.DATA_FILES[table_name]).head(rows).copy()
+    df["season"] = str(season)
+    return df
+
+
+def stored_counts(table_name):
+    counts = pd.read_sql(f"SELECT season, COUNT(*) AS n FROM {table_name} GROUP BY season", db.get_engine())
+    return dict(zip(counts["season"].astype(str), counts["n"]))
+
+
+def test_season_condition():
+    assert seasons.season_condition("xg", [2024, "2023"]) == "season IN ('2023', '2024')"
+    assert seasons.season_condition("xg", seasons.ALL) is None
+    assert seasons.season_condition("xgoals_games", 2024) == "(date >= '2024-01-01' AND date < '2025-01-01')"
+    assert seasons.label(["2024", "2022"]) == "2022-2024 seasons"
+
+
+def test_loading_a_season_keeps_the_others(sqlite_backend):
+    ingestion.load_data_to_postgres(source_frame("xg", 2023), "xg")
+    ingestion.load_data_to_postgres(source_frame("xg", 2024), "xg")
+    assert stored_counts("xg") == {"2023": 40, "2024": 40}
+
+    # Reloading a season replaces only that season, by either load method
+    ingestion.load_data_to_postgres(source_frame("xg", 2024, rows=10), "xg", method="to_sql")
+    assert stored_counts("xg") == {"2023": 40, "2024": 10}
+    assert seasons.stored_seasons("xg") == ["2023", "2024"]
+
+
+def test_loading_a_year_of_games_keeps_the_others(sqlite_backend):
+    games_df = ingestion.preprocess_source("xgoals_games", ingestion.DATA_FILES["xgoals_games"])
+    earlier_df = games_df.assign(date=games_df["date"].str.replace("2024-", "2023-", regex=False))
+    ingestion.load_data_to_postgres(earlier_df, "xgoals_games")
+    ingestion.load_data_to_postgres(games_df, "xgoals_games")
+    assert seasons.partition_values("xgoals_games", games_df) == ["2024"]
+    assert seasons.stored_seasons("xgoals_games") == ["2023", "2024"]
+
+    # Each season's standings only count that year's games
+    context = analysis_context.AnalysisContext()
+    points_2023 = data_analysis.calculate_team_points(context=context, season=2023)
+    points_2024 = data_analysis.calculate_team_points(context=context, season=2024)
+    pd.testing.assert_frame_equal(points_2023, points_2024)
+
+
+def test_incremental_transform_of_one_season(sqlite_backend):
+    for table_name in transform.SOURCE_TABLES:
+        ingestion.load_data_to_postgres(pd.concat([source_frame(table_name, 2023), source_frame(table_name, 2024)]), table_name)
+    transform.create_player_performance_metrics()
+    transform.add_per_90_and_efficiency_metrics()
+
+    query = "SELECT * FROM player_performance_metrics WHERE season = '2023' ORDER BY player, team"
+    before_2023 = pd.read_sql(query, db.get_engine())
+
+    # A new 2024 xg file with fewer players
+    manifest.reset_changed_tables()
+    fingerprint = manifest.compute_file_fingerprint(ingestion.DATA_FILES["xg"])
+    assert ingestion.load_source("xg", ingestion.DATA_FILES["xg"], fingerprint, source_frame("xg", 2024, rows=30))
+    manifest.mark_changed("xg")
+    assert manifest.changed_seasons(*transform.SOURCE_TABLES) == ["2024"]
+
+    assert transform.merge_players(incremental=True)
+    # 2023 is not touched, and 2024 holds what a full merge of 2024 would
+    pd.testing.assert_frame_equal(pd.read_sql(query, db.get_engine()), before_2023)
+    expected_2024 = transform.merge_player_sources(season_scope=["2024"])
+    context = analysis_context.AnalysisContext()
+    players_2024 = context.frame("player_performance_metrics", 2024)
+    assert sorted(players_2024["player"]) == sorted(expected_2024["player"])
+    assert len(context.frame("player_performance_metrics", seasons.ALL)) == len(before_2023) + len(players_2024)
+
+    # Charts cover the latest season by default and say so
+    job = data_analysis.four_quadrant_job(context=context)
+    assert job["data"]["title"].endswith("2024 season")
+    assert len(job["data"]["xg"]) == len(context.scoring_players(2024))
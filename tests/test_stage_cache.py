@@ -0,0 +1,28 @@
+import pytest
+import pandas as pd
+import src.stage_cache as stage_cache
+
+
+def test_write_and_read_frame(tmp_path):
+    stage_cache.enable(str(tmp_path), offline=True)
+    try:
+        df = pd.DataFrame({
+            "player": ["Riqui Puig", "Christian Benteke"],
+            "team": pd.Categorical(["LAG", "DCU"]),
+            "xg": [5.5, 19.57],
+        })
+        published = []
+        stage_cache.write_frame("xg", df, publish=published.append)
+
+        cached_df = stage_cache.read_frame("xg", columns=["team", "xg"])
+
+        # Categoricals come back as plain strings, like a database query would return
+        expected_df = pd.DataFrame({"team": ["LAG", "DCU"], "xg": [5.5, 19.57]})
+        pd.testing.assert_frame_equal(cached_df, expected_df)
+        assert stage_cache.read_frame("goals_added") is None
+
+        # Offline runs never publish to the database
+        assert stage_cache.publish_all() == []
+        assert published == []
+    finally:
+        stage_cache.disable()
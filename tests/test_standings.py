@@ -0,0 +1,51 @@
+import pandas as pd
+import src.standings as standings
+
+
+def sample_games():
+    return pd.DataFrame({
+        "date": ["2024-03-01", "2024-03-01", "2024-03-08", "2024-03-15"],
+        "home_team": ["ATL", "MIA", "ATL", "NYC"],
+        "home_goals": [2, 1, 0, 1],
+        "away_team": ["MIA", "NYC", "NYC", "MIA"],
+        "away_goals": [1, 1, 3, 0],
+        "home_xg": [1.5, 0.8, 0.4, 1.1],
+        "away_xg": [0.9, 1.2, 2.0, 0.7],
+        "home_xpts": [2.0, 1.1, 0.3, 1.8],
+        "away_xpts": [0.8, 1.6, 2.6, 0.9],
+    })
+
+
+def test_compute_standings():
+    table = standings.compute_standings(sample_games()).set_index("team")
+
+    assert list(table.index) == ["NYC", "ATL", "MIA"]
+    assert table.loc["NYC", ["played", "wins", "draws", "losses", "points"]].tolist() == [3, 2, 1, 0, 7]
+    assert table.loc["ATL", ["home_points", "away_points", "goals_for", "goals_against"]].tolist() == [3, 0, 2, 4]
+    assert table.loc["MIA", "goal_difference"] == -2
+    assert table.loc["ATL", "xg_for"] == 1.9
+    assert table.loc["NYC", "xpts"] == 6.0
+
+
+def test_teams_with_only_home_or_away_games_are_included():
+    games = sample_games().iloc[[0]]
+
+    table = standings.compute_standings(games).set_index("team")
+
+    assert table.loc["ATL", "home_points"] == 3
+    assert table.loc["MIA", "away_points"] == 0
+    assert table.loc["MIA", "losses"] == 1
+
+
+def test_standings_as_of_date_match_running_standings():
+    games = sample_games()
+
+    as_of = standings.compute_standings(games, as_of="2024-03-08")
+    running = standings.standings_by_date(games)
+    latest = running[running["date"] <= "2024-03-08"].groupby("team").tail(1)
+
+    assert as_of["played"].sum() == 6
+    pd.testing.assert_frame_equal(
+        latest.drop(columns="date").sort_values("team").reset_index(drop=True),
+        as_of.sort_values("team").reset_index(drop=True),
+    )
@@ -33,11 +33,11 @@ def test_add_efficiency_metrics():
     # Sample input
     sample_data = {
         "player_id": [1],
-        "G": [10],
-        "Shots": [50],
-        "SoT": [20],
-        "KeyP": [5],
-        "A": [3],
+        "goals": [10],
+        "shots": [50],
+        "shots_on_target": [20],
+        "key_passes": [5],
+        "assists": [3],
         "xg": [8],
         "xa": [2]
     }
@@ -49,11 +49,11 @@ def test_add_efficiency_metrics():
     # Expected output
     expected_data = {
         "player_id": [1],
-        "G": [10],
-        "Shots": [50],
-        "SoT": [20],
-        "KeyP": [5],
-        "A": [3],
+        "goals": [10],
+        "shots": [50],
+        "shots_on_target": [20],
+        "key_passes": [5],
+        "assists": [3],
         "xg": [8],
         "xa": [2],
         "goal_conversion_rate": [0.2],
@@ -65,4 +65,48 @@ def test_add_efficiency_metrics():
     expected_df = pd.DataFrame(expected_data)
 
     # Assert
-    pd.testing.assert_frame_equal(df_with_efficiency, expected_df)
\ No newline at end of file
+    pd.testing.assert_frame_equal(df_with_efficiency, expected_df)
+
+def test_per_90_matrix_with_minimum_minutes():
+    df = pd.DataFrame({
+        "minutes": [900, 300, 0],
+        "goals_added": [3.0, 1.0, 0.5],
+        "xg": [5.0, 2.0, 1.0],
+        "passes": [450, 150, 10],
+        "points_added": [1.8, 0.2, 0.0],
+        "pass_percentage": [80.0, 75.0, 90.0],
+        "score": [12.5, -3.0, 0.4],
+        "shot_accuracy": [0.4, 0.5, 0.0],
+        "id_x": [1, 2, 3],
+        "source_hash": [11, 12, 13],
+    })
+
+    df = transform.calculate_per_90_stats(df, min_minutes=450, dtype="float32")
+
+    # Every counting stat is converted; percentages, scores, ratios and ids are not
+    assert [col for col in df.columns if col.endswith("_per_90")] == [
+        "goals_added_per_90", "xg_per_90", "passes_per_90", "points_added_per_90"
+    ]
+    # A second pass does not convert the rates again
+    assert transform.per_90_metrics(df) == ["goals_added", "xg", "passes", "points_added"]
+    assert df["xg_per_90"].dtype == "float32"
+    assert df["passes_per_90"].tolist() == [45.0, 0.0, 0.0]
+    assert df["goals_added_per_90"].tolist() == pytest.approx([0.3, 0.0, 0.0])
+
+def test_efficiency_ratios_with_zero_denominators():
+    # A player without shots or key passes and a player with only shots
+    df = pd.DataFrame({
+        "goals": [0, 2],
+        "shots": [0, 8],
+        "shots_on_target": [0, 4],
+        "key_passes": [0, 0],
+        "assists": [0, 0],
+    })
+
+    df = transform.calculate_efficiency_metrics(df)
+
+    # Zero denominators give 0 and ratios without their input columns are skipped
+    assert df["goal_conversion_rate"].tolist() == [0, 0.25]
+    assert df["shot_accuracy"].tolist() == [0, 0.5]
+    assert df["key_pass_to_assist_ratio"].tolist() == [0, 0]
+    assert "xg_conversion_rate" not in df.columns